@@ -18,16 +18,48 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 from six.moves import cPickle as pickle
 
+from collections import OrderedDict
+from contextlib import contextmanager
 import os
 import logging
+import sqlite3
+import sys
+import threading
 import time
 
 log = logging.getLogger('custodian.cache')
 
 CACHE_NOTIFY = False
 
+# Resource snapshot for the current execution (ie. a `custodian run`)
+SNAPSHOT = None
 
-def factory(config):
+
+@contextmanager
+def resource_snapshot():
+    """Share fetched resources across the policies executed within the block.
+    """
+    global SNAPSHOT
+    SNAPSHOT = ResourceSnapshot()
+    try:
+        yield SNAPSHOT
+    finally:
+        SNAPSHOT = None
+
+
+def factory(config, scope=None):
+    """Return the configured cache.
+
+    Given a scope, the cache is layered under any resource snapshot
+    active at the time of use, with snapshot keys qualified by the scope.
+    """
+    cache = _factory(config)
+    if scope is not None:
+        return SnapshotCache(cache, scope)
+    return cache
+
+
+def _factory(config):
 
     global CACHE_NOTIFY
 
@@ -43,9 +75,9 @@ def factory(config):
         if not CACHE_NOTIFY:
             log.debug("Using in-memory cache")
             CACHE_NOTIFY = True
-        return InMemoryCache()
+        return InMemoryCache(config)
 
-    return FileCacheManager(config)
+    return SqlKvCache(config)
 
 
 class NullCache(object):
@@ -65,29 +97,129 @@ class NullCache(object):
     def size(self):
         return 0
 
+    def get_metadata(self):
+        return {}
+
 
 class InMemoryCache(object):
-    # Running in a temporary environment, so keep as a cache.
+    """Process wide cache, bounded by size and entry age.
 
-    __shared_state = {}
+    Running in a temporary or long lived host environment (lambda,
+    azure container host), so keep as a cache, evicting the least
+    recently used entries once the memory budget is exceeded.
 
-    def __init__(self):
+    The budget is given in megabytes via the `cache_memory_limit`
+    option (`custodian run --cache-memory-limit`), entries expire
+    after `cache_period` minutes.
+    """
+
+    __shared_state = OrderedDict()
+    __shared_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+    # running total of the estimated size of the entries
+    __shared_usage = {'size': 0}
+    __shared_lock = threading.Lock()
+
+    default_memory_limit = 256
+
+    # sequences longer than this are sized from an evenly spaced sample
+    sample_size = 32
+
+    def __init__(self, config=None):
         self.data = self.__shared_state
+        self.stats = self.__shared_stats
+        self.usage = self.__shared_usage
+        self.lock = self.__shared_lock
+        self.cache_period = getattr(config, 'cache_period', 0) or 0
+        self.max_bytes = int((getattr(config, 'cache_memory_limit', None) or
+                              self.default_memory_limit) * 1024 * 1024)
 
     def load(self):
         return True
 
     def get(self, key):
-        return self.data.get(pickle.dumps(key))
+        k = pickle.dumps(key)
+        with self.lock:
+            entry = self.data.pop(k, None)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            value, size, created = entry
+            if self.cache_period and time.time() - created > self.cache_period * 60:
+                self.usage['size'] -= size
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+            # reinsert to mark as most recently used
+            self.data[k] = entry
+            self.stats['hits'] += 1
+            return value
 
     def save(self, key, data):
-        self.data[pickle.dumps(key)] = data
+        k = pickle.dumps(key)
+        size = self._sizeof(data)
+        with self.lock:
+            previous = self.data.pop(k, None)
+            if previous is not None:
+                self.usage['size'] -= previous[1]
+            if size > self.max_bytes:
+                log.debug("Not caching %d bytes, exceeds cache memory limit" % size)
+                return
+            while self.data and self.usage['size'] + size > self.max_bytes:
+                _, (_, evicted, _) = self.data.popitem(last=False)
+                self.usage['size'] -= evicted
+                self.stats['evictions'] += 1
+            self.data[k] = (data, size, time.time())
+            self.usage['size'] += size
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.usage['size'] = 0
+
+    @classmethod
+    def _sizeof(cls, data):
+        # serialized size is a reasonable proxy for the memory held by
+        # the plain dict/list resource structures we cache, large resource
+        # lists are extrapolated from a sample rather than serialized.
+        try:
+            if isinstance(data, (list, tuple)) and len(data) > cls.sample_size:
+                sample = data[::len(data) // cls.sample_size][:cls.sample_size]
+                return len(pickle.dumps(sample, protocol=2)) * len(data) // len(sample)
+            return len(pickle.dumps(data, protocol=2))
+        except Exception:
+            return sys.getsizeof(data)
 
     def size(self):
-        return sum(map(len, self.data.values()))
+        with self.lock:
+            return self.usage['size']
+
+    def get_metadata(self):
+        with self.lock:
+            md = dict(self.stats)
+            md['entries'] = len(self.data)
+            md['size'] = self.usage['size']
+            md['max_size'] = self.max_bytes
+        return md
+
 
+class SqlKvCache(object):
+    """Per key file cache backed by sqlite.
 
-class FileCacheManager(object):
+    Entries are read and written individually, each carrying its own
+    creation timestamp for expiration, with writes done in a transaction
+    so multiple processes (ie. c7n-org workers) can share a cache file.
+    """
+
+    create_table = """
+    create table if not exists c7n_cache (
+       key blob primary key,
+       value blob,
+       create_date real
+    )
+    """
+
+    # seconds to wait on another process holding the write lock
+    lock_timeout = 60
 
     def __init__(self, config):
         self.config = config
@@ -96,43 +228,183 @@ class FileCacheManager(object):
             os.path.expanduser(
                 os.path.expandvars(
                     config.cache)))
-        self.data = {}
-
-    def get(self, key):
-        k = pickle.dumps(key)
-        return self.data.get(k)
+        self.conn = None
+        self.lock = threading.Lock()
 
     def load(self):
-        if self.data:
+        if self.conn is not None:
             return True
-        if os.path.isfile(self.cache_path):
-            if (time.time() - os.stat(self.cache_path).st_mtime >
-                    self.config.cache_period * 60):
+        with self.lock:
+            if self.conn is not None:
+                return True
+            try:
+                self.conn = self._connect()
+            except (sqlite3.Error, OSError, IOError) as e:
+                log.warning("Could not open cache %s err: %s" % (
+                    self.cache_path, e))
                 return False
+        log.debug("Using cache file %s" % self.cache_path)
+        return True
+
+    def _connect(self):
+        if os.path.isfile(self.cache_path):
+            # migrate from the whole file pickle format
             with open(self.cache_path, 'rb') as fh:
-                try:
-                    self.data = pickle.load(fh)
-                except EOFError:
-                    return False
-            log.debug("Using cache file %s" % self.cache_path)
-            return True
+                header = fh.read(15)
+            if header and header != b'SQLite format 3':
+                log.debug("Removing old format cache file %s" % self.cache_path)
+                os.remove(self.cache_path)
+        else:
+            directory = os.path.dirname(self.cache_path)
+            if not os.path.exists(directory):
+                log.info('Generating Cache directory: %s.' % directory)
+                os.makedirs(directory)
+        conn = sqlite3.connect(
+            self.cache_path, timeout=self.lock_timeout,
+            check_same_thread=False)
+        with conn:
+            conn.execute(self.create_table)
+            conn.execute(
+                'delete from c7n_cache where create_date < ?',
+                (time.time() - self.cache_period * 60,))
+        return conn
 
-    def save(self, key, data):
+    def get(self, key):
+        if not self.load():
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                'select value, create_date from c7n_cache where key = ?',
+                (sqlite3.Binary(pickle.dumps(key, protocol=2)),)).fetchone()
+        if row is None:
+            return None
+        value, create_date = row
+        if time.time() - create_date > self.cache_period * 60:
+            return None
         try:
-            with open(self.cache_path, 'wb') as fh:
-                self.data[pickle.dumps(key)] = data
-                pickle.dump(self.data, fh, protocol=2)
+            return pickle.loads(bytes(value))
+        except Exception as e:
+            # truncated, or written by an incompatible version
+            log.warning("Removing unreadable cache entry %s err: %s" % (
+                self.cache_path, e))
+            with self.lock, self.conn:
+                self.conn.execute(
+                    'delete from c7n_cache where key = ?',
+                    (sqlite3.Binary(pickle.dumps(key, protocol=2)),))
+            return None
+
+    def save(self, key, data, timestamp=None):
+        if not self.load():
+            return
+        try:
+            with self.lock, self.conn:
+                self.conn.execute(
+                    'replace into c7n_cache (key, value, create_date) values (?, ?, ?)',
+                    (sqlite3.Binary(pickle.dumps(key, protocol=2)),
+                     sqlite3.Binary(pickle.dumps(data, protocol=2)),
+                     timestamp or time.time()))
         except Exception as e:
             log.warning("Could not save cache %s err: %s" % (
                 self.cache_path, e))
-            if not os.path.exists(self.cache_path):
-                directory = os.path.dirname(self.cache_path)
-                log.info('Generating Cache directory: %s.' % directory)
-                try:
-                    os.makedirs(directory)
-                except Exception as e:
-                    log.warning("Could not create directory: %s err: %s" % (
-                        directory, e))
 
     def size(self):
         return os.path.exists(self.cache_path) and os.path.getsize(self.cache_path) or 0
+
+    def get_metadata(self):
+        return {}
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+class ResourceSnapshot(object):
+    """Execution scoped store of fetched resources.
+
+    Values are held serialized, so every consumer gets its own copy and
+    annotations made by one policy don't leak into another.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.stats = {'hits': 0, 'misses': 0}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        k = pickle.dumps(key, protocol=2)
+        with self.lock:
+            value = self.data.get(k)
+            self.stats[value is None and 'misses' or 'hits'] += 1
+        if value is None:
+            return None
+        return pickle.loads(value)
+
+    def save(self, key, data):
+        try:
+            value = pickle.dumps(data, protocol=2)
+        except Exception as e:
+            log.debug("Could not snapshot resources err: %s" % e)
+            return
+        with self.lock:
+            self.data[pickle.dumps(key, protocol=2)] = value
+
+    def size(self):
+        with self.lock:
+            return sum(map(len, self.data.values()))
+
+    def get_metadata(self):
+        with self.lock:
+            md = dict(self.stats)
+            md['entries'] = len(self.data)
+        md['size'] = self.size()
+        return md
+
+
+class SnapshotCache(object):
+    """Layers the active resource snapshot over a configured cache.
+
+    Resource managers are instantiated when policies are loaded, so the
+    snapshot is looked up on each access rather than at construction.
+    Cache keys aren't qualified by provider, account, or resource type
+    in every provider, so snapshot keys are prefixed with the scope.
+    """
+
+    def __init__(self, cache, scope):
+        self.cache = cache
+        self.scope = scope
+
+    @property
+    def snapshot(self):
+        return SNAPSHOT
+
+    def load(self):
+        return self.snapshot is not None or self.cache.load()
+
+    def get(self, key):
+        snapshot = self.snapshot
+        value = None
+        if snapshot is not None:
+            value = snapshot.get((self.scope, key))
+        if value is None and self.cache.load():
+            value = self.cache.get(key)
+            if value is not None and snapshot is not None:
+                snapshot.save((self.scope, key), value)
+        return value
+
+    def save(self, key, data):
+        snapshot = self.snapshot
+        if snapshot is not None:
+            snapshot.save((self.scope, key), data)
+        self.cache.save(key, data)
+
+    def size(self):
+        return self.cache.size()
+
+    def get_metadata(self):
+        md = self.cache.get_metadata()
+        snapshot = self.snapshot
+        if snapshot is not None:
+            md = dict(md, snapshot=snapshot.get_metadata())
+        return md
@@ -108,6 +108,10 @@ def _default_options(p, blacklist=""):
         p.add_argument(
             "--cache-period", default=15, type=int,
             help="Cache validity in minutes (default %(default)i)")
+        p.add_argument(
+            "--cache-memory-limit", type=float, default=None,
+            help="Memory budget in megabytes of the in-memory cache, "
+                 "ie. with --cache memory (default 256)")
     else:
         p.add_argument("--cache", default=None, help=argparse.SUPPRESS)
 
@@ -255,6 +259,10 @@ def setup_parser():
         dest="tracer",
         help=argparse.SUPPRESS,
         default=None, nargs="?", const="default")
+    run.add_argument(
+        "--parallel", type=int, default=1, metavar="N",
+        help="Number of policies to execute concurrently (default %(default)i), "
+        "api calls are rate limited per service when greater than 1.")
 
     schema_desc = ("Browse the available vocabularies (resources, filters, modes, and "
                    "actions) for policy construction. The selector "
@@ -33,7 +33,8 @@ from c7n.policy import Policy, PolicyCollection, load as policy_load
 from c7n.schema import ElementSchema, generate
 from c7n.utils import dumps, load_file, local_session, SafeLoader, yaml_dump
 from c7n.config import Bag, Config
-from c7n import provider
+from c7n import cache, credentials, provider
+from c7n.executor import executor
 from c7n.resources import load_resources
 
 
@@ -52,7 +53,6 @@ def policy_command(f):
         if not validate:
             log.debug('Policy validation disabled')
 
-        load_resources()
         vars = _load_vars(options)
 
         errors = 0
@@ -266,20 +266,49 @@ def run(options, policies):
             log.exception("Unable to assume role %s", options.assume_role)
             sys.exit(1)
 
-    for policy in policies:
-        try:
-            policy()
-        except Exception:
-            exit_code = 2
-            if options.debug:
-                raise
-            log.exception(
-                "Error while executing policy %s, continuing" % (
-                    policy.name))
+    # Policies against the same resources share a single fetch
+    with cache.resource_snapshot():
+        if getattr(options, 'parallel', 1) > 1:
+            exit_code = _run_parallel(options, policies)
+        else:
+            for policy in policies:
+                try:
+                    policy()
+                except Exception:
+                    exit_code = 2
+                    if options.debug:
+                        raise
+                    log.exception(
+                        "Error while executing policy %s, continuing" % (
+                            policy.name))
     if exit_code != 0:
         sys.exit(exit_code)
 
 
+def _run_parallel(options, policies):
+    """Execute policies concurrently, reporting errors in policy order.
+    """
+    exit_code = 0
+    credentials.RATE_LIMITER = credentials.ApiRateLimiter()
+    try:
+        with executor('thread', max_workers=options.parallel) as w:
+            futures = [w.submit(policy) for policy in policies]
+            for policy, f in zip(policies, futures):
+                e = f.exception()
+                if e is None:
+                    continue
+                exit_code = 2
+                if options.debug:
+                    raise e
+                log.error(
+                    "Error while executing policy %s, continuing" % (
+                        policy.name),
+                    exc_info=(type(e), e, getattr(e, '__traceback__', None)))
+    finally:
+        credentials.RATE_LIMITER = None
+    return exit_code
+
+
 @policy_command
 def report(options, policies):
     from c7n.reports import report as do_report
@@ -52,6 +52,7 @@ class Config(Bag):
             'metrics': None,
             'output_dir': '',
             'cache_period': 0,
+            'cache_memory_limit': None,
             'dryrun': False,
             'authorization_file': None})
         d.update(kw)
@@ -17,13 +17,17 @@ Authentication utilities
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import os
+import threading
 
 from botocore.credentials import RefreshableCredentials
 from botocore.session import get_session
 from boto3 import Session
 
 from c7n.version import version
-from c7n.utils import get_retry
+from c7n.utils import get_retry, TokenBucket
+
+# Api rate limiter applied to all sessions, while executing policies in parallel.
+RATE_LIMITER = None
 
 
 class SessionFactory(object):
@@ -64,12 +68,48 @@ class SessionFactory(object):
         for s in self._subscribers:
             s(session)
 
+        if RATE_LIMITER is not None:
+            session.events.register(
+                'before-call.*.*', RATE_LIMITER, unique_id='c7n-rate-limit')
+
         return session
 
     def set_subscribers(self, subscribers):
         self._subscribers = subscribers
 
 
+class ApiRateLimiter(object):
+    """Limit the rate of api calls per service across sessions.
+
+    Each service gets its own token bucket, as throttling limits are
+    typically per service per account (ie. ec2 vs iam). Rates are given
+    as (calls per second, burst).
+    """
+
+    default_rate = (10, 20)
+    service_rates = {
+        'ec2': (20, 50),
+        'iam': (5, 10),
+        'monitoring': (20, 40),
+        'tagging': (5, 10),
+    }
+
+    def __init__(self, service_rates=None):
+        self.service_rates = dict(self.service_rates, **(service_rates or {}))
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def get_bucket(self, service):
+        with self.lock:
+            if service not in self.buckets:
+                self.buckets[service] = TokenBucket(
+                    *self.service_rates.get(service, self.default_rate))
+            return self.buckets[service]
+
+    def __call__(self, model, **kwargs):
+        self.get_bucket(model.service_model.endpoint_prefix).acquire()
+
+
 def assumed_session(role_arn, session_name, session=None, region=None, external_id=None):
     """STS Role assume a boto3.Session
 
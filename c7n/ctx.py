@@ -45,6 +45,8 @@ class ExecutionContext(object):
         self.output = None
         self.api_stats = None
         self.sys_stats = None
+        # related resource type -> index, shared by a policy's filters
+        self.related_resources = {}
 
         # A few tests patch on metrics flush
         # For backward compatibility, accept both 'metrics' and 'metrics_enabled' params (PR #4361)
@@ -74,6 +76,7 @@ class ExecutionContext(object):
                 self.sys_stats = sys_stats_outputs.select(sys_stats_type, self)
                 break
 
+        self.related_resources = {}
         self.start_time = time.time()
         self.execution_id = str(uuid.uuid4())
 
@@ -124,7 +127,7 @@ class ExecutionContext(object):
         if os.environ.get('C7N_TEST_RUN'):
             reset_session_cache()
 
-    def get_metadata(self, include=('sys-stats', 'api-stats', 'metrics')):
+    def get_metadata(self, include=('sys-stats', 'api-stats', 'metrics', 'cache-stats')):
         t = time.time()
         md = {
             'policy': self.policy.data,
@@ -143,4 +146,6 @@ class ExecutionContext(object):
             md['api-stats'] = self.api_stats.get_metadata()
         if 'metrics' in include and self.metrics:
             md['metrics'] = self.metrics.get_metadata()
+        if 'cache-stats' in include:
+            md['cache-stats'] = self.policy.get_cache().get_metadata()
         return md
@@ -13,14 +13,47 @@
 # limitations under the License.
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-from concurrent.futures import (
-    ProcessPoolExecutor, ThreadPoolExecutor)
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor
 
 from c7n.registry import PluginRegistry
 
 import threading
 
 
+# Threads currently executing a policy, keyed by thread ident, so
+# policies executing in parallel don't record each other's logs.
+POLICY_THREADS = {}
+
+
+class ThreadPoolExecutor(futures.ThreadPoolExecutor):
+    """Thread pool whose workers run tasks as part of the submitter's policy.
+
+    Tasks submitted from a thread executing a policy are registered to
+    that policy in POLICY_THREADS while they run.
+    """
+
+    def submit(self, fn, *args, **kw):
+        policy = POLICY_THREADS.get(threading.current_thread().ident)
+        if policy is None:
+            return super(ThreadPoolExecutor, self).submit(fn, *args, **kw)
+        return super(ThreadPoolExecutor, self).submit(
+            run_as_policy, policy, fn, *args, **kw)
+
+
+def run_as_policy(policy, fn, *args, **kw):
+    ident = threading.current_thread().ident
+    previous = POLICY_THREADS.get(ident)
+    POLICY_THREADS[ident] = policy
+    try:
+        return fn(*args, **kw)
+    finally:
+        if previous is None:
+            POLICY_THREADS.pop(ident, None)
+        else:
+            POLICY_THREADS[ident] = previous
+
+
 class ExecutorRegistry(PluginRegistry):
 
     def __init__(self, plugin_type):
@@ -20,6 +20,7 @@ import copy
 import datetime
 from datetime import timedelta
 import fnmatch
+import functools
 import logging
 import operator
 import re
@@ -69,6 +70,12 @@ def regex_case_sensitive_match(value, regex):
     return bool(re.match(regex, value))
 
 
+def compiled_regex_match(pattern, value, regex=None):
+    if not isinstance(value, six.string_types):
+        return False
+    return bool(pattern.match(value))
+
+
 def operator_in(x, y):
     return x in y
 
@@ -77,6 +84,21 @@ def operator_ni(x, y):
     return x not in y
 
 
+def set_in(x, y):
+    try:
+        return x in y
+    except TypeError:
+        # unhashable values can't be members of a set
+        return False
+
+
+def set_ni(x, y):
+    try:
+        return x not in y
+    except TypeError:
+        return True
+
+
 def difference(x, y):
     return bool(set(x).difference(y))
 
@@ -109,6 +131,17 @@ OPERATORS = {
     'intersect': intersect}
 
 
+# Operators evaluated against a frozenset when the value is a list of
+# hashables, and the value types which leave the value as is.
+SET_OPERATORS = {
+    'in': set_in,
+    'ni': set_ni,
+    'not-in': set_ni,
+    'difference': difference,
+    'intersect': intersect}
+
+SET_VALUE_TYPES = (None, 'normalize', 'integer', 'size', 'unique_size', 'cidr_size')
+
 VALUE_TYPES = [
     'age', 'integer', 'expiration', 'normalize', 'size',
     'cidr', 'cidr_size', 'swap', 'resource_count', 'expr',
@@ -371,6 +404,7 @@ class ValueFilter(Filter):
     """
     expr = None
     op = v = vtype = None
+    value_regex = compiled = None
 
     schema = {
         'type': 'object',
@@ -498,6 +532,8 @@ class ValueFilter(Filter):
                 return resources
             return []
 
+        # relative date sentinels (age, expiration) are recomputed per resource set.
+        self.compiled = None
         return super(ValueFilter, self).process(resources, event)
 
     def get_resource_value(self, k, i):
@@ -526,10 +562,41 @@ class ValueFilter(Filter):
             r = self.expr[k].search(i)
 
         if 'value_regex' in self.data:
-            regex = ValueRegex(self.data['value_regex'])
-            r = regex.get_resource_value(r)
+            if self.value_regex is None:
+                self.value_regex = ValueRegex(self.data['value_regex'])
+            r = self.value_regex.get_resource_value(r)
         return r
 
+    def compile(self):
+        """Resolve the operator and any resource independent sentinel conversion.
+
+        Done once rather than per resource, returns the operator function
+        and the sentinel value.
+        """
+        v = self.v
+        if self.vtype in ('age', 'expiration') and isinstance(v, (int, float)):
+            now = datetime.datetime.now(tz=tzutc())
+            v = self.vtype == 'age' and now - timedelta(v) or now + timedelta(v)
+        elif self.vtype == 'date':
+            v = parse_date(v)
+        elif self.vtype == 'version':
+            v = ComparableVersion(v)
+
+        op = OPERATORS.get(self.op)
+        if (self.op in SET_OPERATORS and self.vtype in SET_VALUE_TYPES and
+                isinstance(v, (list, tuple, set))):
+            try:
+                v = frozenset(v)
+                op = SET_OPERATORS[self.op]
+            except TypeError:
+                pass
+        elif self.op in ('regex', 'regex-case') and self.vtype is None and isinstance(
+                v, six.string_types):
+            op = functools.partial(
+                compiled_regex_match,
+                re.compile(v, self.op == 'regex' and re.IGNORECASE or 0))
+        return op, v
+
     def match(self, i):
         if self.v is None and len(self.data) == 1:
             [(self.k, self.v)] = self.data.items()
@@ -553,11 +620,13 @@ class ValueFilter(Filter):
         if self.op in ('in', 'not-in') and r is None:
             r = ()
 
+        if self.compiled is None:
+            self.compiled = self.compile()
+        op, v = self.compiled
+
         # value type conversion
         if self.vtype is not None:
-            v, r = self.process_value_type(self.v, r, i)
-        else:
-            v = self.v
+            v, r = self.process_value_type(v, r, i)
 
         # Value match
         if r is None and v == 'absent':
@@ -569,7 +638,6 @@ class ValueFilter(Filter):
         elif v == 'empty' and not r:
             return True
         elif self.op:
-            op = OPERATORS[self.op]
             try:
                 return op(r, v)
             except TypeError:
@@ -641,7 +709,9 @@ class ValueFilter(Filter):
 
         # Allows for comparing version numbers, for things that you expect a minimum version number.
         elif self.vtype == 'version':
-            s = ComparableVersion(sentinel)
+            s = sentinel
+            if not isinstance(s, ComparableVersion):
+                s = ComparableVersion(sentinel)
             v = ComparableVersion(value)
             return s, v
 
@@ -723,6 +793,9 @@ def cast_tz(d, tz):
     return d.astimezone(tz)
 
 
+ISO_PARSE = getattr(datetime.datetime, 'fromisoformat', None)
+
+
 def parse_date(v, tz=None):
     if v is None:
         return v
@@ -735,6 +808,12 @@ def parse_date(v, tz=None):
         return v
 
     if isinstance(v, six.string_types):
+        # fast path for iso 8601, the common api format
+        if ISO_PARSE is not None:
+            try:
+                return cast_tz(ISO_PARSE(v), tz)
+            except ValueError:
+                pass
         try:
             return cast_tz(parse(v), tz)
         except (AttributeError, TypeError, ValueError):
@@ -772,12 +851,13 @@ class ValueRegex(object):
 
     def __init__(self, expr):
         self.expr = expr
+        self.regex = re.compile(expr)
 
     def get_resource_value(self, resource):
         if resource is None:
             return resource
         try:
-            capture = re.match(self.expr, resource)
+            capture = self.regex.match(resource)
         except (ValueError, TypeError):
             return None
         if capture is None:  # regex didn't capture anything
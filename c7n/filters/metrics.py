@@ -19,6 +19,8 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 from concurrent.futures import as_completed
 from datetime import datetime, timedelta
 
+from botocore.exceptions import ClientError
+
 from c7n.exceptions import PolicyValidationError
 from c7n.filters.core import Filter, OPERATORS
 from c7n.utils import local_session, type_schema, chunks
@@ -77,6 +79,11 @@ class MetricsFilter(Filter):
     policy to treat their request counts as 0.
 
     Note the default statistic for metrics is Average.
+
+    Metrics are retrieved in batches via GetMetricData, with identical
+    metric queries (namespace, name, dimensions, period, statistic)
+    across resources fetched once. If the GetMetricData api is denied,
+    the filter falls back to a GetMetricStatistics call per resource.
     """
 
     schema = type_schema(
@@ -99,11 +106,19 @@ class MetricsFilter(Filter):
            'missing-value': {'type': 'number'},
            'required': ('value', 'name')})
     schema_alias = True
-    permissions = ("cloudwatch:GetMetricStatistics",)
+    permissions = ("cloudwatch:GetMetricData", "cloudwatch:GetMetricStatistics")
 
     MAX_QUERY_POINTS = 50850
     MAX_RESULT_POINTS = 1440
 
+    # GetMetricData api limits, queries per call and datapoints per response page.
+    MAX_DATA_QUERIES = 500
+    MAX_DATA_POINTS = 100800
+
+    # Switched off on the first access denied, for roles only granted
+    # GetMetricStatistics.
+    use_metric_data = True
+
     # Default per service, for overloaded services like ec2
     # we do type specific default namespace annotation
     # specifically AWS/EBS and AWS/EC2Spot
@@ -155,11 +170,17 @@ class MetricsFilter(Filter):
                 ns = self.DEFAULT_NAMESPACE[self.model.service]
         self.namespace = ns
 
+        # Note this annotation cache is policy scoped, not across
+        # policies, still the lack of full qualification on the key
+        # means multiple filters within a policy using the same metric
+        # across different periods or dimensions would be problematic.
+        self.metric_key = "%s.%s.%s" % (self.namespace, self.metric, self.statistics)
+
         self.log.debug("Querying metrics for %d", len(resources))
         matched = []
         with self.executor_factory(max_workers=3) as w:
             futures = []
-            for resource_set in chunks(resources, 50):
+            for resource_set in chunks(resources, self.get_batch_size()):
                 futures.append(
                     w.submit(self.process_resource_set, resource_set))
 
@@ -183,25 +204,84 @@ class MetricsFilter(Filter):
             dims.append({'Name': k, 'Value': v})
         return dims
 
+    def get_batch_size(self):
+        if not self.use_metric_data:
+            return 50
+        points = max(1, int((self.end - self.start).total_seconds() // self.period))
+        return max(1, min(self.MAX_DATA_QUERIES, self.MAX_DATA_POINTS // points))
+
+    def get_resource_dimensions(self, resource):
+        # if we overload dimensions with multiple resources we get
+        # the statistics/average over those resources.
+        dimensions = self.get_dimensions(resource)
+        # Merge in any filter specified metrics, get_dimensions is
+        # commonly overridden so we can't do it there.
+        dimensions.extend(self.get_user_dimensions())
+        return dimensions
+
+    def collect_metric_data(self, client, resource_set):
+        """Annotate resources with datapoints retrieved via GetMetricData.
+
+        Resources with identical dimensions share a single metric query.
+        """
+        queries = {}
+        resource_queries = []
+        for r in resource_set:
+            dimensions = self.get_resource_dimensions(r)
+            dkey = tuple(sorted((d['Name'], d['Value']) for d in dimensions))
+            if dkey not in queries:
+                queries[dkey] = {
+                    'Id': 'm%d' % len(queries),
+                    'MetricStat': {
+                        'Metric': {
+                            'Namespace': self.namespace,
+                            'MetricName': self.metric,
+                            'Dimensions': dimensions},
+                        'Period': self.period,
+                        'Stat': self.statistics},
+                    'ReturnData': True}
+            resource_queries.append((r, queries[dkey]['Id']))
+
+        datapoints = {q['Id']: [] for q in queries.values()}
+        params = dict(
+            MetricDataQueries=list(queries.values()),
+            StartTime=self.start,
+            EndTime=self.end,
+            ScanBy='TimestampAscending')
+        while True:
+            response = client.get_metric_data(**params)
+            for result in response['MetricDataResults']:
+                datapoints[result['Id']].extend([
+                    {'Timestamp': t, self.statistics: v}
+                    for t, v in zip(result['Timestamps'], result['Values'])])
+            if not response.get('NextToken'):
+                break
+            params['NextToken'] = response['NextToken']
+
+        for r, qid in resource_queries:
+            r['c7n.metrics'][self.metric_key] = list(datapoints[qid])
+
     def process_resource_set(self, resource_set):
         client = local_session(
             self.manager.session_factory).client('cloudwatch')
 
+        key = self.metric_key
+        pending = [r for r in resource_set
+                   if key not in r.setdefault('c7n.metrics', {})]
+        if pending and self.use_metric_data:
+            try:
+                self.collect_metric_data(client, pending)
+            except ClientError as e:
+                if e.response['Error']['Code'] not in (
+                        'AccessDenied', 'AccessDeniedException'):
+                    raise
+                self.log.warning(
+                    "GetMetricData denied, falling back to GetMetricStatistics")
+                self.use_metric_data = False
+
         matched = []
         for r in resource_set:
-            # if we overload dimensions with multiple resources we get
-            # the statistics/average over those resources.
-            dimensions = self.get_dimensions(r)
-            # Merge in any filter specified metrics, get_dimensions is
-            # commonly overridden so we can't do it there.
-            dimensions.extend(self.get_user_dimensions())
-
-            collected_metrics = r.setdefault('c7n.metrics', {})
-            # Note this annotation cache is policy scoped, not across
-            # policies, still the lack of full qualification on the key
-            # means multiple filters within a policy using the same metric
-            # across different periods or dimensions would be problematic.
-            key = "%s.%s.%s" % (self.namespace, self.metric, self.statistics)
+            collected_metrics = r['c7n.metrics']
             if key not in collected_metrics:
                 collected_metrics[key] = client.get_metric_statistics(
                     Namespace=self.namespace,
@@ -210,7 +290,7 @@ class MetricsFilter(Filter):
                     StartTime=self.start,
                     EndTime=self.end,
                     Period=self.period,
-                    Dimensions=dimensions)['Datapoints']
+                    Dimensions=self.get_resource_dimensions(r))['Datapoints']
 
             # In certain cases CloudWatch reports no data for a metric.
             # If the policy specifies a fill value for missing data, add
@@ -236,6 +236,7 @@ might look like:
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 # note we have to module import for our testing mocks
+from collections import OrderedDict
 import datetime
 import logging
 from os.path import join
@@ -314,6 +315,9 @@ class Time(Filter):
         'utc': 'Etc/UTC',
     }
 
+    # bound on distinct tag values with a memoized schedule
+    schedule_cache_size = 1024
+
     z_names = list(zoneinfo.get_zonefile_instance().zones)
     non_title_case_zones = (
         lambda aliases=TZ_ALIASES.keys(), z_names=z_names:
@@ -332,6 +336,11 @@ class Time(Filter):
         self.parser = ScheduleParser(self.default_schedule)
 
         self.id_key = None
+        self.skip_days = None
+
+        # normalized tag value -> (schedule, tz), and per run tz name -> current hour
+        self.schedules = OrderedDict()
+        self.now_table = None
 
         self.opted_out = []
         self.parse_errors = []
@@ -353,7 +362,11 @@ class Time(Filter):
         return self
 
     def process(self, resources, event=None):
-        resources = super(Time, self).process(resources)
+        self.now_table = {}
+        try:
+            resources = super(Time, self).process(resources)
+        finally:
+            self.now_table = None
         if self.parse_errors and self.manager and self.manager.ctx.log_dir:
             self.log.warning("parse errors %d", len(self.parse_errors))
             with open(join(
@@ -401,10 +414,43 @@ class Time(Filter):
     def process_resource_schedule(self, i, value, time_type):
         """Does the resource tag schedule and policy match the current time."""
         rid = i[self.id_key]
+        schedule, tz = self.resolve_schedule(value, time_type)
+        if schedule is None:
+            log.warning(
+                "Invalid schedule on resource:%s value:%s", rid, value)
+            self.parse_errors.append((rid, value))
+            return False
+        if not tz:
+            log.warning(
+                "Could not resolve tz on resource:%s value:%s", rid, value)
+            self.parse_errors.append((rid, value))
+            return False
+        now, skipped = self.get_now(schedule['tz'], tz)
+        if skipped:
+            return False
+        return self.match(now, schedule)
+
+    def resolve_schedule(self, value, time_type):
+        """Parse a tag value into its schedule and timezone.
+
+        Fleets typically share a handful of distinct schedules, so the
+        result is memoized by normalized tag value (as from get_tag_value,
+        without empty segments), evicting the least recently used.
+        """
         # this is to normalize trailing semicolons which when done allows
         # dateutil.parser.parse to process: value='off=(m-f,1);' properly.
         # before this normalization, some cases would silently fail.
         value = ';'.join(filter(None, value.split(';')))
+        key = (value, time_type)
+        resolved = self.schedules.pop(key, None)
+        if resolved is None:
+            resolved = self._resolve_schedule(value, time_type)
+            if len(self.schedules) >= self.schedule_cache_size:
+                self.schedules.popitem(last=False)
+        self.schedules[key] = resolved
+        return resolved
+
+    def _resolve_schedule(self, value, time_type):
         if self.parser.has_resource_schedule(value, time_type):
             schedule = self.parser.parse(value)
         elif self.parser.keys_are_valid(value):
@@ -418,27 +464,32 @@ class Time(Filter):
         else:
             schedule = None
         if schedule is None:
-            log.warning(
-                "Invalid schedule on resource:%s value:%s", rid, value)
-            self.parse_errors.append((rid, value))
-            return False
-        tz = self.get_tz(schedule['tz'])
-        if not tz:
-            log.warning(
-                "Could not resolve tz on resource:%s value:%s", rid, value)
-            self.parse_errors.append((rid, value))
-            return False
+            return None, None
+        return schedule, self.get_tz(schedule['tz'])
+
+    def get_now(self, tz_name, tz):
+        """Current hour in the timezone and whether it falls on a skip day.
+
+        Within a filter run it is computed once per timezone.
+        """
+        if self.now_table is not None and tz_name in self.now_table:
+            return self.now_table[tz_name]
         now = datetime.datetime.now(tz).replace(
             minute=0, second=0, microsecond=0)
-        now_str = now.strftime("%Y-%m-%d")
+        result = (now, now.strftime("%Y-%m-%d") in self.get_skip_days())
+        if self.now_table is not None:
+            self.now_table[tz_name] = result
+        return result
+
+    def get_skip_days(self):
+        if self.skip_days is not None:
+            return self.skip_days
         if 'skip-days-from' in self.data:
             values = ValuesFrom(self.data['skip-days-from'], self.manager)
             self.skip_days = values.get_values()
         else:
             self.skip_days = self.data.get('skip-days', [])
-        if now_str in self.skip_days:
-            return False
-        return self.match(now, schedule)
+        return self.skip_days
 
     def match(self, now, schedule):
         time = schedule.get(self.time_type, ())
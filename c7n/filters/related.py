@@ -51,15 +51,20 @@ class RelatedResourceFilter(ValueFilter):
             "[].%s" % self.RelatedIdsExpression, resources))
 
     def get_related(self, resources):
-        resource_manager = self.get_resource_manager()
-        related_ids = self.get_related_ids(resources)
-        model = resource_manager.get_model()
-        if len(related_ids) < self.FetchThreshold:
-            related = resource_manager.get_resources(list(related_ids))
-        else:
-            related = resource_manager.resources()
-        return {r[model.id]: r for r in related
-                if r[model.id] in related_ids}
+        return self.get_related_index().get(
+            self.get_related_ids(resources), self.FetchThreshold)
+
+    def get_related_index(self):
+        """Get the policy execution's index of the related resource type.
+
+        The index is shared by all related filters of a policy, so each
+        related resource is only fetched once per execution.
+        """
+        indexes = self.manager.ctx.related_resources
+        if self.RelatedResource not in indexes:
+            indexes[self.RelatedResource] = RelatedResourceIndex(
+                self.get_resource_manager())
+        return indexes[self.RelatedResource]
 
     def get_resource_manager(self):
         mod_path, class_name = self.RelatedResource.rsplit('.', 1)
@@ -113,3 +118,38 @@ class RelatedResourceFilter(ValueFilter):
     def process(self, resources, event=None):
         related = self.get_related(resources)
         return [r for r in resources if self.process_resource(r, related)]
+
+
+class RelatedResourceIndex(object):
+    """Related resources fetched during a policy execution, by id.
+
+    Resources are fetched by id until the ids requested across all
+    lookups reach the fetch threshold, at which point all resources of
+    the type are fetched once.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.model = manager.get_model()
+        self.resources = {}
+        self.requested = set()
+        self.complete = False
+
+    def get(self, ids, threshold):
+        missing = not self.complete and set(ids).difference(self.requested)
+        if missing:
+            self.requested.update(missing)
+            if len(self.requested) >= threshold:
+                self.all()
+            else:
+                self.resources.update({
+                    r[self.model.id]: r for r in
+                    self.manager.get_resources(list(missing))})
+        return {i: self.resources[i] for i in ids if i in self.resources}
+
+    def all(self):
+        if not self.complete:
+            self.resources = {
+                r[self.model.id]: r for r in self.manager.resources()}
+            self.complete = True
+        return list(self.resources.values())
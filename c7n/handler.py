@@ -24,7 +24,7 @@ import uuid
 import logging
 import json
 
-from c7n.policy import PolicyCollection
+from c7n.policy import PolicyCollection, get_policy_resource_types
 from c7n.resources import load_resources
 from c7n.utils import format_event, get_account_id_from_sts
 from c7n.config import Config
@@ -57,10 +57,6 @@ account_id = None
 # config.json policy data dict
 policy_config = None
 
-# On cold start load all resources, requires a pythonpath directory scan
-if 'AWS_EXECUTION_ENV' in os.environ:
-    load_resources()
-
 
 def get_local_output_dir():
     """Create a local output directory per execution.
@@ -152,6 +148,8 @@ def dispatch_event(event, context):
     if policy_config is None:
         with open('config.json') as f:
             policy_config = json.load(f)
+        # On cold start only load the resource types used by the policies
+        load_resources(get_policy_resource_types(policy_config))
 
     if not policy_config or not policy_config.get('policies'):
         return False
@@ -44,7 +44,7 @@ class ResourceManager(object):
         self.session_factory = ctx.session_factory
         self.config = ctx.options
         self.data = data
-        self._cache = cache.factory(self.ctx.options)
+        self._cache = cache.factory(self.ctx.options, self.get_cache_scope())
         self.log = logging.getLogger('custodian.resources.%s' % (
             self.__class__.__name__.lower()))
 
@@ -55,6 +55,15 @@ class ResourceManager(object):
             self.actions = self.action_registry.parse(
                 self.data.get('actions', []), self)
 
+    def get_cache_scope(self):
+        """Qualifier for this manager's entries in a shared resource snapshot."""
+        policy = getattr(self.ctx, 'policy', None)
+        return (
+            getattr(policy, 'provider_name', None),
+            getattr(self.config, 'account_id', None),
+            getattr(self.config, 'region', None),
+            "%s.%s" % (self.__class__.__module__, self.__class__.__name__))
+
     def format_json(self, resources, fh):
         return dumps(resources, fh, indent=2)
 
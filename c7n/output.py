@@ -27,13 +27,15 @@ import gzip
 import logging
 import os
 import shutil
+import threading
 import time
 import uuid
 
 
 from c7n.exceptions import InvalidOutputConfig
+from c7n.executor import POLICY_THREADS
 from c7n.registry import PluginRegistry
-from c7n.utils import parse_url_config
+from c7n.utils import dump_records, parse_url_config
 
 try:
     import psutil
@@ -323,6 +325,24 @@ class LogMetrics(Metrics):
         return res
 
 
+class PolicyLogFilter(logging.Filter):
+    """Only record the logs of the policy's threads.
+
+    Threads that aren't registered to a policy are recorded while no
+    other policy is executing.
+    """
+
+    def __init__(self, ctx):
+        super(PolicyLogFilter, self).__init__()
+        self.ctx = ctx
+
+    def filter(self, record):
+        ctx = POLICY_THREADS.get(record.thread)
+        if ctx is None:
+            return all(c is self.ctx for c in list(POLICY_THREADS.values()))
+        return ctx is self.ctx
+
+
 class LogOutput(object):
 
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -349,10 +369,13 @@ class LogOutput(object):
         self.handler = self.get_handler()
         self.handler.setLevel(logging.DEBUG)
         self.handler.setFormatter(logging.Formatter(self.log_format))
+        self.handler.addFilter(PolicyLogFilter(self.ctx))
+        POLICY_THREADS[threading.current_thread().ident] = self.ctx
         mlog = logging.getLogger('custodian')
         mlog.addHandler(self.handler)
 
     def leave_log(self):
+        POLICY_THREADS.pop(threading.current_thread().ident, None)
         mlog = logging.getLogger('custodian')
         mlog.removeHandler(self.handler)
         self.handler.flush()
@@ -380,11 +403,15 @@ class DirectoryOutput(object):
 
     permissions = ()
 
+    # Whether records are gzipped as they are written, for outputs that
+    # compress their files on exit.
+    compress_records = False
+
     def __init__(self, ctx, config):
         self.ctx = ctx
         self.config = config
 
-        output_path = self.get_output_path(config['url'])
+        output_path = self.get_output_path(self.get_url())
         if output_path.startswith('file://'):
             output_path = output_path[len('file://'):]
 
@@ -401,11 +428,34 @@ class DirectoryOutput(object):
     def __repr__(self):
         return "<%s to dir:%s>" % (self.__class__.__name__, self.root_dir)
 
+    def get_url(self):
+        # strip options passed as query parameters, ie. ?compact=true
+        return self.config['url'].split('?', 1)[0]
+
+    def write_records(self, rel_path, records):
+        """Write a json list of records to the output directory.
+
+        Records are serialized incrementally, and gzipped as they are
+        written when the output compresses its files.
+        """
+        indent = 2
+        if str(self.config.get('compact', '')).lower() == 'true':
+            indent = None
+        path = os.path.join(self.root_dir, rel_path)
+        if self.compress_records:
+            fh = gzip.open(path + '.gz', 'wb', compresslevel=7)
+        else:
+            fh = open(path, 'wb')
+        with fh:
+            dump_records(records, fh, indent)
+
     def compress(self):
         # Compress files individually so thats easy to walk them, without
         # downloading tar and extracting.
         for root, dirs, files in os.walk(self.root_dir):
             for f in files:
+                if f.endswith('.gz'):
+                    continue
                 fp = os.path.join(root, f)
                 with gzip.open(fp + ".gz", "wb", compresslevel=7) as zfh:
                     with open(fp, "rb") as sfh:
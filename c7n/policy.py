@@ -43,7 +43,6 @@ def load(options, path, format=None, validate=True, vars=None):
     if not os.path.exists(path):
         raise IOError("Invalid path for config %r" % path)
 
-    load_resources()
     data = utils.load_file(path, format=format, vars=vars)
 
     if isinstance(data, list):
@@ -54,6 +53,8 @@ def load(options, path, format=None, validate=True, vars=None):
     if not data or data.get('policies') is None:
         return None
 
+    load_resources(get_policy_resource_types(data))
+
     if validate:
         from c7n.schema import validate
         errors = validate(data)
@@ -69,6 +70,15 @@ def load(options, path, format=None, validate=True, vars=None):
     return collection
 
 
+def get_policy_resource_types(data):
+    """Get the resource types of the policies in a policy file's data."""
+    policies = data.get('policies')
+    if not isinstance(policies, list):
+        return None
+    return set([p.get('resource') if isinstance(p, dict) else None
+                for p in policies])
+
+
 class PolicyCollection(object):
 
     log = logging.getLogger('c7n.policies')
@@ -302,8 +312,7 @@ class PullMode(PolicyExecutionMode):
                 "ResourceCount", len(resources), "Count", Scope="Policy")
             self.policy.ctx.metrics.put_metric(
                 "ResourceTime", rt, "Seconds", Scope="Policy")
-            self.policy._write_file(
-                'resources.json', utils.dumps(resources, indent=2))
+            self.policy.ctx.output.write_records('resources.json', resources)
 
             if not resources:
                 return []
@@ -529,8 +538,7 @@ class LambdaMode(ServerlessExecutionMode):
                 self.policy.log.info(
                     "Invoking actions %s", self.policy.resource_manager.actions)
 
-            self.policy._write_file(
-                'resources.json', utils.dumps(resources, indent=2))
+            self.policy.ctx.output.write_records('resources.json', resources)
 
             for action in self.policy.resource_manager.actions:
                 self.policy.log.info(
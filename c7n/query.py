@@ -278,27 +278,60 @@ class ConfigSource(object):
 
     retry = staticmethod(get_retry(('ThrottlingException',)))
 
+    # max resource keys per batch get
+    batch_size = 100
+
     def __init__(self, manager):
         self.manager = manager
 
     def get_permissions(self):
         return ["config:GetResourceConfigHistory",
+                "config:BatchGetResourceConfig",
                 "config:ListDiscoveredResources"]
 
     def get_resources(self, ids, cache=True):
         client = local_session(self.manager.session_factory).client('config')
         results = []
         m = self.manager.get_model()
-        for i in ids:
+        with self.manager.executor_factory(
+                max_workers=self.manager.max_workers) as w:
+            futures = [
+                w.submit(self.get_resource_batch, client, m.config_type, batch)
+                for batch in chunks(ids, self.batch_size)]
+            for f in futures:
+                results.extend(f.result())
+        return list(filter(None, results))
+
+    def get_resource_batch(self, client, resource_type, ids):
+        """Get the current configuration of a batch of resources.
+
+        Falls back to the configuration history of each resource for
+        resource types that batch get doesn't support.
+        """
+        keys = [{'resourceType': resource_type, 'resourceId': i} for i in ids]
+        items = []
+        while keys:
+            try:
+                response = self.retry(
+                    client.batch_get_resource_config, resourceKeys=keys)
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ValidationException':
+                    raise
+                break
+            items.extend(response.get('baseConfigurationItems', ()))
+            unprocessed = response.get('unprocessedResourceKeys', ())
+            if len(unprocessed) == len(keys):
+                break
+            keys = unprocessed
+        for k in keys:
             revisions = self.retry(
                 client.get_resource_config_history,
-                resourceId=i,
-                resourceType=m.config_type,
+                resourceId=k['resourceId'],
+                resourceType=resource_type,
                 limit=1).get('configurationItems')
-            if not revisions:
-                continue
-            results.append(self.load_resource(revisions[0]))
-        return list(filter(None, results))
+            if revisions:
+                items.append(revisions[0])
+        return [self.load_resource(i) for i in items]
 
     def get_query_params(self, query):
         """Parse config select expression from policy and parameter.
@@ -354,10 +387,18 @@ class ConfigSource(object):
             client.meta.service_model.operation_model('SelectResourceConfig'))
         pager.PAGE_ITERATOR_CLS = RetryPageIterator
 
+        # fetch the next page while decoding the current one
         results = []
-        for page in pager.paginate(Expression=query['expr']):
-            results.extend([
-                self.load_resource(json.loads(r)) for r in page['Results']])
+        pages = iter(pager.paginate(Expression=query['expr']))
+        with self.manager.executor_factory(max_workers=1) as w:
+            page = w.submit(next, pages, None)
+            while True:
+                current = page.result()
+                if current is None:
+                    break
+                page = w.submit(next, pages, None)
+                results.extend([
+                    self.load_resource(json.loads(r)) for r in current['Results']])
         return results
 
     def augment(self, resources):
@@ -13,18 +13,23 @@
 # limitations under the License.
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+from collections import OrderedDict
 import csv
 import io
 import jmespath
 import json
 import os.path
 import logging
+import threading
 import zlib
 from six import text_type
+from six.moves.urllib.error import HTTPError
 from six.moves.urllib.request import Request, urlopen
 from six.moves.urllib.parse import parse_qsl, urlparse
 from contextlib import closing
 
+from c7n.cache import NullCache
+from c7n.exceptions import ClientError
 from c7n.utils import format_string_values
 
 log = logging.getLogger('custodian.resolver')
@@ -32,25 +37,109 @@ log = logging.getLogger('custodian.resolver')
 ZIP_OR_GZIP_HEADER_DETECT = zlib.MAX_WBITS | 32
 
 
+class ResolverState(object):
+    """A bounded mapping, least recently used entries are evicted first.
+
+    Shared by all resolvers and value_from instances within the process,
+    so remote values are revalidated and parsed once per change rather
+    than once per filter.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.data.pop(key, None)
+            if value is not None:
+                self.data[key] = value
+            return value
+
+    def save(self, key, value):
+        with self.lock:
+            self.data.pop(key, None)
+            self.data[key] = value
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+
+# uri validators with contents, and parsed value_from values
+RESOLVER_STATE = ResolverState(32)
+
+
+def session_scope(session_factory):
+    """Key shared state on the credentials a session factory uses."""
+    return tuple(getattr(session_factory, attr, None)
+                 for attr in ('region', 'profile', 'assume_role'))
+
+
 class URIResolver(object):
+    """Fetch the contents of a url.
+
+    Contents are read from the cache when present. Otherwise, urls
+    fetched before (ie. whose cache entry has since expired) are
+    revalidated with a conditional request (ETag / Last-Modified)
+    rather than downloaded again.
+    """
 
     def __init__(self, session_factory, cache):
         self.session_factory = session_factory
         self.cache = cache
+        self.scope = session_scope(session_factory)
 
     def resolve(self, uri):
+        contents = self.cache.get(("uri-resolver", uri))
+        if contents is not None:
+            return contents
+
         if uri.startswith('s3://'):
             contents = self.get_s3_uri(uri)
         else:
-            # TODO: in the case of file: content and untrusted
-            # third parties, uri would need sanitization
-            req = Request(uri, headers={"Accept-Encoding": "gzip"})
-            with closing(urlopen(req)) as response:
-                contents = self.handle_response_encoding(response)
+            contents = self.get_url(uri)
 
         self.cache.save(("uri-resolver", uri), contents)
         return contents
 
+    def get_url(self, uri):
+        # TODO: in the case of file: content and untrusted
+        # third parties, uri would need sanitization
+        headers = {"Accept-Encoding": "gzip"}
+        etag, modified, previous = self.get_validators(uri)
+        if etag:
+            headers['If-None-Match'] = etag
+        if modified:
+            headers['If-Modified-Since'] = modified
+        req = Request(uri, headers=headers)
+        try:
+            with closing(urlopen(req)) as response:
+                contents = self.handle_response_encoding(response)
+                info = response.info()
+                self.remember(
+                    uri, info.get('ETag'), info.get('Last-Modified'), contents)
+        except HTTPError as e:
+            if e.code != 304 or previous is None:
+                raise
+            log.debug("Using unmodified contents of %s", uri)
+            contents = previous
+        return contents
+
+    def get_validators(self, uri):
+        return RESOLVER_STATE.get(
+            ('uri-resolver', self.scope, uri)) or (None, None, None)
+
+    def remember(self, uri, etag, modified, contents):
+        key = ('uri-resolver', self.scope, uri)
+        if not etag and not modified:
+            RESOLVER_STATE.discard(key)
+            return
+        RESOLVER_STATE.save(key, (etag, modified, contents))
+
     def handle_response_encoding(self, response):
         if response.info().get('Content-Encoding') != 'gzip':
             return response.read().decode('utf-8')
@@ -67,12 +156,21 @@ class URIResolver(object):
             Key=parsed.path[1:])
         if parsed.query:
             params.update(dict(parse_qsl(parsed.query)))
-        result = client.get_object(**params)
+        etag, _, previous = self.get_validators(uri)
+        if etag:
+            params['IfNoneMatch'] = etag
+        try:
+            result = client.get_object(**params)
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('304', 'NotModified'):
+                raise
+            log.debug("Using unmodified contents of %s", uri)
+            return previous
         body = result['Body'].read()
-        if isinstance(body, str):
-            return body
-        else:
-            return body.decode('utf-8')
+        if not isinstance(body, str):
+            body = body.decode('utf-8')
+        self.remember(uri, result.get('ETag'), None, body)
+        return body
 
 
 class ValuesFrom(object):
@@ -131,7 +229,8 @@ class ValuesFrom(object):
         }
         self.data = format_string_values(data, **config_args)
         self.manager = manager
-        self.resolver = URIResolver(manager.session_factory, manager._cache)
+        self.cache = manager._cache or NullCache(None)
+        self.resolver = URIResolver(manager.session_factory, self.cache)
 
     def get_contents(self):
         _, format = os.path.splitext(self.data['url'])
@@ -149,8 +248,26 @@ class ValuesFrom(object):
         return contents, format
 
     def get_values(self):
+        key = ('value-from', self.data['url'], self.data.get('format'),
+               self.data.get('expr'))
+        values = self.cache.get(key)
+        if values is not None:
+            return values
+
+        # parse again only when the (revalidated) contents changed
         contents, format = self.get_contents()
+        memo_key = (key, session_scope(self.manager.session_factory))
+        memo = RESOLVER_STATE.get(memo_key)
+        if memo is not None and memo[0] == contents:
+            values = memo[1]
+        else:
+            values = self._get_values(contents, format)
+            RESOLVER_STATE.save(memo_key, (contents, values))
+        if values is not None:
+            self.cache.save(key, values)
+        return values
 
+    def _get_values(self, contents, format):
         if format == 'json':
             data = json.loads(contents)
             if 'expr' in self.data:
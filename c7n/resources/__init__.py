@@ -16,87 +16,68 @@
 #
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-import time
+import importlib
 import os
 
+import six
+
+from c7n.resources.resource_map import ResourceMap
+
 LOADED = False
 
+# Resource modules loaded for specific resource types
+LOADED_MODULES = set()
+
 
-def load_resources():
+def load_resources(resource_types=None):
+    """Load resource modules, registering their resource types.
 
+    By default all resource modules and provider plugins are loaded. Given
+    resource types, ie. ``ec2`` or ``aws.ec2``, only the modules of those
+    aws types are imported, as found in the generated resource map. Types
+    of other providers or not in the map fall back to loading everything.
+    Loading types whose modules are already loaded is a no-op.
+    """
     global LOADED
     if LOADED:
         return
 
-    import c7n.resources.account
-    import c7n.resources.acm
-    import c7n.resources.ami
-    import c7n.resources.apigw
-    import c7n.resources.appelb
-    import c7n.resources.asg
-    import c7n.resources.awslambda
-    import c7n.resources.backup
-    import c7n.resources.batch
-    import c7n.resources.cfn
-    import c7n.resources.cloudfront
-    import c7n.resources.cloudsearch
-    import c7n.resources.cloudtrail
-    import c7n.resources.code
-    import c7n.resources.cognito
-    import c7n.resources.config
-    import c7n.resources.cw
-    import c7n.resources.directory
-    import c7n.resources.directconnect
-    import c7n.resources.dlm
-    import c7n.resources.dms
-    import c7n.resources.dynamodb
-    import c7n.resources.datapipeline
-    import c7n.resources.ebs
-    import c7n.resources.ec2
-    import c7n.resources.ecr
-    import c7n.resources.ecs
-    import c7n.resources.efs
-    import c7n.resources.elasticache
-    import c7n.resources.elasticbeanstalk
-    import c7n.resources.elasticsearch
-    import c7n.resources.elb
-    import c7n.resources.eks
-    import c7n.resources.emr
-    import c7n.resources.gamelift
-    import c7n.resources.glacier
-    import c7n.resources.glue
-    import c7n.resources.health
-    import c7n.resources.hsm
-    import c7n.resources.iam
-    import c7n.resources.iot
-    import c7n.resources.kafka
-    import c7n.resources.kinesis
-    import c7n.resources.kms
-    import c7n.resources.lightsail
-    import c7n.resources.ml
-    import c7n.resources.mq
-    import c7n.resources.opsworks
-    import c7n.resources.rds
-    import c7n.resources.rdsparamgroup
-    import c7n.resources.rdscluster
-    import c7n.resources.redshift
-    import c7n.resources.route53
-    import c7n.resources.s3
-    import c7n.resources.sagemaker
-    import c7n.resources.secretsmanager
+    modules = set()
+    for rtype in (resource_types or ('*',)):
+        if not isinstance(rtype, six.string_types):
+            rtype = '*'
+        elif '.' not in rtype:
+            rtype = 'aws.%s' % rtype
+        if rtype not in ResourceMap:
+            modules = None
+            break
+        modules.add(ResourceMap[rtype])
+
+    # Modules subscribing to resource registration, to attach filters and
+    # actions across resource types, are loaded ahead of the resources.
+    import c7n.filters.config
+    import c7n.filters.health
+    import c7n.filters.revisions
+    import c7n.resources.securityhub
     import c7n.resources.sfn
-    import c7n.resources.shield
-    import c7n.resources.simpledb
-    import c7n.resources.snowball
-    import c7n.resources.sns
-    import c7n.resources.storagegw
-    import c7n.resources.sqs
     import c7n.resources.ssm
-    import c7n.resources.support
-    import c7n.resources.vpc
-    import c7n.resources.waf
-    import c7n.resources.fsx
-    import c7n.resources.workspaces  # NOQA
+    import c7n.actions.autotag
+    import c7n.actions.invoke
+    import c7n.actions.metric  # NOQA
+
+    from c7n.manager import resources
+    if modules is not None:
+        modules = modules.difference(LOADED_MODULES)
+        if not modules:
+            return
+        for m in sorted(modules):
+            importlib.import_module(m)
+        LOADED_MODULES.update(modules)
+        resources.notify(resources.EVENT_FINAL)
+        return
+
+    for m in sorted(set(ResourceMap.values())):
+        importlib.import_module(m)
 
     # Load external plugins (private sdks etc)
     #
@@ -104,7 +85,6 @@ def load_resources():
     # to avoid the runtime costs in serverless
     # environments of scanning the entire python
     # path for entry points.
-    from c7n.manager import resources
     if 'C7N_EXTPLUGINS' in os.environ:
         resources.load_plugins()
     else:
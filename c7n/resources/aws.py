@@ -55,6 +55,8 @@ from c7n.output import (
 )
 
 from c7n.registry import PluginRegistry
+from c7n.resources import load_resources
+from c7n.resources.resource_map import ResourceMap
 from c7n import credentials, utils
 
 log = logging.getLogger('custodian.aws')
@@ -442,11 +444,12 @@ class S3Output(DirectoryOutput):
     """
 
     permissions = ('S3:PutObject',)
+    compress_records = True
 
     def __init__(self, ctx, config):
         self.ctx = ctx
         self.config = config
-        self.output_path = self.get_output_path(self.config['url'])
+        self.output_path = self.get_output_path(self.get_url())
         self.s3_path, self.bucket, self.key_prefix = utils.parse_s3(
             self.output_path)
         self.root_dir = tempfile.mkdtemp()
@@ -496,13 +499,24 @@ class S3Output(DirectoryOutput):
                         'ServerSideEncryption': 'AES256'})
 
 
+class ResourceRegistry(PluginRegistry):
+    """Resource registry, loading a resource type's module on lookup."""
+
+    def get(self, name):
+        factory = super(ResourceRegistry, self).get(name)
+        if factory is None and 'aws.%s' % name in ResourceMap:
+            load_resources(('aws.%s' % name,))
+            factory = super(ResourceRegistry, self).get(name)
+        return factory
+
+
 @clouds.register('aws')
 class AWS(object):
 
     display_name = 'AWS'
     resource_prefix = 'aws'
     # legacy path for older plugins
-    resources = PluginRegistry('resources')
+    resources = ResourceRegistry('resources')
 
     def initialize(self, options):
         """
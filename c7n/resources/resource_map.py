@@ -0,0 +1,179 @@
+# Copyright 2019 Capital One Services, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Generated by tools/dev/resourcemap.py, do not edit.
+#
+# aws resource type (and alias) -> module registering it
+ResourceMap = {
+    "aws.account": "c7n.resources.account",
+    "aws.acm-certificate": "c7n.resources.acm",
+    "aws.alarm": "c7n.resources.cw",
+    "aws.ami": "c7n.resources.ami",
+    "aws.app-elb": "c7n.resources.appelb",
+    "aws.app-elb-target-group": "c7n.resources.appelb",
+    "aws.asg": "c7n.resources.asg",
+    "aws.backup-plan": "c7n.resources.backup",
+    "aws.batch-compute": "c7n.resources.batch",
+    "aws.batch-definition": "c7n.resources.batch",
+    "aws.cache-cluster": "c7n.resources.elasticache",
+    "aws.cache-snapshot": "c7n.resources.elasticache",
+    "aws.cache-subnet-group": "c7n.resources.elasticache",
+    "aws.cfn": "c7n.resources.cfn",
+    "aws.cloud-directory": "c7n.resources.directory",
+    "aws.cloudhsm-cluster": "c7n.resources.hsm",
+    "aws.cloudsearch": "c7n.resources.cloudsearch",
+    "aws.cloudtrail": "c7n.resources.cloudtrail",
+    "aws.codebuild": "c7n.resources.code",
+    "aws.codecommit": "c7n.resources.code",
+    "aws.codepipeline": "c7n.resources.code",
+    "aws.config-recorder": "c7n.resources.config",
+    "aws.config-rule": "c7n.resources.config",
+    "aws.customer-gateway": "c7n.resources.vpc",
+    "aws.datapipeline": "c7n.resources.datapipeline",
+    "aws.dax": "c7n.resources.dynamodb",
+    "aws.directconnect": "c7n.resources.directconnect",
+    "aws.directory": "c7n.resources.directory",
+    "aws.distribution": "c7n.resources.cloudfront",
+    "aws.dlm-policy": "c7n.resources.dlm",
+    "aws.dms-endpoint": "c7n.resources.dms",
+    "aws.dms-instance": "c7n.resources.dms",
+    "aws.dynamodb-backup": "c7n.resources.dynamodb",
+    "aws.dynamodb-stream": "c7n.resources.dynamodb",
+    "aws.dynamodb-table": "c7n.resources.dynamodb",
+    "aws.ebs": "c7n.resources.ebs",
+    "aws.ebs-snapshot": "c7n.resources.ebs",
+    "aws.ec2": "c7n.resources.ec2",
+    "aws.ec2-reserved": "c7n.resources.ec2",
+    "aws.ecr": "c7n.resources.ecr",
+    "aws.ecs": "c7n.resources.ecs",
+    "aws.ecs-container-instance": "c7n.resources.ecs",
+    "aws.ecs-service": "c7n.resources.ecs",
+    "aws.ecs-task": "c7n.resources.ecs",
+    "aws.ecs-task-definition": "c7n.resources.ecs",
+    "aws.efs": "c7n.resources.efs",
+    "aws.efs-mount-target": "c7n.resources.efs",
+    "aws.eks": "c7n.resources.eks",
+    "aws.elasticbeanstalk": "c7n.resources.elasticbeanstalk",
+    "aws.elasticbeanstalk-environment": "c7n.resources.elasticbeanstalk",
+    "aws.elasticsearch": "c7n.resources.elasticsearch",
+    "aws.elb": "c7n.resources.elb",
+    "aws.emr": "c7n.resources.emr",
+    "aws.eni": "c7n.resources.vpc",
+    "aws.event-rule": "c7n.resources.cw",
+    "aws.event-rule-target": "c7n.resources.cw",
+    "aws.firehose": "c7n.resources.kinesis",
+    "aws.fsx": "c7n.resources.fsx",
+    "aws.fsx-backup": "c7n.resources.fsx",
+    "aws.gamelift-build": "c7n.resources.gamelift",
+    "aws.gamelift-fleet": "c7n.resources.gamelift",
+    "aws.glacier": "c7n.resources.glacier",
+    "aws.glue-connection": "c7n.resources.glue",
+    "aws.glue-crawler": "c7n.resources.glue",
+    "aws.glue-database": "c7n.resources.glue",
+    "aws.glue-dev-endpoint": "c7n.resources.glue",
+    "aws.glue-job": "c7n.resources.glue",
+    "aws.glue-table": "c7n.resources.glue",
+    "aws.health-event": "c7n.resources.health",
+    "aws.healthcheck": "c7n.resources.route53",
+    "aws.hostedzone": "c7n.resources.route53",
+    "aws.hsm": "c7n.resources.hsm",
+    "aws.hsm-client": "c7n.resources.hsm",
+    "aws.hsm-hapg": "c7n.resources.hsm",
+    "aws.iam-certificate": "c7n.resources.iam",
+    "aws.iam-group": "c7n.resources.iam",
+    "aws.iam-policy": "c7n.resources.iam",
+    "aws.iam-profile": "c7n.resources.iam",
+    "aws.iam-role": "c7n.resources.iam",
+    "aws.iam-user": "c7n.resources.iam",
+    "aws.identity-pool": "c7n.resources.cognito",
+    "aws.internet-gateway": "c7n.resources.vpc",
+    "aws.iot": "c7n.resources.iot",
+    "aws.kafka": "c7n.resources.kafka",
+    "aws.key-pair": "c7n.resources.vpc",
+    "aws.kinesis": "c7n.resources.kinesis",
+    "aws.kinesis-analytics": "c7n.resources.kinesis",
+    "aws.kms": "c7n.resources.kms",
+    "aws.kms-key": "c7n.resources.kms",
+    "aws.lambda": "c7n.resources.awslambda",
+    "aws.lambda-layer": "c7n.resources.awslambda",
+    "aws.launch-config": "c7n.resources.asg",
+    "aws.launch-template-version": "c7n.resources.ec2",
+    "aws.lightsail-db": "c7n.resources.lightsail",
+    "aws.lightsail-elb": "c7n.resources.lightsail",
+    "aws.lightsail-instance": "c7n.resources.lightsail",
+    "aws.log-group": "c7n.resources.cw",
+    "aws.message-broker": "c7n.resources.mq",
+    "aws.ml-model": "c7n.resources.ml",
+    "aws.nat-gateway": "c7n.resources.vpc",
+    "aws.network-acl": "c7n.resources.vpc",
+    "aws.network-addr": "c7n.resources.vpc",
+    "aws.ops-item": "c7n.resources.ssm",
+    "aws.opswork-cm": "c7n.resources.opsworks",
+    "aws.opswork-stack": "c7n.resources.opsworks",
+    "aws.peering-connection": "c7n.resources.vpc",
+    "aws.r53domain": "c7n.resources.route53",
+    "aws.rds": "c7n.resources.rds",
+    "aws.rds-cluster": "c7n.resources.rdscluster",
+    "aws.rds-cluster-param-group": "c7n.resources.rdsparamgroup",
+    "aws.rds-cluster-snapshot": "c7n.resources.rdscluster",
+    "aws.rds-param-group": "c7n.resources.rdsparamgroup",
+    "aws.rds-reserved": "c7n.resources.rds",
+    "aws.rds-snapshot": "c7n.resources.rds",
+    "aws.rds-subnet-group": "c7n.resources.rds",
+    "aws.rds-subscription": "c7n.resources.rds",
+    "aws.redshift": "c7n.resources.redshift",
+    "aws.redshift-snapshot": "c7n.resources.redshift",
+    "aws.redshift-subnet-group": "c7n.resources.redshift",
+    "aws.rest-account": "c7n.resources.apigw",
+    "aws.rest-api": "c7n.resources.apigw",
+    "aws.rest-resource": "c7n.resources.apigw",
+    "aws.rest-stage": "c7n.resources.apigw",
+    "aws.rest-vpclink": "c7n.resources.apigw",
+    "aws.route-table": "c7n.resources.vpc",
+    "aws.rrset": "c7n.resources.route53",
+    "aws.s3": "c7n.resources.s3",
+    "aws.sagemaker-endpoint": "c7n.resources.sagemaker",
+    "aws.sagemaker-endpoint-config": "c7n.resources.sagemaker",
+    "aws.sagemaker-job": "c7n.resources.sagemaker",
+    "aws.sagemaker-model": "c7n.resources.sagemaker",
+    "aws.sagemaker-notebook": "c7n.resources.sagemaker",
+    "aws.sagemaker-transform-job": "c7n.resources.sagemaker",
+    "aws.secrets-manager": "c7n.resources.secretsmanager",
+    "aws.security-group": "c7n.resources.vpc",
+    "aws.shield-attack": "c7n.resources.shield",
+    "aws.shield-protection": "c7n.resources.shield",
+    "aws.simpledb": "c7n.resources.simpledb",
+    "aws.snowball": "c7n.resources.snowball",
+    "aws.snowball-cluster": "c7n.resources.snowball",
+    "aws.sns": "c7n.resources.sns",
+    "aws.sqs": "c7n.resources.sqs",
+    "aws.ssm-activation": "c7n.resources.ssm",
+    "aws.ssm-managed-instance": "c7n.resources.ssm",
+    "aws.ssm-parameter": "c7n.resources.ssm",
+    "aws.step-machine": "c7n.resources.sfn",
+    "aws.storage-gateway": "c7n.resources.storagegw",
+    "aws.streaming-distribution": "c7n.resources.cloudfront",
+    "aws.subnet": "c7n.resources.vpc",
+    "aws.support-case": "c7n.resources.support",
+    "aws.transit-attachment": "c7n.resources.vpc",
+    "aws.transit-gateway": "c7n.resources.vpc",
+    "aws.user-pool": "c7n.resources.cognito",
+    "aws.vpc": "c7n.resources.vpc",
+    "aws.vpc-endpoint": "c7n.resources.vpc",
+    "aws.vpn-connection": "c7n.resources.vpc",
+    "aws.vpn-gateway": "c7n.resources.vpc",
+    "aws.waf": "c7n.resources.waf",
+    "aws.waf-regional": "c7n.resources.waf",
+    "aws.workspaces": "c7n.resources.workspaces",
+}
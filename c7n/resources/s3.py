@@ -18,7 +18,8 @@ Filters:
 The generic Values filters (jmespath) expression and Or filter are
 available with all resources, including buckets, we include several
 additonal bucket data (Tags, Replication, Acl, Policy) as keys within
-a bucket representation.
+a bucket representation. Only the bucket data referenced by a policy's
+filters and actions is fetched, policies without filters get all of it.
 
 Actions:
 
@@ -46,8 +47,10 @@ import itertools
 import logging
 import math
 import os
+import re
 import time
 import ssl
+import threading
 
 import six
 
@@ -82,7 +85,6 @@ log = logging.getLogger('custodian.s3')
 
 filters = FilterRegistry('s3.filters')
 actions = ActionRegistry('s3.actions')
-filters.register('marked-for-op', TagActionFilter)
 actions.register('put-metric', PutMetric)
 
 MAX_COPY_SIZE = 1024 * 1024 * 1024 * 2
@@ -121,15 +123,65 @@ class S3(query.QueryResourceManager):
         perms.extend([n[0] for n in S3_AUGMENT_TABLE])
         return perms
 
+    def get_cache_key(self, query):
+        key = super(S3, self).get_cache_key(query)
+        augment_keys = self.get_augment_keys()
+        if augment_keys is not None:
+            key['augments'] = sorted(augment_keys)
+        return key
+
+    def get_augment_keys(self):
+        """Return the set of bucket augment keys needed by the policy.
+
+        Filters and actions declare the augments they consume via an
+        `augment_keys` class attribute, value filters are inspected for
+        the keys they reference. Returns None when all augments are
+        needed, ie. a policy without filters, or one using a filter or
+        action without a declaration. Generic elements (notify, webhook,
+        auto-tag-user, etc.) read or forward the whole bucket, so they
+        need every augment.
+        """
+        if not self.data.get('filters'):
+            return None
+        all_keys = set([a[1] for a in S3_AUGMENT_TABLE])
+        required = set(['Location'])
+        for e in itertools.chain(self.iter_filters(), self.actions):
+            if e is None or e.type in ('or', 'and', 'not'):
+                continue
+            keys = getattr(e, 'augment_keys', None)
+            if keys is None and e.type == 'value':
+                keys = get_value_filter_augments(e.data, all_keys)
+            elif keys is None:
+                keys = all_keys
+            required.update(keys or ())
+        if all_keys.issubset(required):
+            return None
+        return required
+
+
+def get_value_filter_augments(data, augment_keys):
+    """Return the augment keys referenced by a value filter's key expression."""
+    if 'key' in data:
+        expr = data['key']
+    elif 'type' not in data and len(data) == 1:
+        expr = list(data.keys())[0]
+    else:
+        return ()
+    if expr.startswith('tag:'):
+        return ('Tags',)
+    if 'c7n:DeniedMethods' in expr:
+        return augment_keys
+    return augment_keys.intersection(re.findall(r'[A-Za-z_]\w*', expr))
+
 
 class DescribeS3(query.DescribeSource):
 
     def augment(self, buckets):
+        assembler = BucketAssembly(
+            self.manager.session_factory, self.manager.get_augment_keys())
         with self.manager.executor_factory(
                 max_workers=min((10, len(buckets) + 1))) as w:
-            results = w.map(
-                assemble_bucket,
-                zip(itertools.repeat(self.manager.session_factory), buckets))
+            results = w.map(assembler.assemble, buckets)
             results = list(filter(None, results))
             return results
 
@@ -418,74 +470,83 @@ S3_AUGMENT_TABLE = (
 )
 
 
-def assemble_bucket(item):
-    """Assemble a document representing all the config state around a bucket.
+class BucketAssembly(object):
+    """Assemble documents representing the config state around buckets.
 
-    TODO: Refactor this, the logic here feels quite muddled.
+    Only the augments named in `augment_keys` (all when None) are
+    fetched, and region scoped clients are shared across buckets.
     """
-    factory, b = item
-    s = factory()
-    c = s.client('s3')
-    # Bucket Location, Current Client Location, Default Location
-    b_location = c_location = location = "us-east-1"
-    methods = list(S3_AUGMENT_TABLE)
-    for m, k, default, select in methods:
-        try:
-            method = getattr(c, m)
-            v = method(Bucket=b['Name'])
-            v.pop('ResponseMetadata')
-            if select is not None and select in v:
-                v = v[select]
-        except (ssl.SSLError, SSLError) as e:
-            # Proxy issues? i assume
-            log.warning("Bucket ssl error %s: %s %s",
-                        b['Name'], b.get('Location', 'unknown'),
-                        e)
-            continue
-        except ClientError as e:
-            code = e.response['Error']['Code']
-            if code.startswith("NoSuch") or "NotFound" in code:
-                v = default
-            elif code == 'PermanentRedirect':
-                s = factory()
-                c = bucket_client(s, b)
-                # Requeue with the correct region given location constraint
-                methods.append((m, k, default, select))
+
+    def __init__(self, session_factory, augment_keys=None):
+        self.session_factory = session_factory
+        self.augments = [a for a in S3_AUGMENT_TABLE
+                         if augment_keys is None or a[1] in augment_keys]
+        self.clients = {}
+        self.lock = threading.Lock()
+
+    def get_client(self, region=None):
+        with self.lock:
+            if region not in self.clients:
+                self.clients[region] = local_session(
+                    self.session_factory).client('s3', region_name=region)
+            return self.clients[region]
+
+    def assemble(self, b):
+        c = self.get_client()
+        methods = list(self.augments)
+        for m, k, default, select in methods:
+            try:
+                method = getattr(c, m)
+                v = method(Bucket=b['Name'])
+                v.pop('ResponseMetadata')
+                if select is not None and select in v:
+                    v = v[select]
+            except (ssl.SSLError, SSLError) as e:
+                # Proxy issues? i assume
+                log.warning("Bucket ssl error %s: %s %s",
+                            b['Name'], b.get('Location', 'unknown'),
+                            e)
                 continue
-            else:
-                log.warning(
-                    "Bucket:%s unable to invoke method:%s error:%s ",
-                    b['Name'], m, e.response['Error']['Message'])
-                # For auth failures, we don't bail out, continue processing if we can.
-                # Note this can lead to missing data, but in general is cleaner than
-                # failing hard, due to the common use of locked down s3 bucket policies
-                # that may cause issues fetching information across a fleet of buckets.
-
-                # This does mean s3 policies depending on augments should check denied
-                # methods annotation, generally though lacking get access to an augment means
-                # they won't have write access either.
-
-                # For other error types we raise and bail policy execution.
-                if e.response['Error']['Code'] == 'AccessDenied':
-                    b.setdefault('c7n:DeniedMethods', []).append(m)
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code.startswith("NoSuch") or "NotFound" in code:
+                    v = default
+                elif code == 'PermanentRedirect':
+                    c = self.get_client(get_region(b))
+                    # Requeue with the correct region given location constraint
+                    methods.append((m, k, default, select))
                     continue
-                raise
-        # As soon as we learn location (which generally works)
-        if k == 'Location' and v is not None:
-            b_location = v.get('LocationConstraint')
-            # Location == region for all cases but EU
-            # https://docs.aws.amazon.com/AmazonS3/latest/API/RESTBucketGETlocation.html
-            if b_location is None:
-                b_location = "us-east-1"
-            elif b_location == 'EU':
-                b_location = "eu-west-1"
-                v['LocationConstraint'] = 'eu-west-1'
-            if v and v != c_location:
-                c = s.client('s3', region_name=b_location)
-            elif c_location != location:
-                c = s.client('s3', region_name=location)
-        b[k] = v
-    return b
+                else:
+                    log.warning(
+                        "Bucket:%s unable to invoke method:%s error:%s ",
+                        b['Name'], m, e.response['Error']['Message'])
+                    # For auth failures, we don't bail out, continue processing if we can.
+                    # Note this can lead to missing data, but in general is cleaner than
+                    # failing hard, due to the common use of locked down s3 bucket policies
+                    # that may cause issues fetching information across a fleet of buckets.
+
+                    # This does mean s3 policies depending on augments should check denied
+                    # methods annotation, generally though lacking get access to an augment
+                    # means they won't have write access either.
+
+                    # For other error types we raise and bail policy execution.
+                    if e.response['Error']['Code'] == 'AccessDenied':
+                        b.setdefault('c7n:DeniedMethods', []).append(m)
+                        continue
+                    raise
+            # As soon as we learn location (which generally works)
+            if k == 'Location' and v is not None:
+                b_location = v.get('LocationConstraint')
+                # Location == region for all cases but EU
+                # https://docs.aws.amazon.com/AmazonS3/latest/API/RESTBucketGETlocation.html
+                if b_location is None:
+                    b_location = "us-east-1"
+                elif b_location == 'EU':
+                    b_location = "eu-west-1"
+                    v['LocationConstraint'] = 'eu-west-1'
+                c = self.get_client(b_location)
+            b[k] = v
+        return b
 
 
 def bucket_client(session, b, kms=False):
@@ -567,6 +628,8 @@ class S3Metrics(MetricsFilter):
     mismatch, and additional required dimension.
     """
 
+    augment_keys = ()
+
     def get_dimensions(self, resource):
         dims = [{'Name': 'BucketName', 'Value': resource['Name']}]
         if (self.data['name'] == 'NumberOfObjects' and
@@ -591,6 +654,8 @@ class S3CrossAccountFilter(CrossAccountAccessFilter):
                 filters:
                   - type: cross-account
     """
+
+    augment_keys = ('Policy',)
     permissions = ('s3:GetBucketPolicy',)
 
     def get_accounts(self):
@@ -684,6 +749,7 @@ class GlobalGrantsFilter(Filter):
 
     """
 
+    augment_keys = ('Acl', 'Website')
     schema = type_schema(
         'global-grants',
         allow_website={'type': 'boolean'},
@@ -765,6 +831,8 @@ class BucketFilterBase(Filter):
 
 @S3.action_registry.register("post-finding")
 class BucketFinding(PostFinding):
+    augment_keys = ('Acl', 'Tags')
+
     def format_resource(self, r):
         owner = r.get("Acl", {}).get("Owner", {})
         resource = {
@@ -808,6 +876,8 @@ class HasStatementFilter(BucketFilterBase):
                         Action: 's3:*'
                         Principal: '*'
     """
+
+    augment_keys = ('Policy',)
     schema = type_schema(
         'has-statement',
         statement_ids={'type': 'array', 'items': {'type': 'string'}},
@@ -893,6 +963,8 @@ class EncryptionEnabledFilter(Filter):
                 filters:
                   - type: no-encryption-statement
     """
+
+    augment_keys = ('Policy',)
     schema = type_schema(
         'no-encryption-statement')
 
@@ -944,6 +1016,7 @@ class MissingPolicyStatementFilter(Filter):
                       - RequiredEncryptedPutObject
     """
 
+    augment_keys = ('Policy',)
     schema = type_schema(
         'missing-policy-statement',
         aliases=('missing-statement',),
@@ -988,6 +1061,7 @@ class BucketNotificationFilter(ValueFilter):
                     statement_ids: matched
     """
 
+    augment_keys = ('Notification',)
     schema = type_schema(
         'bucket-notification',
         required=['kind'],
@@ -1025,6 +1099,7 @@ class BucketNotificationFilter(ValueFilter):
 class DeleteBucketNotification(BucketActionBase):
     """Action to delete S3 bucket notification configurations"""
 
+    augment_keys = ('Notification',)
     schema = type_schema(
         'delete-bucket-notification',
         required=['statement_ids'],
@@ -1060,7 +1135,7 @@ class DeleteBucketNotification(BucketActionBase):
 
 @actions.register('no-op')
 class NoOp(BucketActionBase):
-
+    augment_keys = ()
     schema = type_schema('no-op')
     permissions = ('s3:ListAllMyBuckets',)
 
@@ -1093,6 +1168,7 @@ class SetPolicyStatement(BucketActionBase):
                             "aws:SecureTransport": false
     """
 
+    augment_keys = ('Policy',)
     permissions = ('s3:PutBucketPolicy',)
 
     schema = type_schema(
@@ -1178,6 +1254,7 @@ class RemovePolicyStatement(RemovePolicyBase):
                       - RequiredEncryptedPutObject
     """
 
+    augment_keys = ('Policy',)
     permissions = ("s3:PutBucketPolicy", "s3:DeleteBucketPolicy")
 
     def process(self, buckets):
@@ -1242,6 +1319,7 @@ class ToggleVersioning(BucketActionBase):
                     enabled: true
     """
 
+    augment_keys = ('Versioning',)
     schema = type_schema(
         'toggle-versioning',
         enabled={'type': 'boolean'})
@@ -1298,6 +1376,8 @@ class ToggleLogging(BucketActionBase):
                     target_bucket: log-bucket
                     target_prefix: logs123
     """
+
+    augment_keys = ('Logging',)
     schema = type_schema(
         'toggle-logging',
         enabled={'type': 'boolean'},
@@ -1372,6 +1452,8 @@ class AttachLambdaEncrypt(BucketActionBase):
                         role: arn:aws:iam::123456789012:role/my-role
 
     """
+
+    augment_keys = ('Notification',)
     schema = type_schema(
         'attach-encrypt',
         role={'type': 'string'},
@@ -1477,6 +1559,7 @@ class EncryptionRequiredPolicy(BucketActionBase):
                   - encryption-policy
     """
 
+    augment_keys = ('Policy',)
     permissions = ("s3:GetBucketPolicy", "s3:PutBucketPolicy")
     schema = type_schema('encryption-policy')
 
@@ -1597,7 +1680,7 @@ class BucketScanLog(object):
 
 
 class ScanBucket(BucketActionBase):
-
+    augment_keys = ('Versioning',)
     permissions = ("s3:ListBucket",)
 
     bucket_ops = {
@@ -2017,6 +2100,7 @@ class LogTarget(Filter):
                   - type: is-log-target
     """
 
+    augment_keys = ('Logging',)
     schema = type_schema(
         'is-log-target',
         services={'type': 'array', 'items': {'enum': [
@@ -2123,6 +2207,7 @@ def _query_elb_attrs(session_factory, elb_set):
 class RemoveWebsiteHosting(BucketActionBase):
     """Action that removes website hosting configuration."""
 
+    augment_keys = ()
     schema = type_schema('remove-website-hosting')
 
     permissions = ('s3:DeleteBucketWebsite',)
@@ -2151,6 +2236,7 @@ class DeleteGlobalGrants(BucketActionBase):
                   - delete-global-grants
     """
 
+    augment_keys = ('Acl', 'Website')
     schema = type_schema(
         'delete-global-grants',
         grantees={'type': 'array', 'items': {'type': 'string'}})
@@ -2203,6 +2289,12 @@ class DeleteGlobalGrants(BucketActionBase):
         return b
 
 
+@filters.register('marked-for-op')
+class BucketMarkedForOp(TagActionFilter):
+
+    augment_keys = ('Tags',)
+
+
 @actions.register('tag')
 class BucketTag(Tag):
     """Action to create tags on a S3 bucket
@@ -2223,6 +2315,8 @@ class BucketTag(Tag):
                     value: us-east-1
     """
 
+    augment_keys = ('Tags',)
+
     def process_resource_set(self, client, resource_set, tags):
         modify_bucket_tags(self.manager.session_factory, resource_set, tags)
 
@@ -2248,6 +2342,7 @@ class MarkBucketForOp(TagDelayedAction):
                     days: 7
     """
 
+    augment_keys = ('Tags',)
     schema = type_schema(
         'mark-for-op', rinherit=TagDelayedAction.schema)
 
@@ -2271,6 +2366,8 @@ class RemoveBucketTag(RemoveTag):
                     tags: ['BucketOwner']
     """
 
+    augment_keys = ('Tags',)
+
     def process_resource_set(self, client, resource_set, tags):
         modify_bucket_tags(
             self.manager.session_factory, resource_set, remove_tags=tags)
@@ -2278,7 +2375,7 @@ class RemoveBucketTag(RemoveTag):
 
 @filters.register('data-events')
 class DataEvents(Filter):
-
+    augment_keys = ()
     schema = type_schema('data-events', state={'enum': ['present', 'absent']})
     permissions = (
         'cloudtrail:DescribeTrails',
@@ -2329,6 +2426,8 @@ class DataEvents(Filter):
 @filters.register('inventory')
 class Inventory(ValueFilter):
     """Filter inventories for a bucket"""
+
+    augment_keys = ()
     schema = type_schema('inventory', rinherit=ValueFilter.schema)
     schema_alias = False
     permissions = ('s3:GetInventoryConfiguration',)
@@ -2368,6 +2467,8 @@ class Inventory(ValueFilter):
 class SetInventory(BucketActionBase):
     """Configure bucket inventories for an s3 bucket.
     """
+
+    augment_keys = ()
     schema = type_schema(
         'set-inventory',
         required=['name', 'destination'],
@@ -2494,6 +2595,7 @@ class DeleteBucket(ScanBucket):
                     remove-contents: true
     """
 
+    augment_keys = ('Versioning', 'Replication')
     schema = type_schema('delete', **{'remove-contents': {'type': 'boolean'}})
 
     permissions = ('s3:*',)
@@ -2629,6 +2731,7 @@ class Lifecycle(BucketActionBase):
 
     """
 
+    augment_keys = ('Lifecycle',)
     schema = type_schema(
         'configure-lifecycle',
         **{
@@ -2853,6 +2956,8 @@ class BucketEncryption(KMSKeyResolverMixin, Filter):
                   - type: bucket-encryption
                     state: False
     """
+
+    augment_keys = ()
     schema = type_schema('bucket-encryption',
                          state={'type': 'boolean'},
                          crypto={'type': 'string', 'enum': ['AES256', 'aws:kms']},
@@ -2962,6 +3067,7 @@ class SetBucketEncryption(KMSKeyResolverMixin, BucketActionBase):
                     enabled: false
     """
 
+    augment_keys = ()
     schema = {
         'type': 'object',
         'additionalProperties': False,
@@ -32,6 +32,7 @@ import json
 import inspect
 import logging
 
+import six
 from jsonschema import Draft4Validator as Validator
 from jsonschema.exceptions import best_match
 
@@ -43,11 +44,11 @@ from c7n.filters.core import ValueFilter, EventFilter, AgeFilter, OPERATORS, VAL
 
 
 def validate(data, schema=None):
-    if schema is None:
-        schema = generate()
-        Validator.check_schema(schema)
+    validator = get_validator(schema)
+    if validator.is_valid(data):
+        return check_unique(data) or []
 
-    validator = Validator(schema)
+    validator = validator.validator
     errors = list(validator.iter_errors(data))
     if not errors:
         return check_unique(data) or []
@@ -69,6 +70,78 @@ def validate(data, schema=None):
     ]))
 
 
+# The last validator used, reused while validating with the same schema,
+# or for generated schemas while the registered resources are unchanged.
+_validator = None
+
+
+def get_validator(schema=None):
+    """Get a policy validator for the schema, or the generated schema."""
+    global _validator
+    key = schema is None and get_registry_key() or id(schema)
+    if _validator is not None and _validator[0] == key and (
+            schema is None or _validator[1].schema is schema):
+        return _validator[1]
+    if schema is None:
+        schema = generate()
+        Validator.check_schema(schema)
+    validator = PolicyValidator(schema)
+    _validator = (key, validator)
+    return validator
+
+
+def get_registry_key():
+    """Summarize the registered resource types, filters and actions.
+
+    Resource types may be loaded and filters and actions registered on
+    them over time, which changes the generated schema.
+    """
+    return (len(execution.keys()),) + tuple([
+        (cname, rname, len(rtype.filter_registry.keys()),
+         len(rtype.action_registry.keys()))
+        for cname, ctype in clouds.items()
+        for rname, rtype in ctype.resources.items()])
+
+
+class PolicyValidator(object):
+    """Validate policy documents against a schema.
+
+    The schema's policies are an anyOf across every resource type, so
+    validating a policy walks the filters and actions of each resource
+    type until one matches. Instead each policy is checked against only
+    its resource type's definition, and documents that fail are validated
+    against the full schema to report errors.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.validator = Validator(schema)
+        self.document_schema = {
+            k: schema[k] for k in ('type', 'required', 'additionalProperties')}
+        self.document_schema['properties'] = dict(
+            schema['properties'], policies={'type': 'array'})
+        self.resource_schemas = {}
+        for type_name, resource_def in schema['definitions']['resources'].items():
+            ref = {'$ref': '#/definitions/resources/%s/policy' % type_name}
+            for name in resource_def['policy']['allOf'][1]['properties']['resource']['enum']:
+                self.resource_schemas[name] = ref
+
+    def is_valid(self, data):
+        if not self._is_valid(data, self.document_schema):
+            return False
+        for p in data['policies']:
+            rtype = isinstance(p, dict) and p.get('resource')
+            if not isinstance(rtype, six.string_types):
+                return False
+            ref = self.resource_schemas.get(rtype)
+            if ref is None or not self._is_valid(p, ref):
+                return False
+        return True
+
+    def _is_valid(self, instance, schema):
+        return next(self.validator.descend(instance, schema), None) is None
+
+
 def check_unique(data):
     counter = Counter([p['name'] for p in data.get('policies', [])])
     for k, v in list(counter.items()):
@@ -228,7 +301,7 @@ def generate(resource_types=()):
                 'description': {'type': 'string'},
                 'tags': {'type': 'array', 'items': {'type': 'string'}},
                 'mode': {'$ref': '#/definitions/policy-mode'},
-                'source': {'enum': ['describe', 'config', 'resource-graph']},
+                'source': {'enum': ['describe', 'config', 'resource-graph', 'informer']},
                 'actions': {
                     'type': 'array',
                 },
@@ -23,14 +23,19 @@ import os
 import re
 import shutil
 import tempfile
+import threading
+import time
 import unittest
 
 import pytest
 import mock
 import six
 import yaml
+from boto3 import Session
+from dateutil.tz import tzutc
 
 from c7n import policy
+from c7n.credentials import SessionFactory
 from c7n.schema import generate, validate as schema_validate
 from c7n.ctx import ExecutionContext
 from c7n.utils import reset_session_cache
@@ -245,6 +250,126 @@ class TextTestIO(io.StringIO):
         return super(TextTestIO, self).write(b)
 
 
+class ReplayResponse(object):
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+        self.content = b''
+
+
+class ReplaySessionFactory(SessionFactory):
+    """Session factory serving recorded api responses.
+
+    For exercising policies end to end without aws, ie. to benchmark
+    query and filter code. Responses are read from a placebo recording
+    directory, with each operation cycling through its recorded
+    responses in order.
+
+    Lists in responses are scaled up ``scale`` times to synthesize
+    larger accounts. Copies have the values of identifying keys (ie.
+    InstanceId, GroupName, Arn) suffixed with their copy number, so
+    references between resources of the same copy stay consistent.
+    Each call is delayed by ``latency`` seconds to approximate a round
+    trip to the api.
+    """
+
+    scale_keys = re.compile(r'(Id|Name|Arn)s?$')
+    # not identifiers, ie. an instance's State.Name
+    scale_excluded = frozenset(('OwnerId', 'AccountId', 'RequesterId', 'State'))
+
+    def __init__(self, data_path, region='us-east-1', scale=1, latency=0):
+        super(ReplaySessionFactory, self).__init__(region)
+        self.data_path = data_path
+        self.scale = scale
+        self.latency = latency
+        self.responses = {}
+        self.index = {}
+        self.lock = threading.Lock()
+        self.call_count = 0
+
+    def __call__(self, assume=True, region=None):
+        session = Session(
+            region_name=region or self.region,
+            aws_access_key_id='replay',
+            aws_secret_access_key='replay')
+        # registered last, as the first handler to respond short
+        # circuits the rest (ie. the api rate limiter)
+        self.update(session)
+        session.events.register(
+            'before-call.*.*', self.replay, unique_id='c7n-replay')
+        return session
+
+    def replay(self, model, **kwargs):
+        service = model.service_model.endpoint_prefix
+        with self.lock:
+            self.call_count += 1
+            responses = self.responses.get((service, model.name))
+            if responses is None:
+                responses = self.responses[(service, model.name)] = self.load(
+                    service, model.name)
+            idx = self.index.get((service, model.name), 0)
+            self.index[(service, model.name)] = (idx + 1) % len(responses)
+        if self.latency:
+            time.sleep(self.latency)
+        status_code, data = responses[idx]
+        # parse on every call, as callers mutate responses
+        data = json.loads(data, object_hook=replay_deserialize)
+        if self.scale > 1 and status_code < 300:
+            data = self.scale_response(data)
+        return ReplayResponse(status_code), data
+
+    def load(self, service, operation):
+        responses = []
+        while True:
+            path = os.path.join(self.data_path, "%s.%s_%d.json" % (
+                service, operation, len(responses) + 1))
+            if not os.path.exists(path):
+                break
+            with open(path) as fh:
+                recorded = json.load(fh)
+            responses.append(
+                (recorded['status_code'], json.dumps(recorded['data'])))
+        if not responses:
+            raise IOError("No recorded responses for %s.%s in %s" % (
+                service, operation, self.data_path))
+        return responses
+
+    def scale_response(self, data):
+        for k, v in list(data.items()):
+            if k == 'ResponseMetadata' or not isinstance(v, list):
+                continue
+            scaled = list(v)
+            for n in range(1, self.scale):
+                scaled.extend([self.rewrite(i, '-%d' % n) for i in v])
+            data[k] = scaled
+        return data
+
+    def rewrite(self, value, suffix, key=None):
+        if key in self.scale_excluded:
+            return value
+        elif isinstance(value, dict):
+            return {k: self.rewrite(v, suffix, k) for k, v in value.items()}
+        elif isinstance(value, list):
+            return [self.rewrite(v, suffix, key) for v in value]
+        elif (isinstance(value, six.string_types) and key is not None and
+                self.scale_keys.search(key)):
+            return value + suffix
+        return value
+
+
+def replay_deserialize(obj):
+    """Json object hook for placebo's serialized types."""
+    class_name = obj.get('__class__')
+    if class_name == 'datetime':
+        return datetime.datetime(
+            tzinfo=tzutc(), **{k: v for k, v in obj.items()
+                               if k not in ('__class__', '__module__')})
+    elif class_name == 'StreamingBody':
+        return io.BytesIO(obj['body'].encode('utf8'))
+    return obj
+
+
 # Per http://blog.xelnor.net/python-mocking-datetime/
 # naive implementation has issues with pypy
 
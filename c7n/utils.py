@@ -124,6 +124,40 @@ def dumps(data, fh=None, indent=0):
         return json.dumps(data, cls=DateTimeEncoder, indent=indent)
 
 
+def dump_records(records, fh, indent=2):
+    """Serialize a list of records to a binary file handle incrementally.
+
+    The output matches :func:`dumps` of the list, but only a single
+    record is held in serialized form at a time. A falsy indent writes
+    compact json without whitespace.
+    """
+    if not records:
+        fh.write(b'[]')
+        return
+    if indent:
+        encoder = DateTimeEncoder(indent=indent)
+        margin = '\n' + ' ' * indent
+        head, sep, tail = '[' + margin, ',' + margin, '\n]'
+    else:
+        encoder = DateTimeEncoder(separators=(',', ':'))
+        margin = None
+        head, sep, tail = '[', ',', ']'
+    chunk, size = [], 0
+    for idx, r in enumerate(records):
+        value = encoder.encode(r)
+        if margin:
+            # json escapes newlines within strings, so these are all structural
+            value = value.replace('\n', margin)
+        chunk.append(idx and sep or head)
+        chunk.append(value)
+        size += len(value)
+        if size > 2 ** 16:
+            fh.write(''.join(chunk).encode('utf8'))
+            chunk, size = [], 0
+    chunk.append(tail)
+    fh.write(''.join(chunk).encode('utf8'))
+
+
 def format_event(evt):
     return json.dumps(evt, indent=2)
 
@@ -414,6 +448,36 @@ def backoff_delays(start, stop, factor=2.0, jitter=False):
         cur = cur * factor
 
 
+class TokenBucket(object):
+    """Thread safe token bucket rate limiter.
+
+    Tokens refill at `rate` per second up to `burst`, callers acquiring
+    with an empty bucket reserve a token and sleep until it's available.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.time, sleep=time.sleep):
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self.tokens = self.burst
+        self.clock = clock
+        self.sleep = sleep
+        self.last = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, returning the time spent waiting for it."""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= 1
+            delay = self.tokens < 0 and -self.tokens / self.rate or 0
+        if delay:
+            self.sleep(delay)
+        return delay
+
+
 def parse_cidr(value):
     """Process cidr ranges."""
     klass = IPv4Network
@@ -18,6 +18,7 @@ from c7n import cache, config
 from argparse import Namespace
 from six.moves import cPickle as pickle
 import tempfile
+import time
 import mock
 import os
 
@@ -27,7 +28,7 @@ class TestCache(TestCase):
     def test_factory(self):
         self.assertIsInstance(cache.factory(None), cache.NullCache)
         test_config = Namespace(cache_period=60, cache="test-cloud-custodian.cache")
-        self.assertIsInstance(cache.factory(test_config), cache.FileCacheManager)
+        self.assertIsInstance(cache.factory(test_config), cache.SqlKvCache)
         test_config.cache = None
         self.assertIsInstance(cache.factory(test_config), cache.NullCache)
 
@@ -41,8 +42,12 @@ class MemCacheTest(TestCase):
 
     def test_get_set(self):
         mem_cache = cache.InMemoryCache()
+        mem_cache.clear()
+        self.addCleanup(mem_cache.clear)
         mem_cache.save({'region': 'us-east-1'}, {'hello': 'world'})
-        self.assertEqual(mem_cache.size(), 1)
+        self.assertEqual(
+            mem_cache.size(),
+            len(pickle.dumps({'hello': 'world'}, protocol=2)))
         self.assertEqual(mem_cache.load(), True)
 
         mem_cache = cache.InMemoryCache()
@@ -50,116 +55,165 @@ class MemCacheTest(TestCase):
             mem_cache.get({'region': 'us-east-1'}),
             {'hello': 'world'})
 
+    def get_cache(self, **kw):
+        cache.InMemoryCache().clear()
+        self.addCleanup(cache.InMemoryCache().clear)
+        return cache.InMemoryCache(config.Bag(cache='memory', **kw))
+
+    def test_lru_eviction(self):
+        mem_cache = self.get_cache(cache_period=5, cache_memory_limit=0.001)
+        evictions = mem_cache.get_metadata()['evictions']
+        mem_cache.save('a', 'x' * 400)
+        mem_cache.save('b', 'y' * 400)
+        self.assertEqual(mem_cache.get('a'), 'x' * 400)
+        # over the ~1kb budget, b is the least recently used
+        mem_cache.save('c', 'z' * 400)
+        self.assertEqual(mem_cache.get('b'), None)
+        self.assertEqual(mem_cache.get('a'), 'x' * 400)
+        self.assertEqual(mem_cache.get('c'), 'z' * 400)
+        self.assertTrue(mem_cache.size() <= mem_cache.max_bytes)
+        self.assertEqual(mem_cache.get_metadata()['evictions'], evictions + 1)
+
+        # entries larger than the budget are not cached
+        mem_cache.save('d', 'w' * 2048)
+        self.assertEqual(mem_cache.get('d'), None)
+
+    def test_size_tracking(self):
+        mem_cache = self.get_cache(cache_period=5)
+        mem_cache.save('a', 'x' * 100)
+        mem_cache.save('a', 'x' * 200)
+        mem_cache.save('b', 'y' * 100)
+        self.assertEqual(
+            mem_cache.size(),
+            sum([size for _, size, _ in mem_cache.data.values()]))
+        with mock.patch.object(cache.time, 'time', return_value=time.time() + 600):
+            mem_cache.get('a')
+        self.assertEqual(mem_cache.size(), mem_cache._sizeof('y' * 100))
+
+        # large lists are sized from a sample
+        resources = [
+            {'InstanceId': 'i-%012d' % i, 'State': {'Name': 'running'},
+             'Tags': [{'Key': 'Name', 'Value': 'web-%d' % i}]}
+            for i in range(1000)]
+        estimate = mem_cache._sizeof(resources)
+        actual = len(pickle.dumps(resources, protocol=2))
+        self.assertTrue(abs(estimate - actual) < actual * 0.2)
+
+    def test_expiration_and_stats(self):
+        mem_cache = self.get_cache(cache_period=5)
+        before = mem_cache.get_metadata()
+        mem_cache.save('key', [1, 2])
+        self.assertEqual(mem_cache.get('key'), [1, 2])
+        self.assertEqual(mem_cache.get('missing'), None)
+        with mock.patch.object(cache.time, 'time', return_value=time.time() + 600):
+            self.assertEqual(mem_cache.get('key'), None)
+        md = mem_cache.get_metadata()
+        self.assertEqual(md['hits'] - before['hits'], 1)
+        self.assertEqual(md['misses'] - before['misses'], 2)
+        self.assertEqual(md['expirations'] - before['expirations'], 1)
+        self.assertEqual(md['entries'], 0)
+
+
+class SnapshotCacheTest(TestCase):
+
+    def test_factory(self):
+        c = cache.factory(None, scope='ec2')
+        self.assertIsInstance(c, cache.SnapshotCache)
+        self.assertIsInstance(c.cache, cache.NullCache)
+        self.assertFalse(c.load())
+        with cache.resource_snapshot() as snapshot:
+            self.assertEqual(c.snapshot, snapshot)
+            self.assertTrue(c.load())
+        self.assertEqual(c.snapshot, None)
+        self.assertEqual(c.get_metadata(), {})
+
+    def test_scoped_copies(self):
+        with cache.resource_snapshot() as snapshot:
+            ec2 = cache.factory(None, scope='ec2')
+            ec2.save('q', [{'InstanceId': 'i-1'}])
+            resources = ec2.get('q')
+            resources[0]['c7n:annotation'] = True
+            self.assertEqual(
+                cache.factory(None, scope='ec2').get('q'), [{'InstanceId': 'i-1'}])
+            self.assertEqual(cache.factory(None, scope='asg').get('q'), None)
+            self.assertEqual(snapshot.get_metadata()['hits'], 2)
+            self.assertEqual(snapshot.get_metadata()['entries'], 1)
+
+    def test_backing_cache(self):
+        mem_cache = cache.InMemoryCache()
+        mem_cache.save('q', [1])
+        self.addCleanup(mem_cache.clear)
+        c = cache.SnapshotCache(mem_cache, 'ec2')
+        with cache.resource_snapshot() as snapshot:
+            self.assertEqual(c.get('q'), [1])
+            self.assertEqual(snapshot.get(('ec2', 'q')), [1])
+            c.save('r', [2])
+            self.assertEqual(mem_cache.get('r'), [2])
+            self.assertIn('snapshot', c.get_metadata())
+
 
-class FileCacheManagerTest(TestCase):
+class SqlKvCacheTest(TestCase):
 
-    def setUp(self):
-        self.test_config = Namespace(
-            cache_period=60, cache="test-cloud-custodian.cache"
-        )
-        self.test_cache = cache.FileCacheManager(self.test_config)
-        self.test_key = "test"
-        self.bad_key = "bad"
-        self.test_value = [1, 2, 3]
+    def get_cache(self, path, period=60):
+        c = cache.SqlKvCache(Namespace(cache_period=period, cache=path))
+        self.addCleanup(c.close)
+        return c
 
     def test_get_set(self):
-        t = self.temporary_file_with_cleanup()
-        c = cache.FileCacheManager(Namespace(cache_period=60, cache=t.name))
-        self.assertFalse(c.load())
+        path = os.path.join(tempfile.mkdtemp(), 'sub', 'c7n.cache')
+        self.addCleanup(os.unlink, path)
+        c = self.get_cache(path)
+        self.assertTrue(c.load())
         k1 = {"account": "12345678901234", "region": "us-west-2", "resource": "ec2"}
-        c.save(k1, range(5))
-        self.assertEqual(c.get(k1), range(5))
+        c.save(k1, list(range(5)))
         k2 = {"account": "98765432101234", "region": "eu-west-1", "resource": "asg"}
-        c.save(k2, range(2))
-        self.assertEqual(c.get(k1), range(5))
-        self.assertEqual(c.get(k2), range(2))
-
-        c2 = cache.FileCacheManager(Namespace(cache_period=60, cache=t.name))
-        self.assertTrue(c2.load())
-        self.assertEqual(c2.get(k1), range(5))
-        self.assertEqual(c2.get(k2), range(2))
-
-    def test_get(self):
-        # mock the pick and set it to the data variable
-        test_pickle = pickle.dumps(
-            {pickle.dumps(self.test_key): self.test_value}, protocol=2
-        )
-        self.test_cache.data = pickle.loads(test_pickle)
-
-        # assert
-        self.assertEqual(self.test_cache.get(self.test_key), self.test_value)
-        self.assertEqual(self.test_cache.get(self.bad_key), None)
-
-    def test_load(self):
-        t = self.temporary_file_with_cleanup(suffix=".cache")
-
-        load_config = Namespace(cache_period=0, cache=t.name)
-        load_cache = cache.FileCacheManager(load_config)
-        self.assertFalse(load_cache.load())
-        load_cache.data = {"key": "value"}
-        self.assertTrue(load_cache.load())
-
-    @mock.patch.object(cache.os, "makedirs")
-    @mock.patch.object(cache.os.path, "exists")
-    @mock.patch.object(cache.pickle, "dump")
-    @mock.patch.object(cache.pickle, "dumps")
-    def test_save_exists(self, mock_dumps, mock_dump, mock_exists, mock_mkdir):
-        # path exists then we dont need to create the folder
-        mock_exists.return_value = True
-        # tempfile to hold the pickle
-        temp_cache_file = self.temporary_file_with_cleanup()
-
-        self.test_cache.cache_path = temp_cache_file.name
-        # make the call
-        self.test_cache.save(self.test_key, self.test_value)
-
-        # assert if file already exists
-        self.assertFalse(mock_mkdir.called)
-        self.assertTrue(mock_dumps.called)
-        self.assertTrue(mock_dump.called)
-
-        # mkdir should NOT be called, but pickles should
-        self.assertEqual(mock_mkdir.call_count, 0)
-        self.assertEqual(mock_dump.call_count, 1)
-        self.assertEqual(mock_dumps.call_count, 1)
-
-    @mock.patch.object(cache.os, "makedirs")
-    @mock.patch.object(cache.os.path, "exists")
-    @mock.patch.object(cache.pickle, "dump")
-    @mock.patch.object(cache.pickle, "dumps")
-    def test_save_doesnt_exists(self, mock_dumps, mock_dump, mock_exists, mock_mkdir):
-        temp_cache_file = self.temporary_file_with_cleanup()
-
-        self.test_cache.cache_path = temp_cache_file.name
-
-        # path doesnt exists then we will create the folder
-        # raise some sort of exception in the try
-        mock_exists.return_value = False
-        mock_dump.side_effect = Exception("Error")
-        mock_mkdir.side_effect = Exception("Error")
-
-        # make the call
-        self.test_cache.save(self.test_key, self.test_value)
-
-        # assert if file doesnt exists
-        self.assertTrue(mock_mkdir.called)
-        self.assertTrue(mock_dumps.called)
-        self.assertTrue(mock_dump.called)
-
-        # all 3 should be called once
-        self.assertEqual(mock_mkdir.call_count, 1)
-        self.assertEqual(mock_dump.call_count, 1)
-        self.assertEqual(mock_dumps.call_count, 1)
-
-    def temporary_file_with_cleanup(self, **kwargs):
-        """
-        NamedTemporaryFile with delete=True has
-        significantly different behavior on Windows
-        so we utilize delete=False to simplify maintaining
-        compatibility.
-        """
-        t = tempfile.NamedTemporaryFile(delete=False, **kwargs)
+        c.save(k2, list(range(2)))
+        self.assertEqual(c.get(k1), list(range(5)))
+        self.assertEqual(c.get({"resource": "ebs"}), None)
+
+        c2 = self.get_cache(path)
+        self.assertEqual(c2.get(k1), list(range(5)))
+        self.assertEqual(c2.get(k2), list(range(2)))
+        self.assertTrue(c2.size() > 0)
+
+    def test_entry_expiration(self):
+        t = tempfile.NamedTemporaryFile(delete=False, suffix='.cache')
+        t.close()
+        self.addCleanup(os.unlink, t.name)
+        c = self.get_cache(t.name, period=5)
+        c.save('old', [1], timestamp=time.time() - 600)
+        c.save('new', [2])
+        self.assertEqual(c.get('old'), None)
+        self.assertEqual(c.get('new'), [2])
+
+        # stale entries are purged when another instance opens the file.
+        c2 = self.get_cache(t.name, period=5)
+        c2.load()
+        self.assertEqual(
+            c2.conn.execute('select count(*) from c7n_cache').fetchone()[0], 1)
 
+    def test_migrate_pickle_file(self):
+        t = tempfile.NamedTemporaryFile(delete=False, suffix='.cache')
+        self.addCleanup(os.unlink, t.name)
+        pickle.dump({pickle.dumps('key'): [1, 2]}, t, protocol=2)
+        t.close()
+        c = self.get_cache(t.name)
+        self.assertTrue(c.load())
+        self.assertEqual(c.get('key'), None)
+        c.save('key', [3])
+        self.assertEqual(c.get('key'), [3])
+
+    def test_unreadable_entry(self):
+        t = tempfile.NamedTemporaryFile(delete=False, suffix='.cache')
+        t.close()
         self.addCleanup(os.unlink, t.name)
-        self.addCleanup(t.close)
-        return t
+        c = self.get_cache(t.name)
+        c.save('key', [1])
+        c.save('other', [2])
+        with c.conn:
+            c.conn.execute("update c7n_cache set value = X'8002' where key = ?",
+                           (pickle.dumps('key', protocol=2),))
+        self.assertEqual(c.get('key'), None)
+        self.assertEqual(
+            c.conn.execute('select count(*) from c7n_cache').fetchone()[0], 1)
+        self.assertEqual(c.get('other'), [2])
@@ -548,6 +548,37 @@ class RunTest(CliTest):
             ["custodian", "run", "-s", temp_dir, "--debug", yaml_file], CustomError
         )
 
+    def test_parallel(self):
+        from c7n import credentials
+        from c7n.policy import Policy
+
+        executed = []
+
+        def execute(policy):
+            executed.append(policy.name)
+            self.assertIsNotNone(credentials.RATE_LIMITER)
+            if policy.name == "error":
+                raise Exception("foobar")
+            return []
+
+        self.patch(Policy, "__call__", execute)
+
+        temp_dir = self.get_temp_dir()
+        yaml_file = self.write_policy_file(
+            {
+                "policies": [
+                    {"name": "error", "resource": "ec2"},
+                    {"name": "running", "resource": "ec2",
+                     "filters": [{"State.Name": "running"}]},
+                ]
+            }
+        )
+
+        self.run_and_expect_failure(
+            ["custodian", "run", "--parallel", "2", "-s", temp_dir, yaml_file], 2)
+        self.assertEqual(sorted(executed), ["error", "running"])
+        self.assertIsNone(credentials.RATE_LIMITER)
+
 
 class MetricsTest(CliTest):
 
@@ -13,11 +13,18 @@
 # limitations under the License.
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import os
+import time
+
+import mock
+
 from botocore.exceptions import ClientError
 
-from c7n.credentials import SessionFactory, assumed_session
+from c7n import credentials
+from c7n.credentials import ApiRateLimiter, SessionFactory, assumed_session
+from c7n.testing import ReplaySessionFactory
 from c7n.version import version
-from c7n.utils import local_session
+from c7n.utils import local_session, TokenBucket
 
 from .common import BaseTest
 
@@ -60,6 +67,22 @@ class Credential(BaseTest):
             )
         )
 
+    def test_rate_limiter(self):
+        limiter = ApiRateLimiter({'ec2': (1, 1)})
+        self.patch(credentials, 'RATE_LIMITER', limiter)
+        acquired = []
+        self.patch(
+            TokenBucket, 'acquire', lambda bucket: acquired.append(bucket))
+        session = SessionFactory('us-east-1')()
+        session.events.emit(
+            'before-call.ec2.DescribeInstances',
+            model=session.client('ec2').meta.service_model.operation_model(
+                'DescribeInstances'),
+            params={}, request_signer=None, context={})
+        self.assertEqual(acquired, [limiter.get_bucket('ec2')])
+        self.assertEqual(limiter.get_bucket('ec2').rate, 1)
+        self.assertEqual(limiter.get_bucket('iam').rate, 5)
+
     def test_local_session_agent_update(self):
         factory = SessionFactory('us-east-1')
         factory.policy_name = "check-ebs"
@@ -72,3 +95,57 @@ class Credential(BaseTest):
         client = local_session(factory).client('ec2')
         self.assertTrue(
             'check-ec2' in client._client_config.user_agent)
+
+
+class ReplaySessionTest(BaseTest):
+
+    def get_factory(self, test_case, **kw):
+        return ReplaySessionFactory(
+            os.path.join(self.placebo_dir, test_case), **kw)
+
+    def test_replay_cycles_responses(self):
+        factory = self.get_factory('test_security_group_unused')
+        client = factory().client('ec2')
+        groups = [len(client.describe_security_groups()['SecurityGroups'])
+                  for i in range(3)]
+        self.assertEqual(groups[0], groups[2])
+        self.assertEqual(factory.call_count, 3)
+
+    def test_replay_scale(self):
+        factory = self.get_factory('test_offhours_records', scale=3)
+        reservations = factory().client('ec2').describe_instances()['Reservations']
+        instances = [i for r in reservations for i in r['Instances']]
+        ids = [i['InstanceId'] for i in instances]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids) % 3, 0)
+        original = ids[0]
+        self.assertIn('%s-2' % original, ids)
+        # account ids aren't rewritten
+        self.assertEqual(
+            set([r['OwnerId'] for r in reservations]),
+            set([reservations[0]['OwnerId']]))
+        self.assertEqual(instances[0]['LaunchTime'].tzname(), 'UTC')
+        self.assertEqual(
+            [i['State']['Name'] for i in instances].count('running'),
+            len(ids) // 3 * 2)
+
+    def test_replay_latency(self):
+        factory = self.get_factory('test_offhours_records', latency=0.05)
+        t = time.time()
+        factory().client('ec2').describe_instances()
+        self.assertTrue(time.time() - t >= 0.05)
+
+    def test_replay_rate_limited(self):
+        limiter = mock.MagicMock(return_value=None)
+        self.patch(credentials, 'RATE_LIMITER', limiter)
+        factory = self.get_factory('test_security_group_unused')
+        factory().client('ec2').describe_security_groups()
+        self.assertEqual(limiter.call_count, 1)
+        self.assertEqual(
+            limiter.call_args[1]['model'].name, 'DescribeSecurityGroups')
+        self.assertEqual(factory.call_count, 1)
+
+    def test_replay_missing(self):
+        factory = self.get_factory('test_offhours_records')
+        self.assertRaises(
+            IOError, factory().client('ec2').describe_volumes)
@@ -132,6 +132,30 @@ class TestMetricFilter(BaseTest):
         resources = policy.run()
         self.assertEqual(len(resources), 1)
 
+    def test_metric_filter_statistics_fallback(self):
+        session_factory = self.replay_flight_data(
+            "test_ec2_metric_statistics_fallback")
+        policy = self.load_policy(
+            {
+                "name": "ec2-utilization",
+                "resource": "ec2",
+                "filters": [
+                    {
+                        "type": "metrics",
+                        "name": "CPUUtilization",
+                        "days": 3,
+                        "value": 1.5,
+                    }
+                ],
+            },
+            session_factory=session_factory,
+        )
+        resources = policy.run()
+        self.assertEqual(len(resources), 1)
+        self.assertEqual(
+            resources[0]["c7n.metrics"]["AWS/EC2.CPUUtilization.Average"][0]["Unit"],
+            "Percent")
+
 
 class TestPropagateSpotTags(BaseTest):
 
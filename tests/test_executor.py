@@ -15,6 +15,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 from c7n import executor
 
+import threading
 import unittest
 
 
@@ -55,6 +56,26 @@ class ThreadExecutorTest(ExecutorBase, unittest.TestCase):
     executor_factory = executor.ThreadPoolExecutor
 
 
+class PolicyThreadsTest(unittest.TestCase):
+
+    def get_policy(self):
+        return executor.POLICY_THREADS.get(threading.current_thread().ident)
+
+    def test_workers_run_as_policy(self):
+        ident = threading.current_thread().ident
+        with executor.ThreadPoolExecutor(max_workers=2) as w:
+            self.assertEqual(w.submit(self.get_policy).result(), None)
+            executor.POLICY_THREADS[ident] = policy = object()
+            try:
+                self.assertEqual(
+                    [w.submit(self.get_policy).result() for i in range(3)],
+                    [policy] * 3)
+            finally:
+                executor.POLICY_THREADS.pop(ident)
+            self.assertEqual(w.submit(self.get_policy).result(), None)
+        self.assertEqual(executor.POLICY_THREADS, {})
+
+
 class MainExecutorTest(ExecutorBase, unittest.TestCase):
     executor_factory = executor.MainThreadExecutor
 
@@ -19,11 +19,14 @@ from dateutil import tz
 from dateutil.parser import parse as parse_date
 import unittest
 
+import mock
+
 from c7n.exceptions import PolicyValidationError
 from c7n.executor import MainThreadExecutor
 from c7n import filters as base_filters
 from c7n.resources.ec2 import filters
 from c7n.resources.elb import ELB
+from c7n.resources.vpc import SecurityGroup
 from c7n.utils import annotation
 from .common import instance, event_data, Bag, BaseTest
 from c7n.filters.core import ValueRegex
@@ -245,6 +248,15 @@ class TestRegexValue(unittest.TestCase):
 
         self.assertEqual(f(instance(Architecture="x86_64")), False)
 
+    def test_regex_compiled(self):
+        f = filters.factory(
+            {"type": "value", "key": "Color", "value": ".*GREEN.*", "op": "regex"}
+        )
+        self.assertEqual(f(instance(Color="green papaya")), True)
+        op, v = f.compiled
+        self.assertEqual(op.args[0].pattern, ".*GREEN.*")
+        self.assertEqual(f(instance(Color=["green"])), False)
+
 
 class TestRegexCaseSensitiveValue(unittest.TestCase):
 
@@ -466,6 +478,42 @@ class TestValueTypes(BaseFilterTest):
         self.assertFilter(fdata, i(2, 3), True)
         self.assertFilter(fdata, i(3, 2), False)
 
+    def test_compiled_sentinels(self):
+        f = filters.factory({
+            "type": "value", "key": "LaunchTime", "op": "less-than",
+            "value_type": "age", "value": 30})
+        self.assertEqual(f(instance(LaunchTime=datetime.utcnow().isoformat())), True)
+        op, sentinel = f.compiled
+        self.assertIsInstance(sentinel, datetime)
+        self.assertEqual(
+            f(instance(LaunchTime=(datetime.utcnow() - timedelta(31)).isoformat())), False)
+        self.assertEqual(f.compiled[1], sentinel)
+
+        # relative sentinels are recomputed per resource set
+        f.process([instance(LaunchTime=datetime.utcnow().isoformat())])
+        self.assertNotEqual(f.compiled[1], sentinel)
+
+        f = filters.factory({
+            "type": "value", "key": "EngineVersion", "op": "gte",
+            "value_type": "version", "value": "5.6"})
+        self.assertEqual(f(instance(EngineVersion="5.7.1")), True)
+        self.assertEqual(f(instance(EngineVersion="5.5")), False)
+        self.assertIsInstance(f.compiled[1], base_filters.core.ComparableVersion)
+
+    def test_value_regex_compiled_once(self):
+        fdata = {
+            "type": "value",
+            "key": "tag:metadata",
+            "op": "equal",
+            "value_regex": r"id=([0-9]+)",
+            "value": "3",
+        }
+        f = filters.factory(fdata)
+        self.assertTrue(f(instance(Tags=[{"Key": "metadata", "Value": "id=3"}])))
+        regex = f.value_regex
+        self.assertFalse(f(instance(Tags=[{"Key": "metadata", "Value": "id=4"}])))
+        self.assertIs(f.value_regex, regex)
+
     def test_value_regex_with_non_capturing_groups(self):
 
         def i(d):
@@ -863,6 +911,35 @@ class TestInList(unittest.TestCase):
         )
         self.assertEqual(f(instance(Thing="Foo")), True)
         self.assertEqual(f(instance(Thing="Baz")), False)
+        self.assertIsInstance(f.compiled[1], frozenset)
+        self.assertEqual(f(instance(Thing=["Foo"])), False)
+
+    def test_in_normalize(self):
+        f = filters.factory(
+            {
+                "type": "value",
+                "key": "Thing",
+                "value": ["foo", "bar"],
+                "value_type": "normalize",
+                "op": "in",
+            }
+        )
+        self.assertEqual(f(instance(Thing=" Foo ")), True)
+        self.assertEqual(f(instance(Thing="Baz")), False)
+        self.assertIsInstance(f.compiled[1], frozenset)
+
+    def test_in_unhashable_values(self):
+        f = filters.factory(
+            {
+                "type": "value",
+                "key": "Thing",
+                "value": [["Foo"], ["Bar"]],
+                "op": "in",
+            }
+        )
+        self.assertEqual(f(instance(Thing=["Foo"])), True)
+        self.assertEqual(f(instance(Thing=["Baz"])), False)
+        self.assertIsInstance(f.compiled[1], list)
 
 
 class TestNotInList(unittest.TestCase):
@@ -878,6 +955,7 @@ class TestNotInList(unittest.TestCase):
         )
         self.assertEqual(f(instance(Thing="Baz")), True)
         self.assertEqual(f(instance(Thing="Foo")), False)
+        self.assertEqual(f(instance(Thing={"Foo": 1})), True)
 
     def test_not_in(self):
         f = filters.factory(
@@ -940,6 +1018,68 @@ class TestFilterRegistry(unittest.TestCase):
         self.assertRaises(PolicyValidationError, reg.factory, {"type": ""})
 
 
+class TestMetricData(BaseTest):
+
+    def test_batch_dedupe_and_pages(self):
+        pages = [
+            {"MetricDataResults": [
+                {"Id": "m0", "Timestamps": [datetime(2019, 1, 1)], "Values": [4.0]},
+                {"Id": "m1", "Timestamps": [], "Values": []}],
+             "NextToken": "abc"},
+            {"MetricDataResults": [
+                {"Id": "m1", "Timestamps": [datetime(2019, 1, 1)], "Values": [9.0]}]}]
+        calls = []
+
+        class Client(object):
+            def get_metric_data(self, **params):
+                calls.append(params)
+                return pages[len(calls) - 1]
+
+        p = self.load_policy({
+            "name": "elb-requests",
+            "resource": "elb",
+            "filters": [{
+                "type": "metrics", "name": "RequestCount", "statistics": "Sum",
+                "value": 5, "op": "less-than", "days": 1}]})
+        f = p.resource_manager.filters[0]
+        self.patch(f, "get_dimensions", lambda r: [
+            {"Name": "LoadBalancerName", "Value": r["Group"]}])
+        resources = [
+            {"LoadBalancerName": "a", "Group": "x"},
+            {"LoadBalancerName": "b", "Group": "y"},
+            {"LoadBalancerName": "c", "Group": "x"}]
+        f.namespace, f.metric, f.statistics, f.period = "AWS/ELB", "RequestCount", "Sum", 86400
+        f.end = datetime.utcnow()
+        f.start = f.end - timedelta(1)
+        f.metric_key = "AWS/ELB.RequestCount.Sum"
+        for r in resources:
+            r["c7n.metrics"] = {}
+        f.collect_metric_data(Client(), resources)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(calls[0]["MetricDataQueries"]), 2)
+        self.assertEqual(calls[1]["NextToken"], "abc")
+        self.assertEqual(
+            [r["c7n.metrics"]["AWS/ELB.RequestCount.Sum"][0]["Sum"] for r in resources],
+            [4.0, 9.0, 4.0])
+
+    def test_batch_size(self):
+        p = self.load_policy({
+            "name": "elb-requests",
+            "resource": "elb",
+            "filters": [{
+                "type": "metrics", "name": "RequestCount", "value": 5,
+                "days": 14, "period": 60}]})
+        f = p.resource_manager.filters[0]
+        f.end = datetime.utcnow()
+        f.start = f.end - timedelta(14)
+        f.period = 60
+        # 20160 points per query, five queries per call.
+        self.assertEqual(f.get_batch_size(), 5)
+        f.period = 86400 * 14
+        self.assertEqual(f.get_batch_size(), 500)
+
+
 class TestMissingMetrics(BaseTest):
 
     def test_missing_metrics(self):
@@ -1002,5 +1142,58 @@ class TestMissingMetrics(BaseTest):
         )
 
 
+class RelatedResourceIndexTest(BaseTest):
+
+    def get_policy(self, *filters):
+        return self.load_policy({
+            'name': 'related', 'resource': 'ec2',
+            'filters': list(filters)}, validate=False)
+
+    def test_related_shared_across_filters(self):
+        p = self.get_policy(
+            {'type': 'security-group', 'key': 'GroupName', 'value': 'web'},
+            {'type': 'security-group', 'key': 'VpcId', 'value': 'vpc-1'})
+        groups = [{'GroupId': 'sg-%d' % i, 'GroupName': 'web', 'VpcId': 'vpc-1'}
+                  for i in range(3)]
+        instances = [{'InstanceId': 'i-%d' % i,
+                      'SecurityGroups': [{'GroupId': g['GroupId']}]}
+                     for i, g in enumerate(groups)]
+        with mock.patch.object(SecurityGroup, 'get_resources') as get_resources:
+            get_resources.side_effect = lambda ids: [
+                g for g in groups if g['GroupId'] in ids]
+            resources = instances
+            for f in p.resource_manager.filters:
+                resources = f.process(resources)
+            resources = p.resource_manager.filters[0].process(instances[:1])
+        self.assertEqual(resources, instances[:1])
+        self.assertEqual(get_resources.call_count, 1)
+        self.assertEqual(
+            sorted(get_resources.call_args[0][0]), ['sg-0', 'sg-1', 'sg-2'])
+
+    def test_related_threshold_across_filters(self):
+        p = self.get_policy(
+            {'type': 'security-group', 'key': 'GroupName', 'value': 'web'},
+            {'type': 'security-group', 'key': 'GroupName', 'value': 'web'})
+        groups = [{'GroupId': 'sg-%d' % i, 'GroupName': 'web'} for i in range(12)]
+        instances = [{'InstanceId': 'i-%d' % i,
+                      'SecurityGroups': [{'GroupId': g['GroupId']}]}
+                     for i, g in enumerate(groups)]
+        with mock.patch.object(SecurityGroup, 'get_resources') as get_resources:
+            with mock.patch.object(SecurityGroup, 'resources') as all_resources:
+                get_resources.side_effect = lambda ids: [
+                    g for g in groups if g['GroupId'] in ids]
+                all_resources.return_value = groups
+                first, second = p.resource_manager.filters
+                self.assertEqual(len(first.process(instances[:6])), 6)
+                self.assertEqual(len(second.process(instances[6:])), 6)
+                self.assertEqual(len(second.process(instances)), 12)
+        # the combined ids crossed the threshold, fetch everything once
+        self.assertEqual(get_resources.call_count, 1)
+        self.assertEqual(all_resources.call_count, 1)
+
+        p.ctx.initialize()
+        self.assertEqual(p.ctx.related_resources, {})
+
+
 if __name__ == "__main__":
     unittest.main()
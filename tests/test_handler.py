@@ -71,6 +71,7 @@ class HandleTest(BaseTest):
              'cache': '',
              'regions': (),
              'cache_period': 0,
+             'cache_memory_limit': None,
              'log_group': None,
              'metrics': None})
 
@@ -99,6 +100,21 @@ class HandleTest(BaseTest):
         self.assertFalse('Skipping failed operation: foi' in output.getvalue())
         mock_collection.from_data.assert_called_once()
 
+    @mock.patch('c7n.handler.load_resources')
+    @mock.patch('c7n.handler.PolicyCollection')
+    def test_dispatch_loads_resources_once(self, mock_collection, load_resources):
+        self.patch(handler, 'policy_config', None)
+        mock_collection.from_data.return_value = []
+        run_dir = self.change_cwd()
+        with open(os.path.join(run_dir, 'config.json'), 'w') as fh:
+            json.dump({
+                'execution-options': {'output_dir': 's3://xyz', 'account_id': '004'},
+                'policies': [{'resource': 'ec2', 'name': 'xyz'}]}, fh)
+        handler.dispatch_event({'detail': {'xyz': 'oui'}}, None)
+        handler.dispatch_event({'detail': {'xyz': 'oui'}}, None)
+        load_resources.assert_called_once_with({'ec2'})
+        self.assertEqual(mock_collection.from_data.call_count, 2)
+
     @mock.patch('c7n.handler.PolicyCollection')
     def test_dispatch_err_handle(self, mock_collection):
         self.patch(handler, 'policy_config', {
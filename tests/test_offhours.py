@@ -22,6 +22,7 @@ from dateutil import tz as tzutil
 from .common import BaseTest, instance
 
 from c7n.exceptions import PolicyValidationError
+from c7n.filters import offhours
 from c7n.filters.offhours import OffHour, OnHour, ScheduleParser, Time
 from c7n.testing import mock_datetime_now
 
@@ -651,6 +652,74 @@ class ScheduleParserTest(BaseTest):
             )
             self.assertEqual(OffHour({"skip-days": ["2015-12-02"]})(i), True)
 
+    def test_offhours_skip_days_from(self):
+        t = datetime.datetime(
+            year=2015,
+            month=12,
+            day=1,
+            hour=19,
+            minute=5,
+            tzinfo=tzutil.gettz("America/New_York"),
+        )
+        fetches = []
+
+        class FakeValuesFrom(object):
+
+            def __init__(self, data, manager):
+                self.data = data
+
+            def get_values(self):
+                fetches.append(self.data['url'])
+                return ["2015-12-01"]
+
+        self.patch(offhours, "ValuesFrom", FakeValuesFrom)
+        f = OffHour({"skip-days-from": {"url": "s3://bucket/holidays.txt"}})
+        with mock_datetime_now(t, datetime):
+            resources = [
+                instance(Tags=[{"Key": "maid_offhours", "Value": "tz=est"}])
+                for i in range(5)]
+            self.assertEqual([r for r in resources if f(r)], [])
+        self.assertEqual(fetches, ["s3://bucket/holidays.txt"])
+
+    def test_offhours_schedule_memoized(self):
+        t = datetime.datetime(
+            year=2015,
+            month=12,
+            day=1,
+            hour=19,
+            minute=5,
+            tzinfo=tzutil.gettz("America/New_York"),
+        )
+        f = OffHour({})
+        parsed = []
+        resolve = f._resolve_schedule
+
+        def counted(value, time_type):
+            parsed.append(value)
+            return resolve(value, time_type)
+
+        f._resolve_schedule = counted
+        resources = [
+            instance(Tags=[{"Key": "maid_offhours", "Value": v}])
+            for v in ("tz=est", "off=(m-f,20);tz=pt;", "TZ=EST", "'off=(m-f,20);;tz=pt'")]
+        with mock_datetime_now(t, datetime):
+            self.assertEqual(len(f.process(resources)), 2)
+        # memoized by normalized tag value
+        self.assertEqual(parsed, ["tz=est", "off=(m-f,20);tz=pt"])
+        # the current hour is only cached within a run
+        self.assertEqual(f.now_table, None)
+        with mock_datetime_now(t.replace(hour=21), datetime):
+            self.assertEqual(f.process(resources), [])
+        self.assertEqual(len(parsed), 2)
+
+    def test_offhours_schedule_cache_bounded(self):
+        f = OffHour({})
+        f.schedule_cache_size = 2
+        for v in ("tz=est", "tz=pt", "tz=est", "tz=ct"):
+            f.resolve_schedule(v, f.time_type)
+        self.assertEqual(
+            [k for k, _ in f.schedules], ["tz=est", "tz=ct"])
+
     def test_onhour_skip(self):
         t = datetime.datetime(
             year=2015,
@@ -15,6 +15,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import datetime
 import gzip
+import json
 import logging
 import mock
 import shutil
@@ -23,7 +24,7 @@ import os
 from dateutil.parser import parse as date_parse
 
 from c7n.ctx import ExecutionContext
-from c7n.output import DirectoryOutput, LogFile, metrics_outputs
+from c7n.output import DirectoryOutput, LogFile, PolicyLogFilter, metrics_outputs
 from c7n.resources.aws import S3Output, MetricsOutput
 from c7n.testing import mock_datetime_now, TestUtils
 
@@ -108,6 +109,22 @@ class S3OutputTest(TestUtils):
             content = fh.read().strip()
             self.assertTrue(content.endswith("hello world"))
 
+    def test_policy_log_filter(self):
+        ctx, other = Bag(), Bag()
+        log_filter = PolicyLogFilter(ctx)
+        record = logging.LogRecord(
+            "custodian.s3", logging.INFO, __file__, 1, "hello", (), None)
+        self.assertTrue(log_filter.filter(record))
+        with mock.patch.dict("c7n.output.POLICY_THREADS", {record.thread: other}):
+            self.assertFalse(log_filter.filter(record))
+        with mock.patch.dict("c7n.output.POLICY_THREADS", {record.thread: ctx}):
+            self.assertTrue(log_filter.filter(record))
+        # unregistered threads, while another policy is executing
+        with mock.patch.dict("c7n.output.POLICY_THREADS", {-1: other}):
+            self.assertFalse(log_filter.filter(record))
+        with mock.patch.dict("c7n.output.POLICY_THREADS", {-1: ctx}):
+            self.assertTrue(log_filter.filter(record))
+
     def test_compress(self):
         output = self.get_s3_output()
 
@@ -126,6 +143,31 @@ class S3OutputTest(TestUtils):
                 with gzip.open(os.path.join(root, f)) as fh:
                     self.assertEqual(fh.read(), b"abc")
 
+    def test_write_records(self):
+        output = self.get_s3_output()
+        records = [{'InstanceId': 'i-%d' % i} for i in range(3)]
+        output.write_records('resources.json', records)
+        output.compress()
+        self.assertEqual(os.listdir(output.root_dir), ['resources.json.gz'])
+        with gzip.open(os.path.join(output.root_dir, 'resources.json.gz')) as fh:
+            self.assertEqual(json.loads(fh.read().decode('utf8')), records)
+
+    def test_write_records_compact(self):
+        output_dir = "s3://cloud-custodian/policies?compact=true"
+        output = S3Output(
+            ExecutionContext(
+                None,
+                Bag(name="xyz", provider_name="ostack"),
+                Config.empty(output_dir=output_dir)),
+            {'url': output_dir, 'compact': 'true'})
+        self.addCleanup(shutil.rmtree, output.root_dir)
+        self.assertEqual(output.key_prefix, output.key_prefix.split('?')[0])
+        self.assertTrue(output.key_prefix.startswith('/policies/xyz/'))
+
+        output.write_records('resources.json', [{'InstanceId': 'i-1'}])
+        with gzip.open(os.path.join(output.root_dir, 'resources.json.gz')) as fh:
+            self.assertEqual(fh.read(), b'[{"InstanceId":"i-1"}]')
+
     def test_upload(self):
 
         with mock_datetime_now(date_parse('2018/09/01 13:00'), datetime):
@@ -20,12 +20,13 @@ import mock
 import shutil
 import tempfile
 
-from c7n import policy, manager
+from c7n import policy, manager, resources
 from c7n.provider import clouds
 from c7n.exceptions import ResourceLimitExceeded, PolicyValidationError
 from c7n.resources import aws
 from c7n.resources.aws import AWS
 from c7n.resources.ec2 import EC2
+from c7n.resources.resource_map import ResourceMap
 from c7n.utils import dumps
 from c7n.query import ConfigSource, TypeInfo
 from c7n.version import version
@@ -101,11 +102,66 @@ class PolicyMeta(BaseTest):
                 (
                     "ec2:DescribeInstances",
                     "ec2:DescribeTags",
+                    "cloudwatch:GetMetricData",
                     "cloudwatch:GetMetricStatistics",
                 )
             ),
         )
 
+    def test_resource_map(self):
+        # regenerate with tools/dev/resourcemap.py
+        resource_map = {}
+        for k, v in manager.resources.items():
+            for name in [k] + list(v.type_aliases or ()):
+                resource_map["aws.%s" % name] = v.__module__
+        self.assertEqual(resource_map, ResourceMap)
+
+    def test_load_resources_by_type(self):
+        self.patch(resources, "LOADED", False)
+        self.patch(resources, "LOADED_MODULES", set())
+        with mock.patch("c7n.resources.importlib.import_module") as import_module, \
+                mock.patch.object(manager.resources, "notify") as notify:
+            resources.load_resources({"ec2", "aws.app-elb"})
+            self.assertEqual(
+                [c[0][0] for c in import_module.call_args_list],
+                ["c7n.resources.appelb", "c7n.resources.ec2"])
+            self.assertFalse(resources.LOADED)
+            self.assertEqual(notify.call_count, 1)
+
+            # loaded types are skipped
+            resources.load_resources({"ec2"})
+            resources.load_resources({"ec2", "s3"})
+            self.assertEqual(import_module.call_count, 3)
+            self.assertEqual(notify.call_count, 2)
+
+            # unknown types load everything
+            resources.load_resources({"ec2", "azure.vm"})
+            self.assertEqual(
+                import_module.call_count, 3 + len(set(ResourceMap.values())))
+            self.assertTrue(resources.LOADED)
+
+    def test_resource_registry_load(self):
+        registry = aws.ResourceRegistry("resources")
+
+        def load_resources(resource_types):
+            self.assertEqual(resource_types, ("aws.ec2",))
+            registry.register("ec2", EC2)
+
+        with mock.patch("c7n.resources.aws.load_resources") as load:
+            load.side_effect = load_resources
+            self.assertEqual(registry.get("ec2"), EC2)
+            self.assertEqual(registry.get("ec2"), EC2)
+            self.assertEqual(registry.get("xyz"), None)
+        self.assertEqual(load.call_count, 1)
+
+    def test_policy_resource_types(self):
+        self.assertEqual(
+            policy.get_policy_resource_types({"policies": [
+                {"name": "a", "resource": "ec2"},
+                {"name": "b", "resource": "aws.s3"}, "c"]}),
+            {"ec2", "aws.s3", None})
+        self.assertEqual(policy.get_policy_resource_types({"policies": {}}), None)
+
     def test_resource_augment_universal_mask(self):
         # universal tag had a potential bad patterm of masking
         # resource augmentation, scan resources to ensure
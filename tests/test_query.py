@@ -17,14 +17,48 @@ import json
 import logging
 import os
 
+import mock
 
-from c7n.query import ResourceQuery, RetryPageIterator
+from c7n import cache
+from c7n.exceptions import ClientError
+from c7n.executor import MainThreadExecutor
+from c7n.query import DescribeSource, ResourceQuery, RetryPageIterator
 from c7n.resources.vpc import InternetGateway
 
 from botocore.config import Config
 from .common import BaseTest, placebo_dir
 
 
+class ResourceSnapshotTest(BaseTest):
+
+    def test_policies_share_snapshot(self):
+        session_factory = self.replay_flight_data(
+            'test_ec2_state_transition_age_filter')
+        calls = []
+        describe = DescribeSource.resources
+
+        def resources(source, query):
+            calls.append(query)
+            return describe(source, query)
+
+        self.patch(DescribeSource, 'resources', resources)
+        policies = [self.load_policy({
+            'name': 'ec2-%d' % i,
+            'resource': 'ec2',
+            'filters': [{'type': 'value', 'key': 'InstanceId',
+                         'value': 'absent', 'op': 'ne'}]},
+            session_factory=session_factory) for i in range(2)]
+
+        with cache.resource_snapshot():
+            first = policies[0].run()
+            first[0]['c7n:annotation'] = True
+            second = policies[1].run()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(
+            [r['InstanceId'] for r in first], [r['InstanceId'] for r in second])
+        self.assertNotIn('c7n:annotation', second[0])
+
+
 class ResourceQueryTest(BaseTest):
 
     def test_pager_with_throttles(self):
@@ -138,6 +172,68 @@ class ConfigSourceTest(BaseTest):
         p.data['query'] = [{'clause': "configuration.imageId = 'xyz'"}]
         self.assertIn("imageId = 'xyz'", source.get_query_params(None)['expr'])
 
+    def get_config_source(self, client):
+        p = self.load_policy({'name': 'x', 'resource': 'ec2'})
+        self.patch(p.resource_manager, 'executor_factory', MainThreadExecutor)
+        session = mock.MagicMock()
+        session.client.return_value = client
+        self.patch(p.resource_manager, 'session_factory', lambda *args, **kw: session)
+        return p.resource_manager.get_source('config')
+
+    def config_item(self, instance_id):
+        return {'resourceId': instance_id,
+                'configuration': json.dumps({'instanceId': instance_id})}
+
+    def test_config_get_resources_batch(self):
+        ids = ['i-%03d' % i for i in range(250)]
+        client = mock.MagicMock()
+
+        def batch_get(resourceKeys):
+            keys = [k['resourceId'] for k in resourceKeys]
+            # the last id of the first batch is unprocessed once
+            unprocessed = keys[-1:] if keys[0] == 'i-000' else []
+            return {
+                'baseConfigurationItems': [
+                    self.config_item(k) for k in keys if k not in unprocessed],
+                'unprocessedResourceKeys': [
+                    {'resourceType': 'AWS::EC2::Instance', 'resourceId': k}
+                    for k in unprocessed]}
+
+        client.batch_get_resource_config.side_effect = batch_get
+        source = self.get_config_source(client)
+        resources = source.get_resources(ids)
+        self.assertEqual(
+            sorted([r['InstanceId'] for r in resources]), ids)
+        self.assertEqual(
+            [len(c[1]['resourceKeys'])
+             for c in client.batch_get_resource_config.call_args_list],
+            [100, 1, 100, 50])
+        client.get_resource_config_history.assert_not_called()
+
+    def test_config_get_resources_history_fallback(self):
+        client = mock.MagicMock()
+        client.batch_get_resource_config.side_effect = ClientError(
+            {'Error': {'Code': 'ValidationException', 'Message': 'unsupported'}},
+            'BatchGetResourceConfig')
+        client.get_resource_config_history.side_effect = lambda **kw: {
+            'configurationItems': kw['resourceId'] != 'i-gone' and [
+                self.config_item(kw['resourceId'])] or []}
+        source = self.get_config_source(client)
+        resources = source.get_resources(['i-001', 'i-gone'])
+        self.assertEqual([r['InstanceId'] for r in resources], ['i-001'])
+        self.assertEqual(client.get_resource_config_history.call_count, 2)
+
+    def test_config_resources_pages(self):
+        client = mock.MagicMock()
+        source = self.get_config_source(client)
+        pages = [{'Results': [json.dumps(self.config_item('i-%d%d' % (p, i)))
+                              for i in range(3)]} for p in range(3)]
+        with mock.patch('c7n.query.Paginator') as paginator:
+            paginator.return_value.paginate.return_value = iter(pages)
+            resources = source.resources()
+        self.assertEqual(len(resources), 9)
+        self.assertEqual(resources[-1]['InstanceId'], 'i-22')
+
 
 class QueryResourceManagerTest(BaseTest):
 
@@ -18,13 +18,17 @@ import json
 import os
 import tempfile
 import vcr
+import mock
+from six.moves.urllib.error import HTTPError
 from six.moves.urllib.request import urlopen
 from six import binary_type
 
 from .common import BaseTest, ACCOUNT_ID, Bag, TestConfig as Config
 from .test_s3 import destroyBucket
 
-from c7n.resolver import ValuesFrom, URIResolver
+from c7n import resolver as resolver_module
+from c7n.exceptions import ClientError
+from c7n.resolver import ResolverState, ValuesFrom, URIResolver
 
 
 class FakeCache(object):
@@ -52,6 +56,10 @@ class FakeResolver(object):
 
 class ResolverTest(BaseTest):
 
+    def setUp(self):
+        super(ResolverTest, self).setUp()
+        self.patch(resolver_module, "RESOLVER_STATE", ResolverState(32))
+
     def test_resolve_s3(self):
         session_factory = self.replay_flight_data("test_s3_resolver")
         session = session_factory()
@@ -97,23 +105,126 @@ class ResolverTest(BaseTest):
             fh.flush()
             self.assertEqual(resolver.resolve("file:%s" % fh.name), content)
 
+    def test_resolve_cached(self):
+        cache = FakeCache()
+        cache.save(("uri-resolver", "http://example.com/x.json"), "cached")
+        resolver = URIResolver(None, cache)
+        self.assertEqual(resolver.resolve("http://example.com/x.json"), "cached")
+
+    def test_resolve_url_not_modified(self):
+        uri = "http://example.com/values.json"
+        response = mock.MagicMock()
+        response.info.return_value = {"ETag": '"abc"'}
+        response.read.return_value = b"[1, 2]"
+        requests = []
+
+        def fake_urlopen(request):
+            requests.append(request)
+            if len(requests) > 1:
+                raise HTTPError(uri, 304, "Not Modified", {}, None)
+            return response
+
+        self.patch(resolver_module, "urlopen", fake_urlopen)
+        cache = FakeCache()
+        resolver = URIResolver(None, cache)
+        self.assertEqual(resolver.resolve(uri), "[1, 2]")
+        # cache entry expired
+        cache.state.clear()
+        self.assertEqual(resolver.resolve(uri), "[1, 2]")
+        self.assertEqual(requests[1].get_header("If-none-match"), '"abc"')
+
+    def test_validators_bounded(self):
+        self.patch(resolver_module, "RESOLVER_STATE", ResolverState(2))
+        resolver = URIResolver(None, FakeCache())
+        for i in range(3):
+            resolver.remember("http://example.com/%d" % i, '"e%d"' % i, None, "x")
+        resolver.remember("http://example.com/2", None, None, "x")
+        self.assertEqual(
+            [k[-1] for k in resolver_module.RESOLVER_STATE.data],
+            ["http://example.com/1"])
+        self.assertEqual(
+            resolver.get_validators("http://example.com/0"), (None, None, None))
+
+    def test_validators_scoped_to_session(self):
+        resolver = URIResolver(Bag(region="us-east-1", profile=None), FakeCache())
+        resolver.remember("http://example.com/x", '"e"', None, "x")
+        self.assertEqual(
+            URIResolver(Bag(region="us-east-1", profile=None), FakeCache()).get_validators(
+                "http://example.com/x"), ('"e"', None, "x"))
+        self.assertEqual(
+            URIResolver(Bag(region="us-west-2", profile=None), FakeCache()).get_validators(
+                "http://example.com/x"), (None, None, None))
+
+    def test_resolve_s3_not_modified(self):
+        client = mock.MagicMock()
+        client.get_object.side_effect = [
+            {"Body": mock.MagicMock(read=lambda: b"abc"), "ETag": '"e1"'},
+            ClientError({"Error": {"Code": "304"}}, "GetObject")]
+
+        def factory():
+            return mock.MagicMock(client=lambda service: client)
+
+        uri = "s3://bucket/key.txt"
+        cache = FakeCache()
+        resolver = URIResolver(factory, cache)
+        self.assertEqual(resolver.resolve(uri), "abc")
+        cache.state.clear()
+        self.assertEqual(resolver.resolve(uri), "abc")
+        self.assertEqual(
+            client.get_object.call_args[1],
+            {"Bucket": "bucket", "Key": "key.txt", "IfNoneMatch": '"e1"'})
+
 
 class UrlValueTest(BaseTest):
 
     def setUp(self):
+        self.patch(resolver_module, "RESOLVER_STATE", ResolverState(32))
         self.old_dir = os.getcwd()
         os.chdir(tempfile.gettempdir())
 
     def tearDown(self):
         os.chdir(self.old_dir)
 
-    def get_values_from(self, data, content):
+    def get_values_from(self, data, content, cache=None):
         config = Config.empty(account_id=ACCOUNT_ID)
-        mgr = Bag({"session_factory": None, "_cache": None, "config": config})
+        mgr = Bag({"session_factory": None, "_cache": cache, "config": config})
         values = ValuesFrom(data, mgr)
         values.resolver = FakeResolver(content)
         return values
 
+    def test_values_cached(self):
+        cache = FakeCache()
+        data = {"url": "moon", "expr": "[].bean", "format": "json"}
+        values = self.get_values_from(data, json.dumps([{"bean": "magic"}]), cache)
+        self.assertEqual(values.get_values(), ["magic"])
+        values = self.get_values_from(data, "invalid json", cache)
+        self.assertEqual(values.get_values(), ["magic"])
+        self.assertEqual(
+            list(cache.state.keys()), [("value-from", "moon", "json", "[].bean")])
+
+    def test_values_revalidated_across_instances(self):
+        uri = "http://example.com/values.json"
+        response = mock.MagicMock()
+        response.info.return_value = {"ETag": '"abc"'}
+        response.read.return_value = b'[{"bean": "magic"}]'
+        requests = []
+
+        def fake_urlopen(request):
+            requests.append(request)
+            if len(requests) > 1:
+                raise HTTPError(uri, 304, "Not Modified", {}, None)
+            return response
+
+        self.patch(resolver_module, "urlopen", fake_urlopen)
+        config = Config.empty(account_id=ACCOUNT_ID)
+        mgr = Bag({"session_factory": None, "_cache": None, "config": config})
+        data = {"url": uri, "expr": "[].bean"}
+        values = ValuesFrom(data, mgr).get_values()
+        self.assertEqual(values, ["magic"])
+        self.assertIs(ValuesFrom(data, mgr).get_values(), values)
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[1].get_header("If-none-match"), '"abc"')
+
     def test_json_expr(self):
         values = self.get_values_from(
             {"url": "moon", "expr": "[].bean", "format": "json"},
@@ -113,6 +113,81 @@ def generateBucketContents(s3, bucket, contents=None):
         key.put(Body=v, ContentLength=len(v), ContentType="text/plain")
 
 
+class BucketAugmentKeysTest(BaseTest):
+
+    def get_augment_keys(self, data):
+        p = self.load_policy(dict(name='s3-augments', resource='s3', **data))
+        return p.resource_manager.get_augment_keys()
+
+    def test_inventory_fetches_all(self):
+        self.assertEqual(self.get_augment_keys({}), None)
+        self.assertEqual(
+            self.get_augment_keys({'filters': [{'c7n:DeniedMethods': 'present'}]}),
+            None)
+
+    def test_filter_and_action_keys(self):
+        self.assertEqual(
+            self.get_augment_keys({
+                'filters': [
+                    {'Versioning.Status': 'Enabled'},
+                    {'tag:Owner': 'absent'},
+                    {'or': [
+                        {'type': 'value', 'key': 'length(Acl.Grants)', 'value': 2},
+                        {'type': 'missing-statement', 'statement_ids': ['abc']}]}],
+                'actions': ['delete-global-grants']}),
+            {'Location', 'Versioning', 'Tags', 'Acl', 'Policy', 'Website'})
+        self.assertEqual(
+            self.get_augment_keys({
+                'filters': [{'Name': 'bucket'}, 'is-log-target'],
+                'actions': ['delete-bucket-notification']}),
+            {'Location', 'Logging', 'Notification'})
+
+    def test_undeclared_elements_fetch_all(self):
+        # notify forwards whole buckets, ie. the mailer reads their tags
+        self.assertEqual(
+            self.get_augment_keys({
+                'filters': ['global-grants'],
+                'actions': [{'type': 'notify', 'to': ['resource-owner'],
+                             'transport': {'type': 'sqs', 'queue': 'xyz'}}]}),
+            None)
+        self.assertEqual(
+            self.get_augment_keys({
+                'filters': [{'not': [{'type': 'finding'}]}]}),
+            None)
+        self.assertEqual(
+            self.get_augment_keys({
+                'mode': {'type': 'cloudtrail', 'events': ['CreateBucket']},
+                'filters': ['is-log-target'],
+                'actions': [{'type': 'auto-tag-user', 'tag': 'Owner',
+                             'update': False}]}),
+            None)
+
+    def test_cache_key(self):
+        p = self.load_policy({
+            'name': 's3-augments', 'resource': 's3', 'filters': ['is-log-target']})
+        self.assertEqual(
+            p.resource_manager.get_cache_key(None)['augments'],
+            ['Location', 'Logging'])
+
+    def test_assemble_selected(self):
+        self.patch(s3.S3, "executor_factory", MainThreadExecutor)
+        self.patch(s3, "S3_AUGMENT_TABLE", [
+            ("get_bucket_tagging", "Tags", [], "TagSet"),
+            ("get_bucket_policy", "Policy", None, "Policy"),
+            ("get_bucket_versioning", "Versioning", None, None)])
+        factory = self.replay_flight_data("test_s3_augment_selected")
+        p = self.load_policy(
+            {'name': 's3-augments', 'resource': 's3',
+             'filters': [{'Name': 'custodian-augment'},
+                         {'Versioning.Status': 'Enabled'}]},
+            session_factory=factory)
+        resources = p.run()
+        self.assertEqual(len(resources), 1)
+        self.assertEqual(
+            set(resources[0]),
+            {'Name', 'CreationDate', 'Versioning', 'c7n:MatchedFilters'})
+
+
 class BucketMetrics(BaseTest):
 
     def test_metrics_dims(self):
@@ -880,7 +955,7 @@ class S3ConfigSource(ConfigTest):
         )
 
         p = self.load_policy(
-            {"name": "s3-inv", "resource": "s3", "filters": [{"Name": bname}]},
+            {"name": "s3-inv", "resource": "s3"},
             session_factory=session_factory,
         )
 
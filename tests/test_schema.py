@@ -22,7 +22,8 @@ from c7n.filters import ValueFilter
 from c7n.manager import resources
 from c7n.schema import (
     ElementSchema, resource_vocabulary, Validator, validate,
-    generate, specific_error, policy_error_scope)
+    generate, get_validator, specific_error, policy_error_scope)
+from c7n.utils import type_schema
 from .common import BaseTest
 
 
@@ -61,6 +62,41 @@ class SchemaTest(BaseTest):
         except Exception:
             self.fail("Failed to serialize schema")
 
+    def test_validator_reuse(self):
+        validator = get_validator()
+        self.assertIs(get_validator(), validator)
+
+        schema = generate()
+        self.assertIs(get_validator(schema).schema, schema)
+        self.assertIs(get_validator(schema), get_validator(schema))
+
+        # registering filters changes the generated schema
+        class Widget(ValueFilter):
+            schema = type_schema('widget', rinherit=ValueFilter.schema)
+
+        resources['ec2'].filter_registry.register('widget', Widget)
+        self.addCleanup(resources['ec2'].filter_registry.unregister, 'widget')
+        validator = get_validator()
+        self.assertIsNot(get_validator(schema), validator)
+        self.assertEqual(validate({'policies': [
+            {'name': 'widgets', 'resource': 'ec2',
+             'filters': [{'type': 'widget', 'key': 'Size', 'value': 2}]}]}), [])
+
+    def test_validator_resource_schema(self):
+        validator = get_validator()
+        self.assertTrue(validator.is_valid({'policies': [
+            {'name': 'instances', 'resource': 'ec2', 'actions': ['stop']},
+            {'name': 'buckets', 'resource': 'aws.s3',
+             'filters': [{'type': 'global-grants'}]}]}))
+        for data in (
+                {'policies': [{'name': 'x', 'resource': 'ec2', 'actions': ['stopx']}]},
+                {'policies': [{'name': 'x', 'resource': 'xyz'}]},
+                {'policies': [{'name': 'x', 'resource': ['ec2']}]},
+                {'policies': ['x']},
+                {'policies': [], 'xyz': 1}):
+            self.assertFalse(validator.is_valid(data))
+            self.assertTrue(validate(data))
+
     def test_empty_skeleton(self):
         self.assertEqual(validate({"policies": []}), [])
 
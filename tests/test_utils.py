@@ -78,6 +78,24 @@ class Backoff(BaseTest):
             self.assertTrue(i < maxv)
 
 
+class TokenBucketTest(BaseTest):
+
+    def test_acquire(self):
+        now = [100.0]
+        sleeps = []
+
+        def sleep(delay):
+            sleeps.append(delay)
+            now[0] += delay
+
+        bucket = utils.TokenBucket(2, 3, clock=lambda: now[0], sleep=sleep)
+        self.assertEqual([bucket.acquire() for i in range(3)], [0, 0, 0])
+        self.assertEqual(bucket.acquire(), 0.5)
+        now[0] += 1
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(sleeps, [0.5])
+
+
 class UrlConfTest(BaseTest):
 
     def test_parse_url(self):
@@ -152,6 +170,23 @@ class UtilTest(BaseTest):
 
         self.assertEqual(utils.local_session(p.session_factory), previous)
 
+    def test_dump_records(self):
+        records = [
+            {'Name': 'a\nb', 'Tags': [{'Key': 'x', 'Value': 'y'}], 'Empty': {}},
+            {'LaunchTime': parse_date('2018-02-02 12:00'), 'Ids': []}]
+        for data in ([], records[:1], records):
+            fh = six.BytesIO()
+            utils.dump_records(data, fh)
+            self.assertEqual(
+                fh.getvalue().decode('utf8'), utils.dumps(data, indent=2))
+
+        fh = six.BytesIO()
+        utils.dump_records(records, fh, indent=None)
+        self.assertNotIn(b' ', fh.getvalue())
+        self.assertEqual(
+            json.loads(fh.getvalue().decode('utf8')),
+            json.loads(utils.dumps(records)))
+
     def test_format_date(self):
         d = parse_date("2018-02-02 12:00")
         self.assertEqual("{}".format(utils.FormatDate(d)), "2018-02-02 12:00:00")
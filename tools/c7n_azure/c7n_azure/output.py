@@ -51,6 +51,7 @@ class AzureStorageOutput(DirectoryOutput):
     """
 
     DEFAULT_BLOB_FOLDER_PREFIX = '{policy_name}/{now:%Y/%m/%d/%H/}'
+    compress_records = True
 
     log = logging.getLogger('custodian.azure.output.AzureStorageOutput')
 
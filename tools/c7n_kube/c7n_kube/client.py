@@ -12,11 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import logging
 import os
+import threading
+import time
 
 from kubernetes import config, client
 from kubernetes.client import Configuration, ApiClient
+from kubernetes.client.rest import ApiException
+from kubernetes.watch.watch import iter_resp_lines
 
 log = logging.getLogger('custodian.k8s.client')
 
@@ -34,3 +39,150 @@ class Session(object):
         log.debug('connecting to %s' % (api_client.configuration.host))
         # e.g. client.CoreV1Api()
         return getattr(client, '%s%sApi' % (group, version))(api_client)
+
+
+class Informer(object):
+    """Keep a local store of a resource list current by watching it.
+
+    An initial list populates the store, then a watch from the list's
+    resourceVersion applies added, modified, and deleted events to it.
+    Watches are restarted from the last seen resourceVersion when the
+    server ends them, and the store is relisted once that version has
+    expired (410 Gone). Watch reads time out client side shortly after
+    the server should have ended them, so a half open connection can't
+    block the informer, and a store not synced (listed, or watched
+    without error) within stale_after seconds is reported stale.
+
+    list_func is a client list method, ie. CoreV1Api.list_namespace,
+    items are stored as raw json dictionaries as passed through decode.
+    """
+
+    page_size = 500
+    watch_timeout = 300
+    # client side read timeout, past the server's watch timeout
+    request_timeout = 330
+    retry_delay = 5
+    stale_after = 660
+
+    def __init__(self, list_func, params=None, decode=None, paged=True):
+        self.list_func = list_func
+        self.params = params or {}
+        self.decode = decode or (lambda r: r)
+        self.paged = paged
+        self.resource_version = None
+        self.last_sync = None
+        # incremented per list, watches started before a list are abandoned
+        self.generation = 0
+        self.store = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self.run, name='c7n-kube-informer')
+            self.thread.daemon = True
+            self.thread.start()
+        return self
+
+    def stop(self):
+        # takes effect once the current watch call yields or times out
+        self.stopped.set()
+
+    def list(self):
+        with self.lock:
+            return list(self.store.values())
+
+    def is_stale(self):
+        return (self.last_sync is None or
+                time.time() - self.last_sync > self.stale_after)
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                if self.resource_version is None:
+                    self.relist()
+                self.watch()
+            except ApiException as e:
+                if e.status == 410:
+                    with self.lock:
+                        self.resource_version = None
+                    continue
+                log.warning("informer watch failed, retrying: %s", e)
+                self.stopped.wait(self.retry_delay)
+            except Exception as e:
+                log.warning("informer watch failed, retrying: %s", e)
+                self.stopped.wait(self.retry_delay)
+
+    def relist(self):
+        items = {}
+        params = dict(self.params, _preload_content=False)
+        if self.paged:
+            params['limit'] = self.page_size
+        while True:
+            res = json.loads(self.list_func(**params).data.decode('utf8'))
+            kind = res.get('kind', '')
+            for item in res.get('items') or ():
+                # list items omit their type, which watch events include
+                item.setdefault('apiVersion', res.get('apiVersion'))
+                if kind.endswith('List'):
+                    item.setdefault('kind', kind[:-4])
+                items[self.get_key(item)] = self.decode(item)
+            metadata = res.get('metadata') or {}
+            if not metadata.get('continue'):
+                break
+            params['_continue'] = metadata['continue']
+        with self.lock:
+            self.store = items
+            self.resource_version = metadata.get('resourceVersion')
+            self.last_sync = time.time()
+            self.generation += 1
+        log.debug("informer listed %d resources at version %s",
+                  len(items), self.resource_version)
+
+    def watch(self):
+        generation = self.generation
+        response = self.list_func(**dict(
+            self.params, watch=True, _preload_content=False,
+            resource_version=self.resource_version,
+            timeout_seconds=self.watch_timeout,
+            _request_timeout=self.request_timeout))
+        try:
+            for line in iter_resp_lines(response):
+                if generation != self.generation:
+                    return
+                self.handle(json.loads(line))
+                if self.stopped.is_set() or self.resource_version is None:
+                    return
+        finally:
+            response.close()
+            response.release_conn()
+        # the server ended the watch, we're current as of its last event
+        with self.lock:
+            if generation == self.generation:
+                self.last_sync = time.time()
+
+    def handle(self, event):
+        obj = event['object']
+        if event['type'] == 'ERROR':
+            if obj.get('code') == 410:
+                log.debug("informer version %s expired, relisting",
+                          self.resource_version)
+                with self.lock:
+                    self.resource_version = None
+                return
+            raise ApiException(status=obj.get('code'), reason=obj.get('message'))
+        key = self.get_key(obj)
+        with self.lock:
+            if event['type'] == 'DELETED':
+                self.store.pop(key, None)
+            else:
+                self.store[key] = self.decode(obj)
+            self.resource_version = obj['metadata'].get('resourceVersion')
+            self.last_sync = time.time()
+
+    @staticmethod
+    def get_key(obj):
+        metadata = obj.get('metadata') or {}
+        return (metadata.get('namespace'), metadata.get('name'))
@@ -12,7 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import logging
+import re
+import threading
+
+from dateutil.parser import parse as parse_date
+from kubernetes.client import models
+from kubernetes.client.api_client import ApiClient
 import six
 
 from c7n.actions import ActionRegistry
@@ -22,10 +29,16 @@ from c7n.manager import ResourceManager
 from c7n.query import sources
 from c7n.utils import local_session
 
+from c7n_kube.client import Informer
+
 log = logging.getLogger('custodian.k8s.query')
 
 
 class ResourceQuery(object):
+
+    # items per list call, large lists are paged through with continue tokens
+    page_size = 500
+
     def __init__(self, session_factory):
         self.session_factory = session_factory
 
@@ -37,15 +50,88 @@ class ResourceQuery(object):
         enum_op, path, extra_args = m.enum_spec
         if extra_args:
             params.update(extra_args)
-        return self._invoke_client_enum(client, enum_op, params, path)
-
-    def _invoke_client_enum(self, client, enum_op, params, path):
-        res = getattr(client, enum_op)(**params)
-        if not isinstance(res, dict):
-            res = res.to_dict()
-        if path and path in res:
-            res = res.get(path)
-        return res
+        return list(self._invoke_client_enum(
+            client, enum_op, params, path, typed=m.group != 'CustomObjects'))
+
+    def _invoke_client_enum(self, client, enum_op, params, path, typed=True):
+        """Page through a list call, yielding resources as dictionaries.
+
+        Responses of typed apis are decoded from json directly into the
+        form of the client models' to_dict, without building model
+        objects. The custom objects api returns json as is, and its list
+        calls don't support paging.
+        """
+        params = dict(params, _preload_content=False)
+        if typed:
+            params['limit'] = self.page_size
+        while True:
+            res = json.loads(
+                getattr(client, enum_op)(**params).data.decode('utf8'))
+            token = (res.get('metadata') or {}).get('continue')
+            if typed:
+                res = decode_object(res)
+            if path and path in res:
+                res = res.get(path) or []
+            else:
+                res = [res]
+            for r in res:
+                yield r
+            if not token:
+                return
+            params['_continue'] = token
+
+
+# model name -> [(attribute, json key, type)]
+MODEL_ATTRIBUTES = {}
+
+
+def decode_object(data):
+    """Decode a raw api object or list into the form of its model's to_dict."""
+    group, _, version = data.get('apiVersion', '').rpartition('/')
+    model = '%s%s' % (version.capitalize(), data.get('kind', ''))
+    if not hasattr(models, model):
+        return data
+    return decode(data, model)
+
+
+def decode(value, klass):
+    """Decode a json value of the given client model type.
+
+    Mirrors the client's deserialization followed by to_dict, where
+    model attributes are keyed by their python names and unset
+    attributes are None.
+    """
+    if value is None:
+        return None
+    if klass.startswith('list['):
+        klass = klass[5:-1]
+        return [decode(v, klass) for v in value]
+    if klass.startswith('dict('):
+        klass = re.match(r'dict\(([^,]*), (.*)\)', klass).group(2)
+        return {k: decode(v, klass) for k, v in value.items()}
+    if klass in ApiClient.NATIVE_TYPES_MAPPING:
+        klass = ApiClient.NATIVE_TYPES_MAPPING[klass]
+        if klass in ApiClient.PRIMITIVE_TYPES:
+            try:
+                return klass(value)
+            except UnicodeEncodeError:
+                return six.text_type(value)
+            except TypeError:
+                return value
+        elif klass.__name__ == 'datetime':
+            return parse_date(value)
+        elif klass.__name__ == 'date':
+            return parse_date(value).date()
+        return value
+    attributes = MODEL_ATTRIBUTES.get(klass)
+    if attributes is None:
+        model = getattr(models, klass)
+        types = getattr(model, 'openapi_types', None) or model.swagger_types
+        attributes = MODEL_ATTRIBUTES[klass] = [
+            (k, model.attribute_map[k], t) for k, t in types.items()]
+    if not attributes or not isinstance(value, dict):
+        return value
+    return {k: decode(value.get(json_key), t) for k, json_key, t in attributes}
 
 
 @sources.register('describe-kube')
@@ -66,6 +152,47 @@ class DescribeSource(object):
         return resources
 
 
+@sources.register('informer')
+class InformerSource(DescribeSource):
+    """Serve resources from a local store kept current by a watch.
+
+    Meant for long running processes evaluating policies repeatedly, the
+    first evaluation lists the resources and starts an informer, later
+    evaluations filter its store instead of listing again.
+    """
+
+    # (kube config, group, version, list op, params) -> informer
+    informers = {}
+    lock = threading.Lock()
+
+    def get_resources(self, query):
+        # copies, as filters and actions annotate resources
+        return [dict(r) for r in self.get_informer(query or {}).list()]
+
+    def get_informer(self, query):
+        m = self.manager.resource_type
+        session = local_session(self.manager.session_factory)
+        enum_op, path, extra_args = m.enum_spec
+        params = dict(extra_args or {}, **query)
+        key = (session.config_file, m.group, m.version, enum_op,
+               json.dumps(params, sort_keys=True))
+        with self.lock:
+            informer = self.informers.get(key)
+            if informer is None:
+                typed = m.group != 'CustomObjects'
+                informer = Informer(
+                    getattr(session.client(m.group, m.version), enum_op), params,
+                    decode=typed and decode_object or None, paged=typed)
+                # list in the caller, so errors surface as they do for describe
+                informer.relist()
+                self.informers[key] = informer.start()
+            elif informer.is_stale():
+                log.warning("informer %s not synced since %s, relisting",
+                            enum_op, informer.last_sync)
+                informer.relist()
+        return informer
+
+
 class QueryMeta(type):
     """metaclass to have consistent action/filter registry for new resources."""
     def __new__(cls, name, parents, attrs):
@@ -81,6 +208,10 @@ class QueryMeta(type):
 
 @six.add_metaclass(QueryMeta)
 class QueryResourceManager(ResourceManager):
+
+    # selectors evaluated by the api server when listing
+    query_keys = ('field_selector', 'label_selector')
+
     def __init__(self, data, options):
         super(QueryResourceManager, self).__init__(data, options)
         self.source = self.get_source(self.source_type)
@@ -107,9 +238,21 @@ class QueryResourceManager(ResourceManager):
     def source_type(self):
         return self.data.get('source', 'describe-kube')
 
+    def validate(self):
+        for q in self.data.get('query', ()):
+            if not isinstance(q, dict) or set(q).difference(self.query_keys):
+                raise PolicyValidationError(
+                    "Query on %s supports only %s, found %s" % (
+                        self.data.get('resource'),
+                        ", ".join(sorted(self.query_keys)), q))
+        return self
+
     def get_resource_query(self):
-        if 'query' in self.data:
-            return {'filter': self.data.get('query')}
+        query = {}
+        for q in self.data.get('query', ()):
+            for k, v in q.items():
+                query.setdefault(k, []).append(v)
+        return {k: ','.join(v) for k, v in query.items()} or None
 
     def resources(self, query=None):
         q = query or self.get_resource_query()
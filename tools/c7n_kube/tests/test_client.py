@@ -0,0 +1,128 @@
+# Copyright 2019 Capital One Services, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+
+from kubernetes.client.rest import ApiException
+from mock import MagicMock
+
+from c7n.config import Bag
+
+from common_kube import KubeTest
+from c7n_kube.client import Informer
+
+
+def namespace(name, version):
+    return {'metadata': {'name': name, 'resourceVersion': version}}
+
+
+def list_response(items, version, token=None):
+    return Bag(data=json.dumps({
+        'apiVersion': 'v1', 'kind': 'NamespaceList',
+        'metadata': {'continue': token, 'resourceVersion': version},
+        'items': items}).encode('utf8'))
+
+
+def watch_response(*events):
+    response = MagicMock()
+    response.read_chunked.return_value = [
+        ''.join(json.dumps({'type': t, 'object': o}) + '\n' for t, o in events
+                ).encode('utf8')]
+    return response
+
+
+class InformerTest(KubeTest):
+
+    def test_relist_and_watch(self):
+        list_func = MagicMock(side_effect=[
+            list_response([namespace('a', '1')], '2', 'token-1'),
+            list_response([namespace('b', '2')], '3'),
+            watch_response(
+                ('ADDED', namespace('c', '4')),
+                ('MODIFIED', dict(namespace('a', '5'), spec={'finalizers': []})),
+                ('DELETED', namespace('b', '6')))])
+        informer = Informer(list_func, {'label_selector': 'app=web'})
+        informer.relist()
+        self.assertEqual(informer.resource_version, '3')
+        self.assertEqual(
+            sorted(r['metadata']['name'] for r in informer.list()), ['a', 'b'])
+        # list items are typed from the list response like watch events
+        self.assertEqual(informer.store[(None, 'a')]['kind'], 'Namespace')
+
+        informer.watch()
+        self.assertEqual(informer.resource_version, '6')
+        self.assertEqual(
+            sorted(r['metadata']['name'] for r in informer.list()), ['a', 'c'])
+        self.assertEqual(informer.store[(None, 'a')]['spec'], {'finalizers': []})
+
+        calls = [c[1] for c in list_func.call_args_list]
+        self.assertEqual(calls[0]['limit'], informer.page_size)
+        self.assertEqual(calls[1]['_continue'], 'token-1')
+        self.assertTrue(calls[2]['watch'])
+        self.assertEqual(calls[2]['resource_version'], '3')
+        self.assertEqual(calls[2]['label_selector'], 'app=web')
+        self.assertTrue(calls[2]['_request_timeout'] > calls[2]['timeout_seconds'])
+
+    def test_stale(self):
+        responses = [
+            list_response([namespace('a', '1')], '1'),
+            watch_response(('ADDED', namespace('b', '2'))),
+            watch_response(('ADDED', namespace('c', '3')))]
+
+        def list_func(**params):
+            if len(responses) == 1:
+                # a relist while the watch is connecting
+                informer.generation += 1
+            return responses.pop(0)
+
+        informer = Informer(list_func)
+        self.assertTrue(informer.is_stale())
+        informer.relist()
+        self.assertFalse(informer.is_stale())
+
+        informer.last_sync = 0
+        self.assertTrue(informer.is_stale())
+        informer.watch()
+        self.assertFalse(informer.is_stale())
+
+        # the watch started before the relist is abandoned
+        informer.last_sync = 0
+        informer.watch()
+        self.assertTrue(informer.is_stale())
+        self.assertEqual(
+            sorted(r['metadata']['name'] for r in informer.list()), ['a', 'b'])
+
+    def test_relist_on_gone(self):
+        responses = [
+            list_response([namespace('a', '1')], '1'),
+            watch_response(('ERROR', {'kind': 'Status', 'code': 410})),
+            ApiException(status=410, reason='Gone'),
+            list_response([namespace('b', '8')], '8'),
+            watch_response()]
+
+        def list_func(**params):
+            response = responses.pop(0)
+            if not responses:
+                informer.stop()
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        informer = Informer(MagicMock(side_effect=list_func))
+        informer.run()
+        self.assertEqual(informer.resource_version, '8')
+        self.assertEqual([r['metadata']['name'] for r in informer.list()], ['b'])
+        self.assertEqual(
+            [c[1].get('watch', False) for c in informer.list_func.call_args_list],
+            [False, True, False, False, True])
@@ -0,0 +1,130 @@
+# Copyright 2019 Capital One Services, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from functools import partial
+import json
+
+from kubernetes.client.api_client import ApiClient
+from mock import MagicMock
+
+from c7n.config import Bag
+from c7n.exceptions import PolicyValidationError
+
+from common_kube import KubeTest
+from c7n_kube.client import Informer, Session
+from c7n_kube.query import InformerSource, ResourceQuery, decode_object
+
+POD = {
+    'metadata': {
+        'name': 'web-1', 'namespace': 'default',
+        'creationTimestamp': '2019-05-01T12:00:00Z',
+        'labels': {'app': 'web', 'tier.example.com/name': 'front'},
+        'ownerReferences': [{
+            'apiVersion': 'apps/v1', 'kind': 'ReplicaSet', 'name': 'web',
+            'uid': 'abc', 'controller': True}]},
+    'spec': {
+        'nodeName': 'node-1',
+        'containers': [{
+            'name': 'web', 'image': 'nginx',
+            'ports': [{'containerPort': 80, 'protocol': 'TCP'}],
+            'livenessProbe': {'httpGet': {'path': '/', 'port': 'http'}},
+            'resources': {'limits': {'cpu': '500m', 'memory': '128Mi'}}}]},
+    'status': {'phase': 'Running', 'podIP': '10.0.0.1', 'hostIP': '10.1.0.1'}}
+
+
+def list_response(items, token=None):
+    return Bag(data=json.dumps({
+        'apiVersion': 'v1', 'kind': 'PodList',
+        'metadata': {'continue': token, 'resourceVersion': '1'},
+        'items': items}).encode('utf8'))
+
+
+class QueryTest(KubeTest):
+
+    def test_decode_matches_models(self):
+        response = list_response([POD])
+        self.assertEqual(
+            decode_object(json.loads(response.data.decode('utf8'))),
+            ApiClient().deserialize(response, 'V1PodList').to_dict())
+
+    def test_decode_unknown_kind(self):
+        data = {'apiVersion': 'stable.example.com/v1', 'kind': 'CronTabList',
+                'items': [{'spec': {'cronSpec': '* * * * */5'}}]}
+        self.assertEqual(decode_object(data), data)
+
+    def test_paginated_list(self):
+        client = MagicMock()
+        client.list_pod_for_all_namespaces.side_effect = [
+            list_response([dict(POD, metadata={'name': 'a'})], 'token-1'),
+            list_response([dict(POD, metadata={'name': 'b'})], 'token-2'),
+            list_response([dict(POD, metadata={'name': 'c'})])]
+        query = ResourceQuery(None)
+        resources = list(query._invoke_client_enum(
+            client, 'list_pod_for_all_namespaces',
+            {'field_selector': 'status.phase=Running'}, 'items'))
+        self.assertEqual(
+            [r['metadata']['name'] for r in resources], ['a', 'b', 'c'])
+        self.assertEqual(resources[0]['status']['pod_ip'], '10.0.0.1')
+        calls = [c[1] for c in client.list_pod_for_all_namespaces.call_args_list]
+        self.assertEqual([c.get('_continue') for c in calls], [None, 'token-1', 'token-2'])
+        for c in calls:
+            self.assertEqual(c['limit'], query.page_size)
+            self.assertEqual(c['field_selector'], 'status.phase=Running')
+            self.assertFalse(c['_preload_content'])
+
+    def test_query_selectors(self):
+        p = self.load_policy({
+            'name': 'running-web',
+            'resource': 'k8s.pod',
+            'query': [
+                {'field_selector': 'status.phase=Running'},
+                {'field_selector': 'spec.nodeName=node-1',
+                 'label_selector': 'app=web'}]})
+        self.assertEqual(
+            p.resource_manager.get_resource_query(),
+            {'field_selector': 'status.phase=Running,spec.nodeName=node-1',
+             'label_selector': 'app=web'})
+
+        self.assertRaises(
+            PolicyValidationError,
+            self.load_policy,
+            {'name': 'bad-query', 'resource': 'k8s.pod',
+             'query': [{'filter': 'status.phase=Running'}]})
+
+    def test_informer_source(self):
+        self.addCleanup(InformerSource.informers.clear)
+        self.patch(Informer, 'start', lambda self: self)
+        client = MagicMock()
+        client.list_pod_for_all_namespaces.return_value = list_response([POD])
+        self.patch(Session, 'client', lambda self, group, version: client)
+
+        p = self.load_policy({
+            'name': 'running-web',
+            'resource': 'k8s.pod',
+            'source': 'informer',
+            'filters': [{'status.phase': 'Running'}]},
+            session_factory=partial(Session, config_file=self.KubeConfigPath))
+        for i in range(2):
+            resources = p.run()
+            self.assertEqual(len(resources), 1)
+            self.assertEqual(resources[0]['status']['pod_ip'], '10.0.0.1')
+        self.assertEqual(client.list_pod_for_all_namespaces.call_count, 1)
+        informer = list(InformerSource.informers.values())[0]
+        self.assertNotIn('c7n:MatchedFilters', informer.list()[0])
+
+        # relisted when the watch hasn't synced the store
+        informer.last_sync = 0
+        self.assertEqual(len(p.run()), 1)
+        self.assertEqual(client.list_pod_for_all_namespaces.call_count, 2)
+        self.assertFalse(informer.is_stale())
@@ -142,26 +142,25 @@ def records_iter(fh, buffer_size=1024 * 1024 * 16):
     record boundaries. We have to use knowledge of content to split
     the records on boundaries. In the context of flow logs we're
     dealing with delimited records.
+
+    Records are found by scanning forward from an offset into the
+    buffer, processed data is only discarded once per chunk.
     """
-    buf = None
+    buf = bytearray()
     while True:
         chunk = fh.read(buffer_size)
+        buf += chunk
+        start = 0
+        idx = buf.find(b'}{')
+        while idx != -1:
+            yield json.loads(buf[start:idx + 1].decode('utf8'))
+            start = idx + 1
+            idx = buf.find(b'}{', start)
         if not chunk:
-            if buf:
-                yield json.loads(buf)
+            if start < len(buf):
+                yield json.loads(buf[start:].decode('utf8'))
             return
-        if buf:
-            chunk = b"%s%s" % (buf, chunk)
-            buf = None
-        while chunk:
-            idx = chunk.find(b'}{')
-            if idx == -1:
-                buf = chunk
-                chunk = None
-                continue
-            record = chunk[:idx + 1]
-            yield json.loads(record)
-            chunk = chunk[idx + 1:]
+        del buf[:start]
 
 
 def sizeof_fmt(num, suffix='B'):
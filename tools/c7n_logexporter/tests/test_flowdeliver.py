@@ -0,0 +1,56 @@
+# Copyright 2019 Capital One Services, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import io
+import json
+from unittest import TestCase
+
+from c7n_logexporter.flowdeliver import records_iter
+
+
+def firehose_object(records):
+    # firehose concatenates records without a delimiter, multi byte
+    # characters may also be split across chunks
+    return io.BytesIO(b''.join(
+        json.dumps(r, ensure_ascii=False).encode('utf8') for r in records))
+
+
+class RecordsIterTest(TestCase):
+
+    records = [{
+        'messageType': 'DATA_MESSAGE',
+        'logGroup': 'flow-logs',
+        'logStream': 'eni-%d-all' % i,
+        'logEvents': [{
+            'id': str(i),
+            'timestamp': 1556712000000 + i,
+            'message': u'2 123456789012 eni-%d 10.0.0.1 10.0.0.2 \xe9 ACCEPT OK' % i}]}
+        for i in range(5)]
+
+    def test_records_split_across_chunks(self):
+        for buffer_size in (16, 100, 1024 * 1024):
+            self.assertEqual(
+                list(records_iter(firehose_object(self.records), buffer_size)),
+                self.records)
+
+    def test_single_byte_buffer(self):
+        self.assertEqual(
+            list(records_iter(firehose_object(self.records), 1)), self.records)
+
+    def test_single_record(self):
+        self.assertEqual(
+            list(records_iter(firehose_object(self.records[:1]), 1)),
+            self.records[:1])
+
+    def test_empty(self):
+        self.assertEqual(list(records_iter(io.BytesIO(b''))), [])
@@ -111,6 +111,13 @@ CONFIG_SCHEMA = {
         'ldap_email_key': {'type': 'string'},
         'ldap_uid_tags': {'type': 'array', 'items': {'type': 'string'}},
         'debug': {'type': 'boolean'},
+        'delivery_concurrency': {
+            'type': 'object',
+            'additionalProperties': False,
+            'properties': {
+                k: {'type': 'integer', 'minimum': 1}
+                for k in ('email', 'sns', 'slack', 'datadog', 'splunkhec')}
+        },
         'ldap_uid_regex': {'type': 'string'},
         'ldap_uri': {'type': 'string'},
         'ldap_bind_dn': {'type': 'string'},
@@ -182,7 +189,7 @@ def get_c7n_mailer_parser():
     parser.add_argument('-c', '--config', required=True, help='mailer.yml config file')
     debug_help_msg = 'sets c7n_mailer logger to debug, for maximum output (the default is INFO)'
     parser.add_argument('--debug', action='store_true', help=debug_help_msg)
-    max_num_processes_help_msg = 'will run the mailer in parallel, integer of max processes allowed'
+    max_num_processes_help_msg = 'runs the mailer in parallel, integer of max concurrent messages'
     parser.add_argument('--max-num-processes', type=int, help=max_num_processes_help_msg)
     templates_folder_help_msg = 'message templates folder location'
     parser.add_argument('-t', '--templates', help=templates_folder_help_msg)
@@ -31,6 +31,7 @@ class EmailDelivery(object):
         self.session = session
         self.aws_ses = session.client('ses', region_name=config.get('ses_region'))
         self.ldap_lookup = self.get_ldap_connection()
+        self.smtp_delivery = None
 
     def get_ldap_connection(self):
         if self.config.get('ldap_uri'):
@@ -204,14 +205,19 @@ class EmailDelivery(object):
         # eg: { ('milton@initech.com', 'peter@initech.com'): mimetext_message }
         return to_addrs_to_mimetext_map
 
+    def get_smtp_delivery(self):
+        """Smtp connections are reused across sends."""
+        if self.smtp_delivery is None:
+            self.smtp_delivery = SmtpDelivery(
+                config=self.config, session=self.session, logger=self.logger)
+        return self.smtp_delivery
+
     def send_c7n_email(self, sqs_message, email_to_addrs, mimetext_msg):
         try:
             # if smtp_server is set in mailer.yml, send through smtp
             if 'smtp_server' in self.config:
-                smtp_delivery = SmtpDelivery(config=self.config,
-                                             session=self.session,
-                                             logger=self.logger)
-                smtp_delivery.send_message(message=mimetext_msg, to_addrs=email_to_addrs)
+                self.get_smtp_delivery().send_message(
+                    message=mimetext_msg, to_addrs=email_to_addrs)
             # if smtp_server isn't set in mailer.yml, use aws ses normally.
             else:
                 self.aws_ses.send_raw_email(RawMessage={'Data': mimetext_msg.as_string()})
@@ -27,6 +27,8 @@ class SlackDelivery(object):
         self.config = config
         self.logger = logger
         self.email_handler = email_handler
+        # keep alive connections to slack across requests
+        self.http = requests.Session()
 
     def cache_factory(self, config, type):
         if type == 'redis':
@@ -137,7 +139,7 @@ class SlackDelivery(object):
                 list[address] = self.caching.get(address)
                 continue
 
-            response = requests.post(
+            response = self.http.post(
                 url='https://slack.com/api/users.lookupByEmail',
                 data={'email': address},
                 headers={'Content-Type': 'application/x-www-form-urlencoded',
@@ -176,12 +178,12 @@ class SlackDelivery(object):
     def send_slack_msg(self, key, message_payload):
 
         if key.startswith('https://hooks.slack.com/'):
-            response = requests.post(
+            response = self.http.post(
                 url=key,
                 data=message_payload,
                 headers={'Content-Type': 'application/json'})
         else:
-            response = requests.post(
+            response = self.http.post(
                 url='https://slack.com/api/chat.postMessage',
                 data=message_payload,
                 headers={'Content-Type': 'application/json;charset=utf-8',
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import json
+import zlib
 from time import sleep
 from six.moves.urllib.parse import urlparse
 from random import uniform
@@ -23,11 +24,26 @@ from copy import deepcopy
 from .utils import get_aws_username_from_event
 
 
+class SplunkHecInvalidEvent(RuntimeError):
+    """
+    Splunk HEC rejected an event of a batch as invalid.
+    """
+
+    def __init__(self, index, response):
+        super(SplunkHecInvalidEvent, self).__init__(
+            'POST rejected event %d: %s' % (index, response))
+        self.index = index
+
+
 class SplunkHecDelivery(object):
     """
     Delivery class to send c7n message from SQS to Splunk HTTP Event Collector
     """
 
+    # max uncompressed length of a batch of events, unless
+    # splunk_hec_max_length is configured
+    max_batch_length = 512 * 1024
+
     def __init__(self, config, session, logger):
         """
         Initialize SplunkHecDelivery HEC sender.
@@ -40,6 +56,7 @@ class SplunkHecDelivery(object):
         self.config = config
         self.logger = logger
         self.session = session
+        self.http = requests.Session()
 
     def get_splunk_payloads(self, msg, msg_timestamp):
         """
@@ -141,15 +158,29 @@ class SplunkHecDelivery(object):
 
     def deliver_splunk_messages(self, payloads):
         """
-        Deliver log messages to Splunk,
+        Deliver log messages to Splunk, in size bounded batches of newline
+        delimited events.
 
         :param payloads: list of payload dicts to send to Splunk
         :type payloads: list
         """
+        maxlen = self.config.get('splunk_hec_max_length', None)
         failed = 0
+        events = []
         for payload in payloads:
-            if not self._try_send(payload):
+            p = json.dumps(payload)
+            if maxlen is not None and len(p) > maxlen:
+                # This is in place for Splunk installations that are configured
+                # with a short maximum message length (i.e. 10,000 characters).
+                self.logger.error(
+                    'ERROR: Sending %d characters to Splunk HEC; line length '
+                    'limit is %d characters. Data will be truncated: %s',
+                    len(p), maxlen, p
+                )
                 failed += 1
+            events.append(p)
+        for batch in self._get_batches(events, maxlen or self.max_batch_length):
+            failed += self._try_send(batch)
         if failed != 0:
             raise RuntimeError(
                 'ERROR: {failed} of {count} Splunk HEC messages '
@@ -158,66 +189,96 @@ class SplunkHecDelivery(object):
                 )
             )
 
-    def _try_send(self, payload):
+    @staticmethod
+    def _get_batches(events, maxlen):
         """
-        Retry sending payload to splunk via ``_send_splunk`` up to
+        Group JSON-encoded events into batches whose newline delimited
+        length is at most ``maxlen``. An event longer than ``maxlen`` is
+        sent in a batch of its own.
+
+        :param events: list of JSON-encoded event strings
+        :type events: list
+        :param maxlen: maximum length of a batch
+        :type maxlen: int
+        :return: generator of lists of JSON-encoded event strings
+        """
+        batch, size = [], 0
+        for e in events:
+            if batch and size + len(e) + 1 > maxlen:
+                yield batch
+                batch, size = [], 0
+            batch.append(e)
+            size += len(e) + 1
+        if batch:
+            yield batch
+
+    def _try_send(self, batch):
+        """
+        Retry sending a batch of events to splunk via ``_send_splunk`` up to
         ``config["splunk_max_attempts"]`` times, sleeping a random amount
         of time between 1 and 4 seconds between each try.
 
-        :param payload: the payload dict to send to Splunk as event data.
-        :type payload: dict
-        :return: True if sent successfully, False otherwise
-        :rtype: bool
+        Splunk indexes the events of a batch that precede an invalid one,
+        so an invalid event is counted as failed and the events after it
+        are sent on without using up an attempt.
+
+        :param batch: list of JSON-encoded event strings
+        :type batch: list
+        :return: number of events that failed to send
+        :rtype: int
         """
         max_attempts = self.config.get('splunk_max_attempts', 4)
-        maxlen = self.config.get('splunk_hec_max_length', None)
-        p = json.dumps(payload)
-        if maxlen is not None and len(p) > maxlen:
-            # This is in place for Splunk installations that are configured
-            # with a short maximum message length (i.e. 10,000 characters).
-            self.logger.error(
-                'ERROR: Sending %d characters to Splunk HEC; line length '
-                'limit is %d characters. Data will be truncated: %s',
-                len(p), maxlen, p
-            )
-        for i in range(0, max_attempts):
+        failed = 0
+        attempts = 0
+        while batch:
             try:
-                self._send_splunk(p)
-                if maxlen is not None and len(p) > maxlen:
-                    # never retry if we're over configured max length
-                    return False
-                return True  # if no exception, just return
+                self._send_splunk(batch)
+                return failed
+            except SplunkHecInvalidEvent as e:
+                failed += 1
+                batch = batch[e.index + 1:]
+                continue
             except Exception:
-                sleep_sec = uniform(1, 4)  # random float 1 to 4
-                self.logger.warning(
-                    'Caught exception sending to Splunk; '
-                    'retry in %s seconds', sleep_sec
-                )
-                sleep(sleep_sec)
-        self.logger.error(
-            'ERROR - Could not POST to Splunk after %d tries.', max_attempts
-        )
-        return False
+                attempts += 1
+                if attempts >= max_attempts:
+                    break
+            sleep_sec = uniform(1, 4)  # random float 1 to 4
+            self.logger.warning(
+                'Caught exception sending to Splunk; '
+                'retry in %s seconds', sleep_sec
+            )
+            sleep(sleep_sec)
+        if batch:
+            self.logger.error(
+                'ERROR - Could not POST %d events to Splunk after %d tries.',
+                len(batch), max_attempts
+            )
+        return failed + len(batch)
 
-    def _send_splunk(self, payload):
+    def _send_splunk(self, batch):
         """
-        Perform the actual data send to Splunk HEC for one log entry
+        Perform the actual data send to Splunk HEC for a batch of log
+        entries, as a gzip compressed body of newline delimited events.
 
-        :param payload: the JSON-encoded payload to send to Splunk as
-          event data
-        :type payload: str
+        :param batch: list of JSON-encoded event strings
+        :type batch: list
         """
         url = self.config['splunk_hec_url']
-        self.logger.debug('Send to Splunk (%s): %s', url, payload)
+        payload = '\n'.join(batch)
+        self.logger.debug(
+            'Send %d events to Splunk (%s): %s', len(batch), url, payload)
+        compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        data = compressor.compress(payload.encode('utf8')) + compressor.flush()
         try:
-            r = requests.post(
+            r = self.http.post(
                 url,
                 headers={
                     'Authorization': 'Splunk %s' % self.config[
                         'splunk_hec_token'
-                    ]
+                    ],
+                    'Content-Encoding': 'gzip'
                 },
-                data=payload
+                data=data
             )
         except Exception:
             self.logger.error('Exception during Splunk POST to %s of %s',
@@ -227,17 +288,19 @@ class SplunkHecDelivery(object):
             'Splunk POST got response code %s HEADERS=%s BODY: %s',
             r.status_code, r.headers, r.text
         )
+        try:
+            j = r.json()
+        except Exception:
+            j = {'text': r.text}
         if r.status_code not in [200, 201, 202]:
             self.logger.error(
                 'Splunk POST returned non-20x response: %s HEADERS=%s BODY: %s',
                 r.status_code, r.headers, r.text
             )
+            if 'invalid-event-number' in j:
+                raise SplunkHecInvalidEvent(j['invalid-event-number'], j)
             raise RuntimeError('POST returned %s' % r.status_code)
-        try:
-            j = r.json()
-        except Exception:
-            j = {'text': r.text}
-        if j['text'].lower() != 'success':
+        if j.get('text', '').lower() != 'success':
             self.logger.error(
                 'Splunk POST returned non-success response: %s', j
             )
@@ -17,8 +17,10 @@ SQS Message Processing
 
 """
 import base64
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import json
 import logging
+import threading
 import traceback
 import zlib
 
@@ -36,6 +38,9 @@ class MailerSqsQueueIterator(object):
     # Copied from custodian to avoid runtime library dependency
     msg_attributes = ['sequence_id', 'op', 'ser']
 
+    # max messages per receive and per delete batch supported by sqs
+    batch_size = 10
+
     def __init__(self, aws_sqs, queue_url, logger, limit=0, timeout=10):
         self.aws_sqs = aws_sqs
         self.queue_url = queue_url
@@ -43,6 +48,7 @@ class MailerSqsQueueIterator(object):
         self.logger = logger
         self.timeout = timeout
         self.messages = []
+        self.acks = []
 
     # this and the next function make this object iterable with a for loop
     def __iter__(self):
@@ -51,10 +57,12 @@ class MailerSqsQueueIterator(object):
     def __next__(self):
         if self.messages:
             return self.messages.pop(0)
+        # delete what we've processed before waiting on more
+        self.flush()
         response = self.aws_sqs.receive_message(
             QueueUrl=self.queue_url,
             WaitTimeSeconds=self.timeout,
-            MaxNumberOfMessages=3,
+            MaxNumberOfMessages=self.batch_size,
             MessageAttributeNames=self.msg_attributes,
             AttributeNames=['SentTimestamp']
         )
@@ -70,19 +78,44 @@ class MailerSqsQueueIterator(object):
     next = __next__  # python2.7
 
     def ack(self, m):
-        self.aws_sqs.delete_message(
-            QueueUrl=self.queue_url,
-            ReceiptHandle=m['ReceiptHandle'])
+        """Mark a message for deletion, deletes are sent in batches."""
+        self.acks.append(m)
+        if len(self.acks) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Delete acknowledged messages from the queue."""
+        while self.acks:
+            batch, self.acks = self.acks[:self.batch_size], self.acks[self.batch_size:]
+            response = self.aws_sqs.delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{'Id': str(idx), 'ReceiptHandle': m['ReceiptHandle']}
+                         for idx, m in enumerate(batch)])
+            for f in response.get('Failed', ()):
+                self.logger.warning(
+                    "Error deleting message id:%s code:%s error:%s",
+                    batch[int(f['Id'])]['MessageId'], f.get('Code'), f.get('Message'))
 
 
 class MailerSqsQueueProcessor(object):
 
+    # max concurrent sends by transport, overridden via delivery_concurrency
+    transport_concurrency = {
+        'email': 8, 'sns': 8, 'slack': 4, 'datadog': 4, 'splunkhec': 4}
+
     def __init__(self, config, session, logger, max_num_processes=16):
         self.config = config
         self.logger = logger
         self.session = session
         self.max_num_processes = max_num_processes
         self.receive_queue = self.config['queue_url']
+        self.deliveries = threading.local()
+        self.decrypted = set()
+        self.lock = threading.Lock()
+        limits = dict(self.transport_concurrency)
+        limits.update(self.config.get('delivery_concurrency', {}))
+        self.transport_limits = {
+            k: threading.BoundedSemaphore(v) for k, v in limits.items()}
         if self.config.get('debug', False):
             self.logger.debug('debug logging is turned on from mailer config file.')
             logger.setLevel(logging.DEBUG)
@@ -109,33 +142,97 @@ class MailerSqsQueueProcessor(object):
         sqs_messages = MailerSqsQueueIterator(aws_sqs, self.receive_queue, self.logger)
 
         sqs_messages.msg_attributes = ['mtype', 'recipient']
-        # lambda doesn't support multiprocessing, so we don't instantiate any mp stuff
-        # unless it's being run from CLI on a normal system with SHM
-        if parallel:
-            import multiprocessing
-            process_pool = multiprocessing.Pool(processes=self.max_num_processes)
-        for sqs_message in sqs_messages:
-            self.logger.debug(
-                "Message id: %s received %s" % (
-                    sqs_message['MessageId'], sqs_message.get('MessageAttributes', '')))
-            msg_kind = sqs_message.get('MessageAttributes', {}).get('mtype')
-            if msg_kind:
-                msg_kind = msg_kind['StringValue']
-            if not msg_kind == DATA_MESSAGE:
-                warning_msg = 'Unknown sqs_message or sns format %s' % (sqs_message['Body'][:50])
-                self.logger.warning(warning_msg)
+        try:
             if parallel:
-                process_pool.apply_async(self.process_sqs_message, args=sqs_message)
+                self.run_parallel(sqs_messages)
             else:
-                self.process_sqs_message(sqs_message)
-            self.logger.debug('Processed sqs_message')
-            sqs_messages.ack(sqs_message)
-        if parallel:
-            process_pool.close()
-            process_pool.join()
+                for sqs_message in sqs_messages:
+                    self.check_message_kind(sqs_message)
+                    self.process_sqs_message(sqs_message)
+                    self.logger.debug('Processed sqs_message')
+                    sqs_messages.ack(sqs_message)
+        finally:
+            sqs_messages.flush()
         self.logger.info('No sqs_messages left on the queue, exiting c7n_mailer.')
         return
 
+    def run_parallel(self, sqs_messages):
+        """Process messages concurrently, acking each once it's processed.
+
+        Delivery is io bound, and lambda doesn't support multiprocessing,
+        so messages are processed on a thread pool. Messages are received
+        at most twice the worker count ahead of processing. Messages that
+        fail are left on the queue, to be retried once their visibility
+        timeout expires.
+        """
+        max_pending = self.max_num_processes * 2
+        with ThreadPoolExecutor(max_workers=self.max_num_processes) as w:
+            futures = {}
+            for sqs_message in sqs_messages:
+                self.check_message_kind(sqs_message)
+                futures[w.submit(self.process_sqs_message, sqs_message)] = sqs_message
+                if len(futures) >= max_pending:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    self.ack_processed(sqs_messages, futures, done)
+            self.ack_processed(sqs_messages, futures, wait(futures).done)
+
+    def ack_processed(self, sqs_messages, futures, done):
+        for f in done:
+            sqs_message = futures.pop(f)
+            if f.exception():
+                self.logger.error(
+                    "Error processing message id:%s error:%s",
+                    sqs_message['MessageId'], f.exception())
+                continue
+            self.logger.debug('Processed sqs_message')
+            sqs_messages.ack(sqs_message)
+
+    def check_message_kind(self, sqs_message):
+        self.logger.debug(
+            "Message id: %s received %s" % (
+                sqs_message['MessageId'], sqs_message.get('MessageAttributes', '')))
+        msg_kind = sqs_message.get('MessageAttributes', {}).get('mtype')
+        if msg_kind:
+            msg_kind = msg_kind['StringValue']
+        if not msg_kind == DATA_MESSAGE:
+            warning_msg = 'Unknown sqs_message or sns format %s' % (sqs_message['Body'][:50])
+            self.logger.warning(warning_msg)
+
+    def get_delivery(self, kind):
+        """Get the delivery for a transport.
+
+        Deliveries hold clients and connections that aren't safe to share
+        across threads, each thread reuses its own across messages.
+        """
+        deliveries = vars(self.deliveries)
+        if kind in deliveries:
+            return deliveries[kind]
+        if kind == 'email':
+            delivery = EmailDelivery(self.config, self.session, self.logger)
+        elif kind == 'sns':
+            delivery = SnsDelivery(self.config, self.session, self.logger)
+        elif kind == 'slack':
+            from .slack_delivery import SlackDelivery
+            self.decrypt('slack_token')
+            delivery = SlackDelivery(self.config, self.logger, self.get_delivery('email'))
+        elif kind == 'datadog':
+            from .datadog_delivery import DataDogDelivery
+            delivery = DataDogDelivery(self.config, self.session, self.logger)
+        elif kind == 'splunkhec':
+            from .splunk_delivery import SplunkHecDelivery
+            delivery = SplunkHecDelivery(self.config, self.session, self.logger)
+        else:
+            raise ValueError("Unknown delivery %s" % kind)
+        deliveries[kind] = delivery
+        return delivery
+
+    def decrypt(self, field):
+        with self.lock:
+            if field in self.decrypted or not self.config.get(field):
+                return
+            self.config[field] = kms_decrypt(self.config, self.logger, self.session, field)
+            self.decrypted.add(field)
+
     # This function when processing sqs messages will only deliver messages over email or sns
     # If you explicitly declare which tags are aws_usernames (synonymous with ldap uids)
     # in the ldap_uid_tags section of your mailer.yml, we'll do a lookup of those emails
@@ -158,43 +255,42 @@ class MailerSqsQueueProcessor(object):
 
         # get the map of email_to_addresses to mimetext messages (with resources baked in)
         # and send any emails (to SES or SMTP) if there are email addresses found
-        email_delivery = EmailDelivery(self.config, self.session, self.logger)
+        email_delivery = self.get_delivery('email')
         to_addrs_to_email_messages_map = email_delivery.get_to_addrs_email_messages_map(sqs_message)
         for email_to_addrs, mimetext_msg in six.iteritems(to_addrs_to_email_messages_map):
-            email_delivery.send_c7n_email(sqs_message, list(email_to_addrs), mimetext_msg)
+            with self.transport_limits['email']:
+                email_delivery.send_c7n_email(sqs_message, list(email_to_addrs), mimetext_msg)
 
         # this sections gets the map of sns_to_addresses to rendered_jinja messages
         # (with resources baked in) and delivers the message to each sns topic
-        sns_delivery = SnsDelivery(self.config, self.session, self.logger)
+        sns_delivery = self.get_delivery('sns')
         sns_message_packages = sns_delivery.get_sns_message_packages(sqs_message)
-        sns_delivery.deliver_sns_messages(sns_message_packages, sqs_message)
+        if sns_message_packages:
+            with self.transport_limits['sns']:
+                sns_delivery.deliver_sns_messages(sns_message_packages, sqs_message)
 
         # this section sends a notification to the resource owner via Slack
         if any(e.startswith('slack') or e.startswith('https://hooks.slack.com/')
                 for e in sqs_message.get('action', ()).get('to', []) +
                 sqs_message.get('action', ()).get('owner_absent_contact', [])):
-            from .slack_delivery import SlackDelivery
-
-            if self.config.get('slack_token'):
-                self.config['slack_token'] = \
-                    kms_decrypt(self.config, self.logger, self.session, 'slack_token')
-
-            slack_delivery = SlackDelivery(self.config, self.logger, email_delivery)
+            slack_delivery = self.get_delivery('slack')
             slack_messages = slack_delivery.get_to_addrs_slack_messages_map(sqs_message)
             try:
-                slack_delivery.slack_handler(sqs_message, slack_messages)
+                with self.transport_limits['slack']:
+                    slack_delivery.slack_handler(sqs_message, slack_messages)
             except Exception:
                 traceback.print_exc()
                 pass
 
         # this section gets the map of metrics to send to datadog and delivers it
         if any(e.startswith('datadog') for e in sqs_message.get('action', ()).get('to')):
-            from .datadog_delivery import DataDogDelivery
-            datadog_delivery = DataDogDelivery(self.config, self.session, self.logger)
+            datadog_delivery = self.get_delivery('datadog')
             datadog_message_packages = datadog_delivery.get_datadog_message_packages(sqs_message)
 
             try:
-                datadog_delivery.deliver_datadog_messages(datadog_message_packages, sqs_message)
+                with self.transport_limits['datadog']:
+                    datadog_delivery.deliver_datadog_messages(
+                        datadog_message_packages, sqs_message)
             except Exception:
                 traceback.print_exc()
                 pass
@@ -204,14 +300,14 @@ class MailerSqsQueueProcessor(object):
             e.startswith('splunkhec://')
             for e in sqs_message.get('action', ()).get('to')
         ):
-            from .splunk_delivery import SplunkHecDelivery
-            splunk_delivery = SplunkHecDelivery(self.config, self.session, self.logger)
+            splunk_delivery = self.get_delivery('splunkhec')
             splunk_messages = splunk_delivery.get_splunk_payloads(
                 sqs_message, encoded_sqs_message['Attributes']['SentTimestamp']
             )
 
             try:
-                splunk_delivery.deliver_splunk_messages(splunk_messages)
+                with self.transport_limits['splunkhec']:
+                    splunk_delivery.deliver_splunk_messages(splunk_messages)
             except Exception:
                 traceback.print_exc()
                 pass
@@ -33,7 +33,24 @@ class Providers(object):
     Azure = 1
 
 
+# Process wide jinja environments by template folders. Environments hold
+# compiled templates, recompiling a template when its file's mtime changes.
+JINJA_ENVS = {}
+
+# Compiled subject templates by subject
+SUBJECT_TEMPLATES = {}
+SUBJECT_TEMPLATES_MAX = 256
+
+
 def get_jinja_env(template_folders):
+    key = tuple(template_folders)
+    env = JINJA_ENVS.get(key)
+    if env is None:
+        env = JINJA_ENVS[key] = _get_jinja_env(template_folders)
+    return env
+
+
+def _get_jinja_env(template_folders):
     env = jinja2.Environment(trim_blocks=True, autoescape=False)
     env.filters['yaml_safe'] = functools.partial(yaml.safe_dump, default_flow_style=False)
     env.filters['date_time_format'] = date_time_format
@@ -101,7 +118,11 @@ def get_resource_tag_targets(resource, target_tag_keys):
 def get_message_subject(sqs_message):
     default_subject = 'Custodian notification - %s' % (sqs_message['policy']['name'])
     subject = sqs_message['action'].get('subject', default_subject)
-    jinja_template = jinja2.Template(subject)
+    jinja_template = SUBJECT_TEMPLATES.get(subject)
+    if jinja_template is None:
+        if len(SUBJECT_TEMPLATES) >= SUBJECT_TEMPLATES_MAX:
+            SUBJECT_TEMPLATES.clear()
+        jinja_template = SUBJECT_TEMPLATES[subject] = jinja2.Template(subject)
     subject = jinja_template.render(
         account=sqs_message.get('account', ''),
         account_id=sqs_message.get('account_id', ''),
@@ -98,7 +98,7 @@ class TestSlackDelivery(unittest.TestCase):
         assert webhook in result
         assert 'channel' not in json.loads(result[webhook])
 
-    @patch('c7n_mailer.slack_delivery.requests.post')
+    @patch('c7n_mailer.slack_delivery.requests.Session.post')
     def test_slack_handler(self, mock_post):
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = {'ok': True}
@@ -111,7 +111,7 @@ class TestSlackDelivery(unittest.TestCase):
                                             "policy:ebs-mark-unattached-deletion ebs:1 slack:slack"
                                             "_default to test-channel")
 
-    @patch('c7n_mailer.slack_delivery.requests.post')
+    @patch('c7n_mailer.slack_delivery.requests.Session.post')
     def test_send_slack_msg_webhook(self, mock_post):
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = {'ok': True}
@@ -130,7 +130,7 @@ class TestSlackDelivery(unittest.TestCase):
         assert webhook == kwargs['url']
         assert kwargs['data'] == result[webhook]
 
-    @patch('c7n_mailer.slack_delivery.requests.post')
+    @patch('c7n_mailer.slack_delivery.requests.Session.post')
     def test_send_slack_msg(self, mock_post):
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = {'ok': True}
@@ -144,7 +144,7 @@ class TestSlackDelivery(unittest.TestCase):
         assert SLACK_POST_MESSAGE_API == kwargs['url']
         assert kwargs['data'] == result[self.target_channel]
 
-    @patch('c7n_mailer.slack_delivery.requests.post')
+    @patch('c7n_mailer.slack_delivery.requests.Session.post')
     def test_send_slack_msg_retry_after(self, mock_post):
         retry_after_delay = 1
         mock_post.return_value.status_code = 429
@@ -158,7 +158,7 @@ class TestSlackDelivery(unittest.TestCase):
         self.logger.info.assert_called_with("Slack API rate limiting. Waiting %d seconds",
                                             retry_after_delay)
 
-    @patch('c7n_mailer.slack_delivery.requests.post')
+    @patch('c7n_mailer.slack_delivery.requests.Session.post')
     def test_send_slack_msg_not_200_response(self, mock_post):
         mock_post.return_value.status_code = 404
         mock_post.return_value.text = "channel_not_found"
@@ -170,7 +170,7 @@ class TestSlackDelivery(unittest.TestCase):
         self.logger.info.assert_called_with('Error in sending Slack message status:%s response: %s',
                                             404, 'channel_not_found')
 
-    @patch('c7n_mailer.slack_delivery.requests.post')
+    @patch('c7n_mailer.slack_delivery.requests.Session.post')
     def test_send_slack_msg_not_ok_response(self, mock_post):
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = {'ok': False, 'error': "failed"}
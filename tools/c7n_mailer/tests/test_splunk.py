@@ -13,12 +13,13 @@
 # limitations under the License.
 
 import json
-import botocore.vendored.requests as requests
+import zlib
+import requests
 from logging import Logger
 from mock import Mock, call, patch
 import pytest
 
-from c7n_mailer.splunk_delivery import SplunkHecDelivery
+from c7n_mailer.splunk_delivery import SplunkHecDelivery, SplunkHecInvalidEvent
 
 pbm = 'c7n_mailer.splunk_delivery'
 pb = '%s.SplunkHecDelivery' % pbm
@@ -496,11 +497,10 @@ class TestDeliverSplunkMessages(DeliveryTester):
             {'baz': 'blam'}
         ]
         with patch('%s._try_send' % pb, autospec=True) as mock_send:
-            mock_send.return_value = True
+            mock_send.return_value = 0
             self.cls.deliver_splunk_messages(msg)
         assert mock_send.mock_calls == [
-            call(self.cls, {'foo': 'bar'}),
-            call(self.cls, {'baz': 'blam'})
+            call(self.cls, ['{"foo": "bar"}', '{"baz": "blam"}'])
         ]
 
     def test_handle_failure(self):
@@ -509,48 +509,42 @@ class TestDeliverSplunkMessages(DeliveryTester):
             {'baz': 'blam'}
         ]
         with patch('%s._try_send' % pb, autospec=True) as mock_send:
-            mock_send.side_effect = [True, False]
+            mock_send.return_value = 1
             with pytest.raises(RuntimeError):
                 self.cls.deliver_splunk_messages(msg)
         assert mock_send.mock_calls == [
-            call(self.cls, {'foo': 'bar'}),
-            call(self.cls, {'baz': 'blam'})
+            call(self.cls, ['{"foo": "bar"}', '{"baz": "blam"}'])
         ]
 
-
-class TestTrySend(DeliveryTester):
-
-    def test_success(self):
-        self.config['splunk_max_attempts'] = 3
-        self.config['splunk_hex_max_length'] = None
-        with patch('%s.sleep' % pbm) as mock_sleep:
-            with patch('%s.uniform' % pbm) as mock_uniform:
-                with patch('%s._send_splunk' % pb) as mock_send:
-                    mock_uniform.return_value = 1.2
-                    res = self.cls._try_send({'foo': 'bar'})
-        assert res is True
-        assert mock_sleep.mock_calls == []
-        assert mock_uniform.mock_calls == []
+    def test_batches(self):
+        self.config['splunk_hec_max_length'] = 40
+        msg = [{'n': '%05d' % i} for i in range(5)]
+        with patch('%s._try_send' % pb, autospec=True) as mock_send:
+            mock_send.return_value = 0
+            self.cls.deliver_splunk_messages(msg)
+        # each event is 14 characters plus a newline
         assert mock_send.mock_calls == [
-            call('{"foo": "bar"}')
+            call(self.cls, ['{"n": "00000"}', '{"n": "00001"}']),
+            call(self.cls, ['{"n": "00002"}', '{"n": "00003"}']),
+            call(self.cls, ['{"n": "00004"}'])
         ]
         assert self.mock_logger.mock_calls == []
 
     def test_payload_too_long(self):
-        self.config['splunk_max_attempts'] = 3
         self.config['splunk_hec_max_length'] = 3000
         p = {}
         for i in range(1, 2000):
             p['%d' % i] = i
         j = json.dumps(p)
-        with patch('%s.sleep' % pbm) as mock_sleep:
-            with patch('%s.uniform' % pbm) as mock_uniform:
-                with patch('%s._send_splunk' % pb) as mock_send:
-                    mock_uniform.return_value = 1.2
-                    self.cls._try_send(p)
-        assert mock_sleep.mock_calls == []
-        assert mock_uniform.mock_calls == []
-        assert mock_send.mock_calls == [call(j)]
+        with patch('%s._try_send' % pb, autospec=True) as mock_send:
+            mock_send.return_value = 0
+            with pytest.raises(RuntimeError):
+                self.cls.deliver_splunk_messages([{'foo': 'bar'}, p, {'baz': 'blam'}])
+        assert mock_send.mock_calls == [
+            call(self.cls, ['{"foo": "bar"}']),
+            call(self.cls, [j]),
+            call(self.cls, ['{"baz": "blam"}'])
+        ]
         assert self.mock_logger.mock_calls == [
             call.error(
                 'ERROR: Sending %d characters to Splunk HEC; line length '
@@ -559,9 +553,26 @@ class TestTrySend(DeliveryTester):
             )
         ]
 
+
+class TestTrySend(DeliveryTester):
+
+    def test_success(self):
+        self.config['splunk_max_attempts'] = 3
+        with patch('%s.sleep' % pbm) as mock_sleep:
+            with patch('%s.uniform' % pbm) as mock_uniform:
+                with patch('%s._send_splunk' % pb) as mock_send:
+                    mock_uniform.return_value = 1.2
+                    res = self.cls._try_send(['{"foo": "bar"}'])
+        assert res == 0
+        assert mock_sleep.mock_calls == []
+        assert mock_uniform.mock_calls == []
+        assert mock_send.mock_calls == [
+            call(['{"foo": "bar"}'])
+        ]
+        assert self.mock_logger.mock_calls == []
+
     def test_fail_once(self):
         self.config['splunk_max_attempts'] = 3
-        self.config['splunk_hex_max_length'] = None
         with patch('%s.sleep' % pbm) as mock_sleep:
             with patch('%s.uniform' % pbm) as mock_uniform:
                 with patch('%s._send_splunk' % pb) as mock_send:
@@ -571,13 +582,13 @@ class TestTrySend(DeliveryTester):
                         RuntimeError('foo'),
                         None
                     ]
-                    res = self.cls._try_send({'foo': 'bar'})
-        assert res is True
+                    res = self.cls._try_send(['{"foo": "bar"}'])
+        assert res == 0
         assert mock_sleep.mock_calls == [call(1.2)]
         assert mock_uniform.mock_calls == [call(1, 4)]
         assert mock_send.mock_calls == [
-            call('{"foo": "bar"}'),
-            call('{"foo": "bar"}')
+            call(['{"foo": "bar"}']),
+            call(['{"foo": "bar"}'])
         ]
         assert self.mock_logger.mock_calls == [
             call.warning(
@@ -587,28 +598,25 @@ class TestTrySend(DeliveryTester):
 
     def test_fail_always(self):
         self.config['splunk_max_attempts'] = 3
-        self.config['splunk_hex_max_length'] = None
         with patch('%s.sleep' % pbm) as mock_sleep:
             with patch('%s.uniform' % pbm) as mock_uniform:
                 with patch('%s._send_splunk' % pb) as mock_send:
                     mock_uniform.return_value = 1.2
                     mock_send.side_effect = RuntimeError('foo')
-                    res = self.cls._try_send({'foo': 'bar'})
-        assert res is False
+                    res = self.cls._try_send(['{"foo": "bar"}', '{"baz": "blam"}'])
+        assert res == 2
         assert mock_sleep.mock_calls == [
-            call(1.2),
             call(1.2),
             call(1.2)
         ]
         assert mock_uniform.mock_calls == [
-            call(1, 4),
             call(1, 4),
             call(1, 4)
         ]
         assert mock_send.mock_calls == [
-            call('{"foo": "bar"}'),
-            call('{"foo": "bar"}'),
-            call('{"foo": "bar"}')
+            call(['{"foo": "bar"}', '{"baz": "blam"}']),
+            call(['{"foo": "bar"}', '{"baz": "blam"}']),
+            call(['{"foo": "bar"}', '{"baz": "blam"}'])
         ]
         assert self.mock_logger.mock_calls == [
             call.warning(
@@ -617,40 +625,67 @@ class TestTrySend(DeliveryTester):
             call.warning(
                 'Caught exception sending to Splunk; retry in %s seconds', 1.2
             ),
-            call.warning(
-                'Caught exception sending to Splunk; retry in %s seconds', 1.2
-            ),
             call.error(
-                'ERROR - Could not POST to Splunk after %d tries.', 3
+                'ERROR - Could not POST %d events to Splunk after %d tries.',
+                2, 3
             )
         ]
 
+    def test_invalid_event(self):
+        self.config['splunk_max_attempts'] = 1
+        batch = ['{"a": 1}', '{"b": 2}', '{"c": 3}', '{"d": 4}']
+        with patch('%s.sleep' % pbm) as mock_sleep:
+            with patch('%s._send_splunk' % pb) as mock_send:
+                mock_send.side_effect = [
+                    SplunkHecInvalidEvent(1, {'code': 6}),
+                    SplunkHecInvalidEvent(1, {'code': 6})
+                ]
+                res = self.cls._try_send(batch)
+        assert res == 2
+        assert mock_sleep.mock_calls == []
+        assert mock_send.mock_calls == [
+            call(batch),
+            call(['{"c": 3}', '{"d": 4}'])
+        ]
+
 
 class TestSendSplunk(DeliveryTester):
 
-    def test_send(self):
+    batch = ['{"foo": "bar"}', '{"baz": "blam"}']
+    payload = '{"foo": "bar"}\n{"baz": "blam"}'
+    headers = {'Authorization': 'Splunk stoken', 'Content-Encoding': 'gzip'}
+
+    def send(self, m_resp=None, side_effect=None):
         self.config['splunk_hec_url'] = 'https://splunk.url/foo'
         self.config['splunk_hec_token'] = 'stoken'
+        self.cls.http = Mock(spec_set=requests.Session)
+        self.cls.http.post.return_value = m_resp
+        self.cls.http.post.side_effect = side_effect
+        try:
+            self.cls._send_splunk(self.batch)
+        finally:
+            assert self.cls.http.post.call_count == 1
+            args, kwargs = self.cls.http.post.call_args
+            assert args == ('https://splunk.url/foo',)
+            assert kwargs['headers'] == self.headers
+            assert zlib.decompress(
+                kwargs['data'], zlib.MAX_WBITS | 16).decode('utf8') == self.payload
+
+    def response(self, status_code, text, json_value=None, json_error=None):
         m_resp = Mock(spec_set=requests.models.Response)
-        type(m_resp).status_code = 200
-        type(m_resp).text = '{"text": "Success"}'
+        type(m_resp).status_code = status_code
+        type(m_resp).text = text
         type(m_resp).headers = {'H1': 'V1'}
-        m_resp.json.return_value = {'text': 'Success'}
-        with patch('%s.requests' % pbm, autospec=True) as mock_req:
-            mock_req.post.return_value = m_resp
-            self.cls._send_splunk('{"foo": "bar"}')
-        assert mock_req.mock_calls == [
-            call.post(
-                'https://splunk.url/foo',
-                headers={'Authorization': 'Splunk stoken'},
-                data='{"foo": "bar"}'
-            ),
-            call.post().json()
-        ]
+        m_resp.json.return_value = json_value
+        m_resp.json.side_effect = json_error
+        return m_resp
+
+    def test_send(self):
+        self.send(self.response(200, '{"text": "Success"}', {'text': 'Success'}))
         assert self.mock_logger.mock_calls == [
             call.debug(
-                'Send to Splunk (%s): %s', 'https://splunk.url/foo',
-                '{"foo": "bar"}'
+                'Send %d events to Splunk (%s): %s', 2,
+                'https://splunk.url/foo', self.payload
             ),
             call.debug(
                 'Splunk POST got response code %s HEADERS=%s BODY: %s',
@@ -659,58 +694,23 @@ class TestSendSplunk(DeliveryTester):
         ]
 
     def test_send_exception(self):
-        self.config['splunk_hec_url'] = 'https://splunk.url/foo'
-        self.config['splunk_hec_token'] = 'stoken'
-
-        def se_post(*args, **kwargs):
-            raise Exception('foo')
-
-        with patch('%s.requests' % pbm, autospec=True) as mock_req:
-            mock_req.post.side_effect = se_post
-            with pytest.raises(Exception):
-                self.cls._send_splunk('{"foo": "bar"}')
-        assert mock_req.mock_calls == [
-            call.post(
-                'https://splunk.url/foo',
-                headers={'Authorization': 'Splunk stoken'},
-                data='{"foo": "bar"}'
-            )
-        ]
+        with pytest.raises(Exception):
+            self.send(side_effect=Exception('foo'))
         assert self.mock_logger.mock_calls == [
             call.debug(
-                'Send to Splunk (%s): %s', 'https://splunk.url/foo',
-                '{"foo": "bar"}'
+                'Send %d events to Splunk (%s): %s', 2,
+                'https://splunk.url/foo', self.payload
             ),
             call.error(
                 'Exception during Splunk POST to %s of %s',
-                'https://splunk.url/foo', '{"foo": "bar"}', exc_info=True
+                'https://splunk.url/foo', self.payload, exc_info=True
             )
         ]
 
     def test_send_bad_status(self):
-        self.config['splunk_hec_url'] = 'https://splunk.url/foo'
-        self.config['splunk_hec_token'] = 'stoken'
-        m_resp = Mock(spec_set=requests.models.Response)
-        type(m_resp).status_code = 403
-        type(m_resp).text = '{"text": "Success"}'
-        type(m_resp).headers = {'H1': 'V1'}
-        m_resp.json.return_value = {'text': 'Success'}
-        with patch('%s.requests' % pbm, autospec=True) as mock_req:
-            mock_req.post.return_value = m_resp
-            with pytest.raises(RuntimeError):
-                self.cls._send_splunk('{"foo": "bar"}')
-        assert mock_req.mock_calls == [
-            call.post(
-                'https://splunk.url/foo',
-                headers={'Authorization': 'Splunk stoken'},
-                data='{"foo": "bar"}'
-            )
-        ]
-        assert self.mock_logger.mock_calls == [
-            call.debug(
-                'Send to Splunk (%s): %s', 'https://splunk.url/foo',
-                '{"foo": "bar"}'
-            ),
+        with pytest.raises(RuntimeError):
+            self.send(self.response(403, '{"text": "Success"}', {'text': 'Success'}))
+        assert self.mock_logger.mock_calls[1:] == [
             call.debug(
                 'Splunk POST got response code %s HEADERS=%s BODY: %s',
                 403, {'H1': 'V1'}, '{"text": "Success"}'
@@ -721,35 +721,16 @@ class TestSendSplunk(DeliveryTester):
             )
         ]
 
+    def test_send_invalid_event(self):
+        body = {'text': 'Invalid data format', 'code': 6, 'invalid-event-number': 1}
+        with pytest.raises(SplunkHecInvalidEvent) as e:
+            self.send(self.response(400, json.dumps(body), body))
+        assert e.value.index == 1
+
     def test_send_non_success(self):
-        self.config['splunk_hec_url'] = 'https://splunk.url/foo'
-        self.config['splunk_hec_token'] = 'stoken'
-        m_resp = Mock(spec_set=requests.models.Response)
-        type(m_resp).status_code = 200
-        type(m_resp).text = '{"text": "Failure"}'
-        type(m_resp).headers = {'H1': 'V1'}
-        m_resp.json.return_value = {'text': 'Failure'}
-        with patch('%s.requests' % pbm, autospec=True) as mock_req:
-            mock_req.post.return_value = m_resp
-            with pytest.raises(RuntimeError):
-                self.cls._send_splunk('{"foo": "bar"}')
-        assert mock_req.mock_calls == [
-            call.post(
-                'https://splunk.url/foo',
-                headers={'Authorization': 'Splunk stoken'},
-                data='{"foo": "bar"}'
-            ),
-            call.post().json()
-        ]
-        assert self.mock_logger.mock_calls == [
-            call.debug(
-                'Send to Splunk (%s): %s', 'https://splunk.url/foo',
-                '{"foo": "bar"}'
-            ),
-            call.debug(
-                'Splunk POST got response code %s HEADERS=%s BODY: %s',
-                200, {'H1': 'V1'}, '{"text": "Failure"}'
-            ),
+        with pytest.raises(RuntimeError):
+            self.send(self.response(200, '{"text": "Failure"}', {'text': 'Failure'}))
+        assert self.mock_logger.mock_calls[2:] == [
             call.error(
                 'Splunk POST returned non-success response: %s',
                 {'text': 'Failure'}
@@ -757,38 +738,10 @@ class TestSendSplunk(DeliveryTester):
         ]
 
     def test_send_non_success_no_json(self):
-        self.config['splunk_hec_url'] = 'https://splunk.url/foo'
-        self.config['splunk_hec_token'] = 'stoken'
-
-        def se_exc(*args, **kwargs):
-            raise Exception('foo')
-
-        m_resp = Mock(spec_set=requests.models.Response)
-        type(m_resp).status_code = 200
-        type(m_resp).text = '{"text": "Failure"}'
-        type(m_resp).headers = {'H1': 'V1'}
-        m_resp.json.side_effect = se_exc
-        with patch('%s.requests' % pbm, autospec=True) as mock_req:
-            mock_req.post.return_value = m_resp
-            with pytest.raises(RuntimeError):
-                self.cls._send_splunk('{"foo": "bar"}')
-        assert mock_req.mock_calls == [
-            call.post(
-                'https://splunk.url/foo',
-                headers={'Authorization': 'Splunk stoken'},
-                data='{"foo": "bar"}'
-            ),
-            call.post().json()
-        ]
-        assert self.mock_logger.mock_calls == [
-            call.debug(
-                'Send to Splunk (%s): %s', 'https://splunk.url/foo',
-                '{"foo": "bar"}'
-            ),
-            call.debug(
-                'Splunk POST got response code %s HEADERS=%s BODY: %s',
-                200, {'H1': 'V1'}, '{"text": "Failure"}'
-            ),
+        with pytest.raises(RuntimeError):
+            self.send(self.response(
+                200, '{"text": "Failure"}', json_error=Exception('foo')))
+        assert self.mock_logger.mock_calls[2:] == [
             call.error(
                 'Splunk POST returned non-success response: %s',
                 {'text': '{"text": "Failure"}'}
@@ -0,0 +1,257 @@
+# Copyright 2019 Capital One Services, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import copy
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+
+import requests
+from mock import MagicMock, patch
+from six.moves import socketserver
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from c7n_mailer import sqs_queue_processor
+from c7n_mailer.sqs_queue_processor import (
+    MailerSqsQueueIterator, MailerSqsQueueProcessor)
+from common import MAILER_CONFIG, RESOURCE_3, logger
+
+
+def encode_message(message):
+    return base64.b64encode(
+        zlib.compress(json.dumps(message).encode('utf8'))).decode('utf8')
+
+
+def sqs_messages(count):
+    return [{'MessageId': 'm-%d' % i, 'ReceiptHandle': 'r-%d' % i, 'Body': ''}
+            for i in range(count)]
+
+
+class SqsQueueIteratorTest(unittest.TestCase):
+
+    def get_client(self, messages):
+        client = MagicMock()
+        batches = [{'Messages': messages[i:i + 10]}
+                   for i in range(0, len(messages), 10)] + [{}]
+        client.receive_message.side_effect = batches
+        client.delete_message_batch.return_value = {}
+        return client
+
+    def test_batch_receive_and_ack(self):
+        messages = sqs_messages(25)
+        client = self.get_client(messages)
+        queue = MailerSqsQueueIterator(client, 'queue-url', logger)
+        received = []
+        for m in queue:
+            received.append(m['MessageId'])
+            queue.ack(m)
+        self.assertEqual(received, [m['MessageId'] for m in messages])
+        self.assertEqual(client.receive_message.call_count, 4)
+        self.assertEqual(
+            client.receive_message.call_args[1]['MaxNumberOfMessages'], 10)
+        client.delete_message.assert_not_called()
+        deleted = [
+            [e['ReceiptHandle'] for e in c[1]['Entries']]
+            for c in client.delete_message_batch.call_args_list]
+        self.assertEqual([len(d) for d in deleted], [10, 10, 5])
+        self.assertEqual(
+            sum(deleted, []), [m['ReceiptHandle'] for m in messages])
+
+    def test_ack_failure(self):
+        client = self.get_client(sqs_messages(2))
+        client.delete_message_batch.return_value = {
+            'Failed': [{'Id': '1', 'Code': 'ReceiptHandleIsInvalid',
+                        'Message': 'invalid', 'SenderFault': True}]}
+        log = MagicMock()
+        queue = MailerSqsQueueIterator(client, 'queue-url', log)
+        for m in queue:
+            queue.ack(m)
+        self.assertEqual(log.warning.call_count, 1)
+        self.assertIn('m-1', log.warning.call_args[0])
+
+
+class SqsQueueProcessorTest(unittest.TestCase):
+
+    @patch.object(sqs_queue_processor, 'EmailDelivery')
+    @patch.object(sqs_queue_processor, 'SnsDelivery')
+    def test_deliveries_reused(self, sns_delivery, email_delivery):
+        email_delivery.return_value.get_to_addrs_email_messages_map.return_value = {}
+        sns_delivery.return_value.get_sns_message_packages.return_value = [{}]
+        processor = MailerSqsQueueProcessor(MAILER_CONFIG, MagicMock(), logger)
+        body = base64.b64encode(zlib.compress(json.dumps({
+            'action': {'to': ['milton@initech.com']},
+            'policy': {'name': 'check', 'resource': 'ec2'},
+            'resources': []}).encode('utf8'))).decode('utf8')
+
+        for m in sqs_messages(3):
+            m['Body'] = body
+            processor.process_sqs_message(m)
+
+        self.assertEqual(email_delivery.call_count, 1)
+        self.assertEqual(sns_delivery.call_count, 1)
+        self.assertEqual(
+            sns_delivery.return_value.deliver_sns_messages.call_count, 3)
+
+
+class StubSmtpHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        self.server.record('connections')
+        self.reply('220 stub')
+        for line in iter(self.rfile.readline, b''):
+            command = line.strip().split(b' ')[0].upper()
+            if command == b'DATA':
+                self.reply('354 go ahead')
+                for data in iter(self.rfile.readline, b''):
+                    if data == b'.\r\n':
+                        break
+                self.server.record('messages')
+                self.reply('250 ok')
+            elif command == b'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 ok')
+
+
+class StubHttpHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.record('messages')
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServerMixin(socketserver.ThreadingMixIn):
+
+    daemon_threads = True
+
+    def setup_stats(self):
+        self.lock = threading.Lock()
+        self.stats = {'connections': 0, 'messages': 0}
+
+    def record(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def get_request(self):
+        request = socketserver.TCPServer.get_request(self)
+        if hasattr(self, 'stats') and isinstance(self, HTTPServer):
+            self.record('connections')
+        return request
+
+
+class StubSmtpServer(StubServerMixin, socketserver.TCPServer):
+    pass
+
+
+class StubHttpServer(StubServerMixin, HTTPServer):
+    pass
+
+
+class DeliveryThroughputTest(unittest.TestCase):
+    """Drain a queue through stub smtp and slack servers."""
+
+    message_count = 200
+
+    def start_server(self, server_class, handler):
+        server = server_class(('127.0.0.1', 0), handler)
+        server.setup_stats()
+        t = threading.Thread(target=server.serve_forever)
+        t.daemon = True
+        t.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_parallel_delivery(self):
+        smtp = self.start_server(StubSmtpServer, StubSmtpHandler)
+        http = self.start_server(StubHttpServer, StubHttpHandler)
+        slack_url = 'http://127.0.0.1:%d/' % http.server_address[1]
+        session_post = requests.Session.post
+
+        def post(session, url, **kw):
+            return session_post(session, slack_url, **kw)
+
+        templates = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, templates)
+        with open(os.path.join(templates, 'default.j2'), 'w') as fh:
+            fh.write('{{ policy.name }} matched {{ resources|length }} resources')
+
+        config = dict(copy.deepcopy(MAILER_CONFIG),
+                      smtp_server='127.0.0.1', smtp_port=smtp.server_address[1],
+                      smtp_ssl=False, templates_folders=[templates, os.path.join(
+                          os.path.dirname(__file__), 'test-templates')])
+        config.pop('ldap_uri')
+        body = encode_message({
+            'account': 'core', 'region': 'us-east-1', 'event': None,
+            'action': {'to': ['milton@initech.com', 'https://hooks.slack.com/stub']},
+            'policy': {'name': 'check', 'resource': 'ebs'},
+            'resources': [RESOURCE_3]})
+        messages = sqs_messages(self.message_count)
+        for m in messages:
+            m['Body'] = body
+        sqs = SqsQueueIteratorTest().get_client(messages)
+        session = MagicMock()
+        session.client.return_value = sqs
+
+        processor = MailerSqsQueueProcessor(config, session, logger, max_num_processes=8)
+        t = time.time()
+        with patch.object(requests.Session, 'post', post):
+            processor.run(parallel=True)
+        elapsed = time.time() - t
+        logger.info("delivered %d messages in %0.2fs %0.1f msgs/sec",
+                    self.message_count, elapsed, self.message_count / elapsed)
+
+        self.assertEqual(smtp.stats['messages'], self.message_count)
+        self.assertEqual(http.stats['messages'], self.message_count)
+        # connections are reused across messages, one per worker thread
+        self.assertTrue(smtp.stats['connections'] <= 8)
+        self.assertTrue(http.stats['connections'] <= 8)
+        acked = sum([len(c[1]['Entries'])
+                     for c in sqs.delete_message_batch.call_args_list])
+        self.assertEqual(acked, self.message_count)
+
+    def test_parallel_ack_after_success(self):
+        messages = sqs_messages(4)
+        messages[0]['Body'] = encode_message({'policy': {}})
+        sqs = SqsQueueIteratorTest().get_client(messages)
+        session = MagicMock()
+        session.client.return_value = sqs
+        processor = MailerSqsQueueProcessor(MAILER_CONFIG, session, MagicMock())
+        with patch.object(processor, 'process_sqs_message') as process:
+            process.side_effect = lambda m: m['Body'] and 1 / 0
+            processor.run(parallel=True)
+        acked = [e['ReceiptHandle'] for c in sqs.delete_message_batch.call_args_list
+                 for e in c[1]['Entries']]
+        self.assertEqual(sorted(acked), ['r-1', 'r-2', 'r-3'])
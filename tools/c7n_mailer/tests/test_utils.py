@@ -1,12 +1,60 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import os
+import shutil
+import tempfile
+import time
 import unittest
 from mock import Mock, patch
 
 from c7n_mailer import utils
 
 
+class TemplateCache(unittest.TestCase):
+
+    def setUp(self):
+        self.template_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.template_dir)
+        self.addCleanup(utils.JINJA_ENVS.clear)
+
+    def write_template(self, content, mtime):
+        path = os.path.join(self.template_dir, 'check.j2')
+        with open(path, 'w') as fh:
+            fh.write(content)
+        os.utime(path, (mtime, mtime))
+
+    def render(self):
+        return utils.get_rendered_jinja(
+            'milton@initech.com',
+            {'action': {'template': 'check'}, 'policy': {'name': 'check'}},
+            [], Mock(), 'template', 'default', [self.template_dir])
+
+    def test_template_cache(self):
+        now = time.time()
+        self.write_template('hello {{ recipient }}', now - 60)
+        self.assertEqual(self.render(), 'hello milton@initech.com')
+
+        env = utils.get_jinja_env([self.template_dir])
+        self.assertTrue(env is utils.get_jinja_env((self.template_dir,)))
+        with patch.object(env, '_parse') as parse:
+            self.assertEqual(self.render(), 'hello milton@initech.com')
+        parse.assert_not_called()
+
+        # edited templates are recompiled
+        self.write_template('goodbye {{ recipient }}', now)
+        self.assertEqual(self.render(), 'goodbye milton@initech.com')
+
+    def test_subject_cache(self):
+        message = {'action': {'subject': 'alert {{ policy.name }}'},
+                   'policy': {'name': 'check'}}
+        self.assertEqual(utils.get_message_subject(message), 'alert check')
+        template = utils.SUBJECT_TEMPLATES['alert {{ policy.name }}']
+        self.assertEqual(utils.get_message_subject(message), 'alert check')
+        self.assertTrue(
+            template is utils.SUBJECT_TEMPLATES['alert {{ policy.name }}'])
+
+
 class FormatStruct(unittest.TestCase):
 
     def test_formats_struct(self):
@@ -15,6 +15,8 @@
 """
 
 from collections import Counter
+import copy
+import hashlib
 import logging
 import os
 import time
@@ -41,9 +43,9 @@ from c7n.policy import PolicyCollection
 from c7n.provider import get_resource_class
 from c7n.reports.csvout import Formatter, fs_record_set
 from c7n.resources import load_resources
-from c7n.utils import CONN_CACHE, dumps
+from c7n.utils import dumps, reset_session_cache
 
-from c7n_org.utils import environ, account_tags
+from c7n_org.utils import environ, account_tags, RunJournal
 from c7n.utils import UnicodeWriter
 
 log = logging.getLogger('c7n_org')
@@ -59,6 +61,15 @@ if sys.platform == 'darwin' and (
 WORKER_COUNT = int(
     os.environ.get('C7N_ORG_PARALLEL', multiprocessing.cpu_count() * 4))
 
+# Max policies per unit of work, an account region's policies are split
+# into units of up to this size, each unit assumes the account's role once.
+UNIT_POLICY_COUNT = int(os.environ.get('C7N_ORG_UNIT_POLICIES', 20))
+
+# Number of slowest account/region/policy runs reported after a run
+SLOW_UNIT_COUNT = 10
+
+JOURNAL_FILE = 'c7n-org-journal.db'
+
 
 CONFIG_SCHEMA = {
     '$schema': 'http://json-schema.org/schema#',
@@ -494,13 +505,93 @@ def accounts_iterator(config):
         yield d
 
 
+def compile_policies(policies_config):
+    """Load and validate the policy set once, ahead of scheduling work.
+
+    A policy that fails to load is reported here once rather than in
+    every account and region. Policies referencing account variables
+    are validated by workers instead, once per distinct expansion.
+
+    Returns the data of the valid policies and whether all were valid.
+    """
+    valid = []
+    success = True
+    for data in policies_config.get('policies', ()):
+        try:
+            # validation may rewrite policy data
+            p = PolicyCollection.from_data(
+                {'policies': [copy.deepcopy(data)]}, Config.empty()).policies[0]
+            if not needs_expansion(p.data):
+                validate_policy(p)
+        except Exception as e:
+            success = False
+            log.error("Invalid policy:%s error:%s", data.get('name'), e)
+            continue
+        valid.append(data)
+    return valid, success
+
+
+def needs_expansion(policy_data):
+    """Does the policy reference variables requiring per account expansion."""
+    mode = policy_data.get('mode', {})
+    if 'role' in mode and not mode['role'].startswith('arn:aws'):
+        return True
+    return has_format_strings(policy_data)
+
+
+def has_format_strings(obj):
+    if isinstance(obj, dict):
+        return any(map(has_format_strings, obj.values()))
+    elif isinstance(obj, list):
+        return any(map(has_format_strings, obj))
+    elif isinstance(obj, six.string_types):
+        return '{' in obj or '}' in obj
+    return False
+
+
+# digests of the policy data validated in this process, workers
+# forked after compile_policies inherit them.
+VALIDATED_POLICIES = set()
+
+
+def validate_policy(policy):
+    """Validate a policy once per distinct (expanded) policy data.
+
+    Later policies with the same data only initialize their filters and
+    actions, which set up runtime state (timezones, compiled expressions)
+    in validate.
+    """
+    digest = RunJournal.digest(policy.data)
+    if digest not in VALIDATED_POLICIES:
+        policy.validate()
+        VALIDATED_POLICIES.add(digest)
+        return
+    for f in policy.resource_manager.filters:
+        f.validate()
+    for a in policy.resource_manager.actions:
+        a.validate()
+
+
+def get_journal_path(output_dir, cache_path):
+    """Run journals are kept in the output dir when it's a local path.
+
+    Remote or per account interpolated output dirs use the cache path.
+    """
+    if '://' not in output_dir and '{' not in output_dir:
+        return os.path.join(output_dir, JOURNAL_FILE)
+    return os.path.join(cache_path, "%s-%s" % (
+        hashlib.sha1(output_dir.encode('utf8')).hexdigest()[:12], JOURNAL_FILE))
+
+
 def run_account(account, region, policies_config, output_path,
                 cache_period, cache_path, metrics, dryrun, debug):
     """Execute a set of policies on an account.
+
+    Returns resource counts by policy name, whether all policies ran
+    successfully, and execution times by policy name.
     """
     logging.getLogger('custodian.output').setLevel(logging.ERROR + 1)
-    CONN_CACHE.session = None
-    CONN_CACHE.time = None
+    reset_session_cache()
 
     # allow users to specify interpolated output paths
     if '{' not in output_path:
@@ -529,21 +620,28 @@ def run_account(account, region, policies_config, output_path,
 
     policies = PolicyCollection.from_data(policies_config, config)
     policy_counts = {}
+    policy_times = {}
     success = True
-    st = time.time()
 
     with environ(**env_vars):
         for p in policies:
-            # Variable expansion and non schema validation (not optional)
-            p.expand_variables(p.get_variables(account.get('vars', {})))
-            p.validate()
-
             if p.region and p.region != region:
                 continue
 
+            try:
+                if needs_expansion(p.data):
+                    p.expand_variables(p.get_variables(account.get('vars', {})))
+                validate_policy(p)
+            except Exception as e:
+                success = False
+                log.error("Invalid policy:%s account:%s region:%s error:%s",
+                          p.name, account['name'], region, e)
+                continue
+
             log.debug(
                 "Running policy:%s account:%s region:%s",
                 p.name, account['name'], region)
+            st = time.time()
             try:
                 resources = p.run()
                 policy_counts[p.name] = resources and len(resources) or 0
@@ -562,7 +660,7 @@ def run_account(account, region, policies_config, output_path,
                 if e.response['Error']['Code'] == 'AccessDenied':
                     log.warning('Access denied api:%s policy:%s account:%s region:%s',
                                 e.operation_name, p.name, account['name'], region)
-                    return policy_counts, success
+                    return policy_counts, success, policy_times
                 log.error(
                     "Exception running policy:%s account:%s region:%s error:%s",
                     p.name, account['name'], region, e)
@@ -578,8 +676,10 @@ def run_account(account, region, policies_config, output_path,
                 traceback.print_exc()
                 pdb.post_mortem(sys.exc_info()[-1])
                 raise
+            finally:
+                policy_times[p.name] = time.time() - st
 
-    return policy_counts, success
+    return policy_counts, success, policy_times
 
 
 @cli.command(name='run')
@@ -602,16 +702,19 @@ def run_account(account, region, policies_config, output_path,
 @click.option("--metrics", default=False, is_flag=True)
 @click.option("--metrics-uri", default=None, help="Configure provider metrics target")
 @click.option("--dryrun", default=False, is_flag=True)
+@click.option('--resume', default=False, is_flag=True,
+              help=("Skip units completed by the previous run to the output dir, "
+                    "the run journal is kept in the output dir, or the cache "
+                    "path for remote or interpolated output dirs"))
 @click.option('--debug', default=False, is_flag=True)
 @click.option('-v', '--verbose', default=False, help="Verbose", is_flag=True)
 def run(config, use, output_dir, accounts, tags, region,
         policy, policy_tags, cache_period, cache_path, metrics,
-        dryrun, debug, verbose, metrics_uri):
+        dryrun, resume, debug, verbose, metrics_uri):
     """run a custodian policy across accounts"""
     accounts_config, custodian_config, executor = init(
         config, use, debug, verbose, accounts, tags, policy, policy_tags=policy_tags)
     policy_counts = Counter()
-    success = True
 
     if metrics_uri:
         metrics = metrics_uri
@@ -621,37 +724,92 @@ def run(config, use, output_dir, accounts, tags, region,
         if not os.path.exists(cache_path):
             os.makedirs(cache_path)
 
+    policies, success = compile_policies(custodian_config)
+    account_regions = [
+        (a, resolve_regions(region or a.get('regions', ())))
+        for a in accounts_config['accounts']]
+    policy_times = {}
+    st = time.time()
+
+    # dryruns leave the journal of the last run as is
+    journal = RunJournal(get_journal_path(output_dir, cache_path)).open(
+        resume or dryrun)
+    completed = resume and journal.completed() or {}
+    skipped = 0
+
+    # Work is split into units of an account region's policies, with
+    # workers taking the next unit as they free up, so a slow account is
+    # spread across the pool instead of pinning a single worker. Sessions
+    # are reused by the policies of a unit. Units are ordered by policy
+    # chunk to interleave the api calls made against each account.
+    units = []
+    for a, regions in account_regions:
+        for r in regions:
+            pending = []
+            for p in policies:
+                if p.get('region') and p['region'] != r:
+                    continue
+                unit = completed.get((a['account_id'], r, p['name']))
+                if unit and unit[0] == RunJournal.digest(p):
+                    policy_counts[p['name']] += unit[1]
+                    skipped += 1
+                    continue
+                pending.append(p)
+            for idx, i in enumerate(range(0, len(pending), UNIT_POLICY_COUNT)):
+                units.append((idx, a, r, pending[i:i + UNIT_POLICY_COUNT]))
+    units.sort(key=lambda u: u[0])
+
     with executor(max_workers=WORKER_COUNT) as w:
         futures = {}
-        for a in accounts_config['accounts']:
-            for r in resolve_regions(region or a.get('regions', ())):
-                futures[w.submit(
-                    run_account,
-                    a, r,
-                    custodian_config,
-                    output_dir,
-                    cache_period,
-                    cache_path,
-                    metrics,
-                    dryrun,
-                    debug)] = (a, r)
+        for idx, a, r, unit_policies in units:
+            futures[w.submit(
+                run_account,
+                a, r,
+                {'policies': unit_policies},
+                output_dir,
+                cache_period,
+                cache_path,
+                metrics,
+                dryrun,
+                debug)] = (a, r, unit_policies)
 
         for f in as_completed(futures):
-            a, r = futures[f]
+            a, r, unit_policies = futures[f]
             if f.exception():
                 if debug:
                     raise
                 log.warning(
-                    "Error running policy in %s @ %s exception: %s",
-                    a['name'], r, f.exception())
+                    "Error running policies:%s in %s @ %s exception: %s",
+                    ",".join(p['name'] for p in unit_policies), a['name'], r,
+                    f.exception())
+                success = False
+                continue
 
-            account_region_pcounts, account_region_success = f.result()
-            for p in account_region_pcounts:
-                policy_counts[p] += account_region_pcounts[p]
+            unit_pcounts, unit_success, unit_ptimes = f.result()
+            for pname in unit_pcounts:
+                policy_counts[pname] += unit_pcounts[pname]
+            for pname in unit_ptimes:
+                policy_times[(a['name'], r, pname)] = unit_ptimes[pname]
 
-            if not account_region_success:
+            if not unit_success:
                 success = False
-
+            if dryrun:
+                continue
+            # policies only have counts once they've run without error
+            for p in unit_policies:
+                if p['name'] in unit_pcounts:
+                    journal.record(
+                        a['account_id'], r, p, unit_pcounts[p['name']],
+                        unit_ptimes.get(p['name'], 0))
+
+    journal.close()
+    if skipped:
+        log.info("Resumed run, skipped %d completed units", skipped)
+    log.info("Ran %d units in %0.2fs", len(futures), time.time() - st)
+    for (a, r, pname), elapsed in sorted(
+            policy_times.items(), key=lambda x: x[1], reverse=True)[:SLOW_UNIT_COUNT]:
+        log.debug(
+            "Unit account:%s region:%s policy:%s time:%0.2f", a, r, pname, elapsed)
     log.info("Policy resource counts %s" % policy_counts)
 
     if not success:
@@ -1,4 +1,9 @@
+import hashlib
+import json
 import os
+import sqlite3
+import time
+
 from c7n.utils import reset_session_cache
 from contextlib import contextmanager
 
@@ -27,3 +32,62 @@ def environ(**kw):
             del os.environ[k]
         os.environ.update(current_env)
         reset_session_cache()
+
+
+class RunJournal(object):
+    """Record of the completed account, region, and policy units of a run.
+
+    Lets an interrupted or partially failed run be resumed, skipping
+    units that already completed. Units are keyed on a digest of the
+    policy data as well as its name, so edited policies are run again.
+    """
+
+    create_table = """
+    create table if not exists units (
+       account_id text,
+       region text,
+       policy text,
+       policy_digest text,
+       resources integer,
+       duration real,
+       completed real,
+       primary key (account_id, region, policy)
+    )
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = None
+
+    def open(self, resume=False):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.conn = sqlite3.connect(self.path)
+        with self.conn:
+            self.conn.execute(self.create_table)
+            if not resume:
+                self.conn.execute('delete from units')
+        return self
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    @staticmethod
+    def digest(policy_data):
+        return hashlib.sha256(
+            json.dumps(policy_data, sort_keys=True).encode('utf8')).hexdigest()
+
+    def completed(self):
+        """Map of completed unit (account_id, region, policy) to (digest, resources)."""
+        return {(a, r, p): (d, n) for a, r, p, d, n in self.conn.execute(
+            'select account_id, region, policy, policy_digest, resources from units')}
+
+    def record(self, account_id, region, policy_data, resources, duration):
+        with self.conn:
+            self.conn.execute(
+                'replace into units values (?, ?, ?, ?, ?, ?, ?)',
+                (account_id, region, policy_data['name'], self.digest(policy_data),
+                 resources, duration, time.time()))
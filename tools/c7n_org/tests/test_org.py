@@ -3,6 +3,7 @@ import mock
 import os
 import yaml
 
+from c7n.policy import Policy
 from c7n.testing import TestUtils
 from click.testing import CliRunner
 
@@ -63,9 +64,13 @@ class OrgTest(TestUtils):
     def test_cli_run_aws(self):
         run_dir = self.setup_run_dir()
         logger = mock.MagicMock()
-        run_account = mock.MagicMock()
-        run_account.return_value = (
-            {'compute': 24, 'serverless': 12}, True)
+        counts = {'compute': 24, 'serverless': 12}
+
+        def run_account(account, region, policies_config, *args):
+            names = [p['name'] for p in policies_config['policies']]
+            return (
+                {n: counts[n] for n in names}, True, {n: 0.5 for n in names})
+
         self.patch(org, 'logging', logger)
         self.patch(org, 'run_account', run_account)
         self.change_cwd(run_dir)
@@ -79,10 +84,179 @@ class OrgTest(TestUtils):
             catch_exceptions=False)
 
         self.assertEqual(result.exit_code, 0)
+        units, counts = log_output.getvalue().strip().split('\n')
+        self.assertTrue(units.startswith("Ran 4 units in"))
         self.assertEqual(
-            log_output.getvalue().strip(),
+            counts,
             "Policy resource counts Counter({'compute': 96, 'serverless': 48})")
 
+    def test_cli_run_invalid_policy(self):
+        run_dir = self.setup_run_dir(
+            policies={'policies': [
+                {'name': 'compute', 'resource': 'aws.ec2', 'region': 'us-west-2'},
+                {'name': 'broken', 'resource': 'aws.ec2',
+                 'filters': [{'type': 'not-a-filter'}]}]})
+        units = []
+
+        def run_account(account, region, policies_config, *args):
+            names = [p['name'] for p in policies_config['policies']]
+            units.append((account['name'], region, names))
+            return {n: 1 for n in names}, True, {n: 0.5 for n in names}
+
+        self.patch(org, 'logging', mock.MagicMock())
+        self.patch(org, 'run_account', run_account)
+        self.change_cwd(run_dir)
+        log_output = self.capture_logging('c7n_org')
+        result = CliRunner().invoke(
+            org.cli,
+            ['run', '-c', 'accounts.yml', '-u', 'policies.yml',
+             '--debug', '-s', 'output', '--cache-path', 'cache'],
+            catch_exceptions=False)
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('Invalid policy:broken', log_output.getvalue())
+        self.assertEqual(
+            sorted(units),
+            [('dev', 'us-west-2', ['compute']), ('qa', 'us-west-2', ['compute'])])
+
+    def test_cli_run_resume(self):
+        run_dir = self.setup_run_dir()
+        units = []
+        failing = set([('qa', 'us-west-2', 'serverless')])
+
+        def run_account(account, region, policies_config, *args):
+            counts, success = {}, True
+            for p in policies_config['policies']:
+                units.append((account['name'], region, p['name']))
+                if (account['name'], region, p['name']) in failing:
+                    success = False
+                    continue
+                counts[p['name']] = 2
+            return counts, success, {n: 0.5 for n in counts}
+
+        self.patch(org, 'logging', mock.MagicMock())
+        self.patch(org, 'run_account', run_account)
+        self.change_cwd(run_dir)
+        log_output = self.capture_logging('c7n_org')
+        args = ['run', '-c', 'accounts.yml', '-u', 'policies.yml',
+                '--debug', '-s', 'output', '--cache-path', 'cache']
+
+        result = CliRunner().invoke(org.cli, args, catch_exceptions=False)
+        self.assertEqual(result.exit_code, 1)
+        self.assertEqual(len(units), 8)
+        self.assertTrue(
+            os.path.exists(os.path.join(run_dir, 'output', org.JOURNAL_FILE)))
+
+        # dryruns neither complete units nor reset the journal
+        units[:] = []
+        failing.clear()
+        CliRunner().invoke(org.cli, args + ['--dryrun'], catch_exceptions=False)
+        self.assertEqual(len(units), 8)
+
+        units[:] = []
+        result = CliRunner().invoke(
+            org.cli, args + ['--resume'], catch_exceptions=False)
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(units, [('qa', 'us-west-2', 'serverless')])
+        self.assertIn("skipped 7 completed units", log_output.getvalue())
+        self.assertIn(
+            "Counter({'compute': 8, 'serverless': 8})", log_output.getvalue())
+
+        # without resume, the journal starts over
+        units[:] = []
+        CliRunner().invoke(org.cli, args, catch_exceptions=False)
+        self.assertEqual(len(units), 8)
+
+    def test_cli_run_unit_policies(self):
+        run_dir = self.setup_run_dir(policies={'policies': [
+            {'name': 'policy-%d' % i, 'resource': 'aws.ec2',
+             'mode': {'type': 'periodic', 'schedule': 'rate(1 day)',
+                      'role': 'custodian'}}
+            for i in range(3)]})
+        units = []
+
+        def run_account(account, region, policies_config, *args):
+            units.append((account['name'], region, policies_config['policies']))
+            names = [p['name'] for p in policies_config['policies']]
+            return {n: 1 for n in names}, True, {n: 0.5 for n in names}
+
+        self.patch(org, 'UNIT_POLICY_COUNT', 2)
+        self.patch(org, 'logging', mock.MagicMock())
+        self.patch(org, 'run_account', run_account)
+        self.change_cwd(run_dir)
+        result = CliRunner().invoke(
+            org.cli,
+            ['run', '-c', 'accounts.yml', '-u', 'policies.yml', '-r', 'us-east-1',
+             '--debug', '-s', 'output', '--cache-path', 'cache'],
+            catch_exceptions=False)
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(
+            sorted((a, r, [p['name'] for p in policies]) for a, r, policies in units),
+            [('dev', 'us-east-1', ['policy-0', 'policy-1']),
+             ('dev', 'us-east-1', ['policy-2']),
+             ('qa', 'us-east-1', ['policy-0', 'policy-1']),
+             ('qa', 'us-east-1', ['policy-2'])])
+        # validation doesn't expand the policies sent to accounts
+        self.assertEqual(
+            set(p['mode']['role'] for a, r, policies in units for p in policies),
+            set(['custodian']))
+
+    def test_run_account_validates_expansions(self):
+        validated = []
+        validate = Policy.validate
+
+        def validate_policy(p):
+            validated.append(p.data['filters'][0]['op'])
+            return validate(p)
+
+        self.patch(org, 'VALIDATED_POLICIES', set())
+        self.patch(Policy, 'validate', validate_policy)
+        self.patch(Policy, 'run', lambda p: [])
+        self.patch(org, 'logging', mock.MagicMock())
+        run_dir = self.get_temp_dir()
+        log_output = self.capture_logging('c7n_org')
+        policy = {'name': 'compute', 'resource': 'aws.ec2', 'filters': [
+            {'type': 'value', 'key': 'State.Name', 'op': '{state_op}', 'value': 'running'}]}
+
+        results = [
+            org.run_account(
+                {'name': name, 'account_id': '123456789012', 'vars': {'state_op': op}},
+                'us-east-1', {'policies': [copy.deepcopy(policy)]},
+                run_dir, 0, run_dir, False, False, False)[1]
+            for name, op in (('dev', 'eq'), ('qa', 'eq'), ('prod', 'bogus'))]
+        self.assertEqual(results, [True, True, False])
+        # validated once per distinct expansion, not per account
+        self.assertEqual(validated, ['eq', 'bogus'])
+        self.assertIn(
+            'Invalid policy:compute account:prod', log_output.getvalue())
+
+    def test_run_journal_policy_changed(self):
+        journal = org.RunJournal(
+            os.path.join(self.get_temp_dir(), 'journal.db')).open()
+        self.addCleanup(journal.close)
+        journal.record('123', 'us-east-1', {'name': 'compute'}, 3, 1.5)
+        completed = journal.completed()
+        self.assertEqual(
+            completed[('123', 'us-east-1', 'compute')],
+            (org.RunJournal.digest({'name': 'compute'}), 3))
+        self.assertNotEqual(
+            org.RunJournal.digest({'name': 'compute', 'filters': []}),
+            org.RunJournal.digest({'name': 'compute'}))
+        self.assertEqual(
+            org.get_journal_path('s3://bucket/prefix', '/tmp/cache'),
+            '/tmp/cache/%s-%s' % ('91937c32305c', org.JOURNAL_FILE))
+
+    def test_needs_expansion(self):
+        self.assertFalse(org.needs_expansion(
+            {'name': 'compute', 'resource': 'aws.ec2',
+             'filters': [{'tag:Owner': 'absent'}, {'type': 'value', 'value': 5}]}))
+        self.assertTrue(org.needs_expansion(
+            {'name': 'compute', 'resource': 'aws.ec2',
+             'actions': [{'type': 'tag', 'key': 'Account', 'value': '{account_id}'}]}))
+        self.assertTrue(org.needs_expansion(
+            {'name': 'compute', 'resource': 'aws.ec2',
+             'mode': {'type': 'periodic', 'role': 'custodian'}}))
+
     def test_filter_policies(self):
         d = {'policies': [
             {'name': 'find-ml',
@@ -13,23 +13,19 @@
 # limitations under the License.
 
 import argparse
+import codecs
 from dateutil.parser import parse
 from functools import partial
-from gzip import GzipFile
 import json
 import logging
-import math
 from multiprocessing import cpu_count, Pool
 from c7n.credentials import SessionFactory
 import os
-import tempfile
+import re
+import threading
 import time
 import sqlite3
-
-try:
-    from cStringIO import StringIO
-except ImportError:
-    from io import BytesIO as StringIO
+import zlib
 
 from botocore.client import Config
 
@@ -38,53 +34,79 @@ log = logging.getLogger('c7n_traildb')
 
 options = None
 
+# per worker process s3 client
+s3 = None
 
-def dump(o):
-    return json.dumps(o)
-
-
-def load(s):
-    return json.loads(s)
-
-
-def chunks(iterable, size=50):
-    """Break an iterable into lists of size"""
-    batch = []
-    for n in iterable:
-        batch.append(n)
-        if len(batch) % size == 0:
-            yield batch
-            batch = []
-    if batch:
-        yield batch
+RECORDS_START = re.compile(r'"Records"\s*:\s*\[')
+RECORDS_SEP = re.compile(r'[\s,]*')
 
 
-def process_trail_set(
-        object_set, map_records, reduce_results=None, trail_bucket=None):
-
+def init_worker():
+    global s3
     session_factory = SessionFactory(
         options.region, options.profile, options.assume_role)
-
     s3 = session_factory().client(
         's3', config=Config(signature_version='s3v4'))
 
-    previous = None
-    for o in object_set:
-        body = s3.get_object(Key=o['Key'], Bucket=trail_bucket)['Body']
-        fh = GzipFile(fileobj=StringIO(body.read()))
-        data = json.load(fh)
-        s = map_records(data['Records'])
-        if reduce_results:
-            previous = reduce_results(s, previous)
-    return previous
+
+def iter_records(fh, chunk_size=1024 * 1024):
+    """Incrementally decompress and parse the records of a trail object.
+
+    Only a chunk of the object's text and the record being parsed are
+    held in memory, rather than the whole object and all its records.
+    """
+    decoder = json.JSONDecoder()
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    text = codecs.getincrementaldecoder('utf8')()
+    buf, pos, started = '', 0, False
+
+    while True:
+        chunk = fh.read(chunk_size)
+        if chunk:
+            buf += text.decode(decompressor.decompress(chunk))
+        else:
+            buf += text.decode(decompressor.flush(), final=True)
+
+        if not started:
+            match = RECORDS_START.search(buf)
+            if match is None:
+                if not chunk:
+                    raise ValueError("Trail object has no records")
+                continue
+            started, pos = True, match.end()
+
+        while True:
+            pos = RECORDS_SEP.match(buf, pos).end()
+            if buf[pos:pos + 1] == ']':
+                return
+            try:
+                record, pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                # record is split across chunks
+                if not chunk:
+                    raise
+                break
+            yield record
+        buf, pos = buf[pos:], 0
+
+
+def process_trail_object(key, map_records, trail_bucket=None):
+    body = s3.get_object(Key=key, Bucket=trail_bucket)['Body']
+    return map_records(iter_records(body))
 
 
 class TrailDB(object):
 
+    # rows inserted per transaction
+    batch_size = 10000
+
     def __init__(self, path):
         self.path = path
         self.conn = sqlite3.connect(self.path)
+        self.conn.execute('pragma journal_mode=wal')
+        self.conn.execute('pragma synchronous=normal')
         self.cursor = self.conn.cursor()
+        self.pending = 0
         self._init()
 
     def _init(self):
@@ -107,58 +129,37 @@ class TrailDB(object):
         command += ')'
         self.cursor.execute(command)
 
-    def insert(self, records):
-        command = "insert into events values (?, ?, ?, ?, ?, ?, ?, ?, ?"
-
+        # sqlite caches the compiled statement by its text, so the
+        # insert is only prepared once.
+        self.insert_command = "insert into events values (?, ?, ?, ?, ?, ?, ?, ?, ?"
         if options.field:
-            command += ', ?' * len(options.field)
+            self.insert_command += ', ?' * len(options.field)
+        self.insert_command += ")"
 
-        command += ")"
-        self.cursor.executemany(command, records)
+    def insert(self, records):
+        self.cursor.executemany(self.insert_command, records)
+        self.pending += len(records)
+        if self.pending >= self.batch_size:
+            self.flush()
 
     def flush(self):
         self.conn.commit()
+        self.pending = 0
 
-
-def reduce_records(x, y):
-    if y is None:
-        return x
-    elif x is None:
-        return y
-    y.extend(x)
-    return y
-
-
-# STOP = 42
-#
-# def store_records(output, q):
-#    db = TrailDB(output)
-#    while True:
-#        results = q.get()
-#        if results == STOP:
-#            return
-#        for r in results:
-#            for fpath in r:
-#                with open(fpath) as fh:
-#                    db.insert(load(fh.read()))
-#                os.remove(fpath)
-#        db.flush()
-
-
-def process_record_set(object_processor, q):
-    def f(*args, **kw):
-        r = object_processor(*args, **kw)
-        if r:
-            q.put(r)
-        return r
+    def index(self):
+        """Index the events table, done after loading as its far faster
+        than maintaining the indexes during the load."""
+        for column in ('event_date', 'event_name', 'user_id'):
+            self.cursor.execute(
+                'create index if not exists events_{0} on events ({0})'.format(column))
+        self.flush()
 
 
 def process_records(records,
                     uid_filter=None,
                     event_filter=None,
                     service_filter=None,
-                    not_service_filter=None,
-                    data_dir=None):
+                    not_service_filter=None):
 
     user_records = []
     for r in records:
@@ -202,34 +203,45 @@ def process_records(records,
 
         user_records.append(user_record)
 
-    if data_dir:
-        if not user_records:
-            return
-        # Spool to temporary files to get out of mem
-        fh = tempfile.NamedTemporaryFile(dir=data_dir, delete=False, mode='w')
-        fh.write(dump(user_records))
-        fh.flush()
-        fh.close()
-        return [fh.name]
     return user_records
 
 
+def iter_objects(s3, bucket_name, prefix, pending, stopped):
+    """Yield the keys under prefix, blocking while ``pending`` objects
+    are being processed and not yet written."""
+    paginator = s3.get_paginator('list_objects')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        for o in page.get('Contents', ()):
+            pending.acquire()
+            if stopped.is_set():
+                return
+            yield o['Key']
+        if page.get('Contents'):
+            log.debug('Last Page Key: %s', page['Contents'][-1]['Key'])
+
+
 def process_bucket(
         bucket_name, prefix,
         output=None, uid_filter=None, event_filter=None,
-        service_filter=None, not_service_filter=None, data_dir=None):
+        service_filter=None, not_service_filter=None):
+    """Load the trail objects under prefix into a sqlite db.
 
+    Objects are fetched and parsed by a process pool and their rows are
+    written by this process. At most a few objects per worker are in
+    flight, so memory use is bounded regardless of the volume of trail.
+    """
     session_factory = SessionFactory(
         options.region, options.profile, options.assume_role)
 
-    s3 = session_factory().client(
+    client = session_factory().client(
         's3', config=Config(signature_version='s3v4'))
 
-    paginator = s3.get_paginator('list_objects')
     # PyPy has some memory leaks.... :-(
-    pool = Pool(maxtasksperchild=10)
+    pool = Pool(maxtasksperchild=100, initializer=init_worker)
+    pending = threading.Semaphore(cpu_count() * 4)
+    stopped = threading.Event()
     t = time.time()
-    object_count = object_size = 0
+    object_count = record_count = 0
 
     log.info("Processing:%d cloud-trail %s" % (
         cpu_count(),
@@ -240,47 +252,41 @@ def process_bucket(
         uid_filter=uid_filter,
         event_filter=event_filter,
         service_filter=service_filter,
-        not_service_filter=not_service_filter,
-        data_dir=data_dir)
+        not_service_filter=not_service_filter)
 
     object_processor = partial(
-        process_trail_set,
+        process_trail_object,
         map_records=record_processor,
-        reduce_results=reduce_records,
         trail_bucket=bucket_name)
     db = TrailDB(output)
 
-    bsize = math.ceil(1000 / float(cpu_count()))
-    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
-        objects = page.get('Contents', ())
-        object_count += len(objects)
-        object_size += sum([o['Size'] for o in objects])
-
-        pt = time.time()
-        if pool:
-            results = pool.map(object_processor, chunks(objects, bsize))
-        else:
-            results = map(object_processor, chunks(objects, bsize))
-
-        st = time.time()
-        log.info("Loaded page time:%0.2fs", st - pt)
-
-        for r in results:
-            for fpath in r:
-                with open(fpath) as fh:
-                    db.insert(load(fh.read()))
-                os.remove(fpath)
-            db.flush()
-
-        l = t # NOQA
-        t = time.time()
-
-        log.info("Stored page time:%0.2fs", t - st)
-        log.info(
-            "Processed paged time:%0.2f size:%s count:%s" % (
-                t - l, object_size, object_count))
-        if objects:
-            log.info('Last Page Key: %s', objects[-1]['Key'])
+    objects = iter_objects(client, bucket_name, prefix, pending, stopped)
+    try:
+        for records in pool.imap_unordered(object_processor, objects):
+            pending.release()
+            db.insert(records)
+            object_count += 1
+            record_count += len(records)
+            if object_count % 1000 == 0:
+                log.info(
+                    "Processed objects:%d records:%d time:%0.2fs",
+                    object_count, record_count, time.time() - t)
+        db.flush()
+    except Exception:
+        # unblock the pool's task feeder so the pool can shut down
+        stopped.set()
+        pending.release()
+        pool.terminate()
+        raise
+    pool.close()
+    pool.join()
+
+    log.info(
+        "Stored objects:%d records:%d time:%0.2fs",
+        object_count, record_count, time.time() - t)
+    st = time.time()
+    db.index()
+    log.info("Indexed time:%0.2fs", time.time() - st)
 
 
 def get_bucket_path(options):
@@ -310,7 +316,9 @@ def setup_parser():
     parser.add_argument("--not-source")
     parser.add_argument("--day")
     parser.add_argument("--month")
-    parser.add_argument("--tmpdir", default="/tmp/traildb")
+    parser.add_argument(
+        "--tmpdir", default=None,
+        help="Deprecated and ignored, records are no longer spooled to disk")
     parser.add_argument("--region", default="us-east-1")
     parser.add_argument("--output", default="results.db")
     parser.add_argument(
@@ -332,9 +340,6 @@ def main():
     global options
     parser = setup_parser()
     options = parser.parse_args()
-
-    if options.tmpdir and not os.path.exists(options.tmpdir):
-        os.makedirs(options.tmpdir)
     prefix = get_bucket_path(options)
 
     process_bucket(
@@ -344,8 +349,7 @@ def main():
         options.user,
         options.event,
         options.source,
-        options.not_source,
-        options.tmpdir
+        options.not_source
     )
 
 
@@ -0,0 +1,69 @@
+# Copyright 2019 Capital One Services, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import gzip
+import io
+import json
+import os
+
+from c7n.testing import TestUtils
+
+from c7n_traildb import traildb
+
+TRAIL_PATH = os.path.join(os.path.dirname(__file__), 'data', 'trail.json.gz')
+
+
+class TrailDBTest(TestUtils):
+
+    def setUp(self):
+        self.patch(traildb, 'options', traildb.setup_parser().parse_args(
+            ['--bucket', 'trails', '--account', '123456789012',
+             '--tmpdir', '/tmp/traildb']))
+
+    def get_records(self):
+        with gzip.open(TRAIL_PATH) as fh:
+            return json.loads(fh.read().decode('utf8'))['Records']
+
+    def test_iter_records(self):
+        expected = self.get_records()
+        # records split across chunks, and across multi byte characters
+        for chunk_size in (7, 64, 1024 * 1024):
+            with open(TRAIL_PATH, 'rb') as fh:
+                self.assertEqual(
+                    list(traildb.iter_records(fh, chunk_size)), expected)
+
+        empty = io.BytesIO()
+        with gzip.GzipFile(fileobj=empty, mode='wb') as fh:
+            fh.write(b'{"Records": []}')
+        self.assertEqual(
+            list(traildb.iter_records(io.BytesIO(empty.getvalue()))), [])
+
+    def test_load_and_index(self):
+        with open(TRAIL_PATH, 'rb') as fh:
+            records = traildb.process_records(
+                traildb.iter_records(fh, 64), service_filter='ec2.amazonaws.com')
+        db = traildb.TrailDB(os.path.join(self.get_temp_dir(), 'trail.db'))
+        self.patch(db, 'batch_size', 1)
+        db.insert(records)
+        db.index()
+        self.assertEqual(
+            db.conn.execute(
+                'select event_name, user_id, error_code from events '
+                'order by event_date').fetchall(),
+            [('RunInstances', 'root', None),
+             ('DescribeInstances', 'arn:aws:iam::123456789012:user/alice',
+              'UnauthorizedOperation')])
+        self.assertEqual(
+            sorted(r[0] for r in db.conn.execute(
+                "select name from sqlite_master where type = 'index'")),
+            ['events_event_date', 'events_event_name', 'events_user_id'])
@@ -0,0 +1,91 @@
+# Copyright 2019 Capital One Services, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark cold start of policy loading in the cli and lambda handler.
+
+Each run is a fresh interpreter, timing from process start until the
+policies are loaded and validated, with resource types loaded on demand
+or eagerly (ie. all resource modules, as before the resource map).
+
+ie. python tools/dev/coldstart.py --resource ec2 --iterations 5
+"""
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import click
+
+CLI = '''
+import time
+from c7n.config import Config
+from c7n.policy import load
+from c7n.resources import load_resources
+if {eager}:
+    load_resources()
+policies = load(Config.empty(), 'policy.json')
+print(time.time() - {start})
+'''
+
+LAMBDA = '''
+import time
+from c7n import handler
+from c7n.policy import PolicyCollection, get_policy_resource_types
+from c7n.resources import load_resources
+if {eager}:
+    load_resources()
+handler.policy_config = data = handler.json.load(open('config.json'))
+load_resources(get_policy_resource_types(data))
+for p in PolicyCollection.from_data(data, handler.Config.empty()):
+    p.validate()
+print(time.time() - {start})
+'''
+
+
+def run(script, work_dir, eager):
+    env = dict(os.environ, AWS_EXECUTION_ENV='AWS_Lambda_python3.7',
+               PYTHONPATH=os.pathsep.join(sys.path))
+    code = 'import time; start = time.time()\n' + script.format(
+        start='start', eager=eager)
+    output = subprocess.check_output(
+        [sys.executable, '-W', 'ignore', '-c', code], cwd=work_dir, env=env)
+    return float(output.decode('utf8').strip().splitlines()[-1])
+
+
+@click.command()
+@click.option('--resource', multiple=True, default=['ec2'])
+@click.option('--iterations', default=5, help='runs per mode, the median is reported')
+def cli(resource, iterations):
+    data = {'policies': [
+        {'name': 'policy-%d' % i, 'resource': r} for i, r in enumerate(resource)]}
+    work_dir = tempfile.mkdtemp()
+    try:
+        for name in ('policy.json', 'config.json'):
+            with open(os.path.join(work_dir, name), 'w') as fh:
+                json.dump(data, fh)
+        for label, script in (('cli', CLI), ('lambda', LAMBDA)):
+            for eager in (True, False):
+                times = sorted([run(script, work_dir, eager) for i in range(iterations)])
+                print("%s %s resources:%s time:%0.3fs" % (
+                    label, eager and 'eager' or 'lazy', ','.join(resource),
+                    times[len(times) // 2]))
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    cli()
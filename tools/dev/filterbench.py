@@ -0,0 +1,125 @@
+# Copyright 2019 Capital One Services, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Micro benchmarks for filter evaluation over synthetic resource sets.
+
+ie. python tools/dev/filterbench.py value --count 100000
+    python tools/dev/filterbench.py offhours --count 50000 --schedules 20
+"""
+from __future__ import print_function
+
+from datetime import datetime, timedelta
+import random
+import time
+
+import click
+
+from c7n.filters.core import ValueFilter
+from c7n.filters.offhours import OffHour, OnHour
+
+
+VALUE_FILTERS = {
+    'eq': {'key': 'State.Name', 'value': 'running'},
+    'tag': {'key': 'tag:Env', 'value': 'prod'},
+    'regex': {'key': 'InstanceType', 'op': 'regex', 'value': '^m5\\..*'},
+    'value-regex': {
+        'key': 'tag:Meta', 'op': 'gt', 'value_type': 'integer',
+        'value_regex': 'size=([0-9]+)', 'value': 50},
+    'age': {'key': 'LaunchTime', 'op': 'gt', 'value_type': 'age', 'value': 30},
+    'expiration': {
+        'key': 'tag:Expires', 'op': 'lte', 'value_type': 'expiration', 'value': 7},
+    'in': {
+        'key': 'ImageId', 'op': 'in',
+        'value': ['ami-%08d' % i for i in range(0, 100000, 2)]},
+    'intersect': {
+        'key': 'SecurityGroups[].GroupId', 'op': 'intersect',
+        'value': ['sg-%08d' % i for i in range(0, 100000, 2)]},
+}
+
+
+def generate_instances(count):
+    now = datetime.utcnow()
+    for i in range(count):
+        yield {
+            'InstanceId': 'i-%012d' % i,
+            'ImageId': 'ami-%08d' % random.randint(0, 100000),
+            'InstanceType': random.choice(['m5.large', 't2.micro', 'c5.xlarge']),
+            'LaunchTime': (now - timedelta(random.randint(0, 90))).isoformat(),
+            'State': {'Name': random.choice(['running', 'stopped'])},
+            'SecurityGroups': [
+                {'GroupId': 'sg-%08d' % random.randint(0, 100000)} for _ in range(2)],
+            'Tags': [
+                {'Key': 'Env', 'Value': random.choice(['prod', 'dev'])},
+                {'Key': 'Meta', 'Value': 'size=%d' % random.randint(0, 100)},
+                {'Key': 'Expires',
+                 'Value': (now + timedelta(random.randint(0, 14))).isoformat()}]}
+
+
+def timed(func, resources):
+    t = time.time()
+    matched = len([r for r in resources if func(r)])
+    return time.time() - t, matched
+
+
+@click.group()
+def cli():
+    """Filter benchmarks"""
+
+
+@cli.command()
+@click.option('--count', default=100000, help='number of synthetic resources')
+@click.option('--name', multiple=True, type=click.Choice(sorted(VALUE_FILTERS)))
+def value(count, name):
+    """Per resource cost of value filter evaluation"""
+    resources = list(generate_instances(count))
+    for n in name or sorted(VALUE_FILTERS):
+        data = dict(VALUE_FILTERS[n], type='value')
+        f = ValueFilter(data).validate()
+        elapsed, matched = timed(f, resources)
+        print("%-12s matched:%-7d total:%0.3fs per-resource:%0.2fus" % (
+            n, matched, elapsed, elapsed / count * 1e6))
+
+
+def generate_schedules(count):
+    days = ['m-f', 'm-u', 'm-h', 'u-h', 't-s']
+    zones = ['et', 'pt', 'ct', 'gmt', 'cet', 'jst', 'aet']
+    schedules = ['tz=%s' % z for z in zones]
+    while len(schedules) < count:
+        d = random.choice(days)
+        schedules.append('off=(%s,%d);on=(%s,%d);tz=%s' % (
+            d, random.randint(17, 23), d, random.randint(5, 9),
+            random.choice(zones)))
+    return schedules[:count]
+
+
+@cli.command()
+@click.option('--count', default=50000, help='number of synthetic resources')
+@click.option('--schedules', default=20, help='number of distinct schedule tags')
+def offhours(count, schedules):
+    """Per resource cost of offhour and onhour evaluation"""
+    values = generate_schedules(schedules)
+    resources = []
+    for r in generate_instances(count):
+        r['Tags'].append({'Key': 'maid_offhours', 'Value': random.choice(values)})
+        resources.append(r)
+    for klass in (OffHour, OnHour):
+        f = klass({'default_tz': 'et'}).validate()
+        t = time.time()
+        matched = len(f.process(resources))
+        elapsed = time.time() - t
+        print("%-12s matched:%-7d total:%0.3fs per-resource:%0.2fus" % (
+            klass.__name__.lower(), matched, elapsed, elapsed / count * 1e6))
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,90 @@
+# Copyright 2019 Capital One Services, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark splitting a synthetic firehose flow log archive into records.
+
+ie. python tools/dev/flowbench.py --size 1024
+"""
+from __future__ import print_function
+
+import gzip
+import json
+import os
+import random
+import tempfile
+import time
+
+import click
+
+# flowdeliver creates its s3 client on import
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+from c7n_logexporter.flowdeliver import records_iter, sizeof_fmt  # noqa: E402
+
+
+def generate_record(events):
+    eni = 'eni-%08x' % random.randint(0, 2 ** 32)
+    ts = 1546300800000
+    return {
+        'messageType': 'DATA_MESSAGE',
+        'owner': '123456789012',
+        'logGroup': 'flow-logs',
+        'logStream': '%s-all' % eni,
+        'subscriptionFilters': ['firehose'],
+        'logEvents': [{
+            'id': str(random.getrandbits(64)),
+            'timestamp': ts + i,
+            'message': '2 123456789012 %s 10.0.%d.%d 10.0.%d.%d %d 443 6 %d %d %d %d ACCEPT OK' % (
+                eni, i % 255, i % 7, i % 13, i % 255, 1024 + i, i % 20,
+                i * 40, ts // 1000, ts // 1000 + 60)}
+            for i in range(events)]}
+
+
+def generate_archive(path, size, events):
+    """Write a firehose archive of ``size`` uncompressed bytes.
+
+    Records are concatenated without delimiters, as firehose delivers
+    them. A few distinct records are repeated to keep generation cheap.
+    """
+    records = [json.dumps(generate_record(events)).encode('utf8') for i in range(64)]
+    written = count = 0
+    with gzip.GzipFile(path, mode='wb', compresslevel=1) as fh:
+        while written < size:
+            r = records[count % len(records)]
+            fh.write(r)
+            written += len(r)
+            count += 1
+    return written, count
+
+
+@click.command()
+@click.option('--size', default=1024, help='uncompressed archive size in MiB')
+@click.option('--events', default=50, help='log events per record')
+def cli(size, events):
+    with tempfile.NamedTemporaryFile(suffix='.gz') as fh:
+        t = time.time()
+        written, count = generate_archive(fh.name, size * 1024 * 1024, events)
+        print("generated %s archive records:%d time:%0.2fs" % (
+            sizeof_fmt(written), count, time.time() - t))
+
+        t = time.time()
+        found = 0
+        for r in records_iter(gzip.GzipFile(fh.name, mode='r')):
+            found += 1
+        elapsed = time.time() - t
+        assert found == count, "found %d of %d records" % (found, count)
+        print("split records:%d time:%0.2fs %s/s" % (
+            found, elapsed, sizeof_fmt(written / elapsed)))
+
+
+if __name__ == '__main__':
+    cli()
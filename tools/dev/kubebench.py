@@ -0,0 +1,142 @@
+# Copyright 2019 Capital One Services, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark listing kubernetes pods against a local fake api server.
+
+The server synthesizes a pod list, honoring limit and continue. Each
+mode lists the pods in a fresh process, reporting time and peak rss.
+
+- models: one unpaged list call, deserialized to models and to_dict
+- query: c7n_kube's paged list with raw json decoding
+
+ie. python tools/dev/kubebench.py --pods 100000
+"""
+from __future__ import print_function
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+import click
+from six.moves import socketserver
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from six.moves.urllib.parse import parse_qs, urlparse
+
+
+def generate_pod(idx):
+    name = 'web-%d' % idx
+    return {
+        'metadata': {
+            'name': name, 'namespace': 'ns-%d' % (idx % 50),
+            'uid': '6f1c6a6e-%012d' % idx,
+            'resourceVersion': str(idx), 'creationTimestamp': '2019-05-01T12:00:00Z',
+            'labels': {'app': 'web', 'pod-template-hash': '5d4f8c'},
+            'ownerReferences': [{
+                'apiVersion': 'apps/v1', 'kind': 'ReplicaSet', 'name': 'web-5d4f8c',
+                'uid': 'abc', 'controller': True, 'blockOwnerDeletion': True}]},
+        'spec': {
+            'nodeName': 'node-%d' % (idx % 200),
+            'restartPolicy': 'Always', 'dnsPolicy': 'ClusterFirst',
+            'serviceAccountName': 'default',
+            'containers': [{
+                'name': 'web', 'image': 'nginx:1.15',
+                'ports': [{'containerPort': 80, 'protocol': 'TCP'}],
+                'env': [{'name': 'ENV_%d' % i, 'value': 'value'} for i in range(4)],
+                'resources': {'limits': {'cpu': '500m', 'memory': '128Mi'}},
+                'volumeMounts': [{'name': 'token', 'mountPath': '/var/run/secrets',
+                                  'readOnly': True}]}],
+            'volumes': [{'name': 'token', 'secret': {'secretName': 'default-token'}}]},
+        'status': {
+            'phase': 'Running', 'podIP': '10.0.%d.%d' % (idx // 250 % 250, idx % 250),
+            'hostIP': '10.1.0.1', 'startTime': '2019-05-01T12:00:01Z',
+            'conditions': [{'type': 'Ready', 'status': 'True',
+                            'lastTransitionTime': '2019-05-01T12:00:05Z'}]}}
+
+
+class PodListHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        start = int(params.get('continue', 0))
+        end = min(self.server.pods, start + int(params.get('limit', self.server.pods)))
+        body = json.dumps({
+            'apiVersion': 'v1', 'kind': 'PodList',
+            'metadata': {'resourceVersion': '1',
+                         'continue': end < self.server.pods and str(end) or ''},
+            'items': [generate_pod(i) for i in range(start, end)]}).encode('utf8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class PodListServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+LIST = '''
+import resource, sys, time
+from c7n_kube.client import Session
+t = time.time()
+if sys.argv[2] == 'models':
+    client = Session(sys.argv[1]).client('Core', 'V1')
+    pods = client.list_pod_for_all_namespaces().to_dict()['items']
+else:
+    from c7n.config import Bag
+    from c7n_kube.query import ResourceQuery
+    from c7n_kube.resources.core.pod import Pod
+    pods = ResourceQuery(lambda: Session(sys.argv[1])).filter(Bag(resource_type=Pod.resource_type))
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(len(pods), time.time() - t, rss)
+'''
+
+
+def write_kube_config(fh, port):
+    json.dump({
+        'apiVersion': 'v1', 'kind': 'Config', 'current-context': 'bench',
+        'contexts': [{'name': 'bench', 'context': {'cluster': 'bench', 'user': 'bench'}}],
+        'clusters': [{'name': 'bench', 'cluster': {'server': 'http://127.0.0.1:%d' % port}}],
+        'users': [{'name': 'bench', 'user': {'token': 'bench'}}]}, fh)
+    fh.flush()
+
+
+@click.command()
+@click.option('--pods', default=100000)
+def cli(pods):
+    server = PodListServer(('127.0.0.1', 0), PodListHandler)
+    server.pods = pods
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    with tempfile.NamedTemporaryFile('w', suffix='.json') as fh:
+        write_kube_config(fh, server.server_address[1])
+        for mode in ('models', 'query'):
+            output = subprocess.check_output(
+                [sys.executable, '-W', 'ignore', '-c', LIST, fh.name, mode], env=env)
+            count, elapsed, rss = output.decode('utf8').split()
+            print("%s pods:%s time:%0.2fs peak rss:%dMB" % (
+                mode, count, float(elapsed), int(rss) // 1024))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,120 @@
+# Copyright 2019 Capital One Services, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark policies end to end against recorded api responses.
+
+Policies run against the test suite's placebo recordings, scaled up to
+synthesize larger accounts, so regressions in query and filter code
+can be measured without aws.
+
+ie. python tools/dev/policybench.py --scale 100 --latency 0.01
+    python tools/dev/policybench.py --name sg-unused --iterations 5
+"""
+from __future__ import print_function
+
+import datetime
+import os
+import shutil
+import tempfile
+import time
+
+import click
+import mock
+
+from c7n.config import Config
+from c7n.filters import offhours
+from c7n.policy import Policy
+from c7n.resources import load_resources, s3
+from c7n.testing import ReplaySessionFactory, mock_datetime_now
+from c7n.utils import reset_session_cache
+
+
+PLACEBO_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'tests', 'data', 'placebo')
+
+# name -> (recording, policy, patchers)
+BENCHMARKS = {
+    # a monday at the offhour, the recorded schedule tags are opted out
+    # or unparseable, so opt out on an untagged key to match every
+    # running instance by the default schedule.
+    'ec2-offhours': ('test_offhours_records', {
+        'resource': 'ec2',
+        'filters': [
+            {'State.Name': 'running'},
+            {'type': 'offhour', 'tag': 'maid_offhours', 'opt-out': True,
+             'default_tz': 'est', 'offhour': 19}]},
+        (mock_datetime_now(datetime.datetime(2016, 8, 15, 19), offhours.datetime),)),
+    # none of the recorded bucket policies grant cross account access
+    # (cloudtrail's accounts are allowed), so also match the policies
+    # denying unencrypted puts, evaluating both against every bucket.
+    's3-bucket-policy': ('test_s3_remove_policy', {
+        'resource': 's3',
+        'filters': [{'or': [
+            'cross-account',
+            {'type': 'has-statement', 'statements': [{
+                'Effect': 'Deny', 'Principal': '*', 'Action': 's3:PutObject'}]}]}]},
+        # the recording only has bucket policies
+        (mock.patch.object(
+            s3, 'S3_AUGMENT_TABLE', [('get_bucket_policy', 'Policy', None, 'Policy')]),)),
+    'sg-unused': ('test_security_group_unused', {
+        'resource': 'security-group',
+        'filters': ['unused']}, ()),
+    'iam-credential-report': ('test_iam_user_unused_keys', {
+        'resource': 'iam-user',
+        'filters': [{
+            'type': 'credential', 'key': 'access_keys.last_used_date',
+            'report_delay': 0.01, 'value': 'empty'}]}, ()),
+}
+
+
+def run_benchmark(name, scale, latency):
+    recording, data, patchers = BENCHMARKS[name]
+    output_dir = tempfile.mkdtemp()
+    factory = ReplaySessionFactory(
+        os.path.join(PLACEBO_DIR, recording), scale=scale, latency=latency)
+    policy = Policy(
+        dict(data, name=name),
+        Config.empty(output_dir=output_dir, account_id='644160558196',
+                     region='us-east-1'),
+        factory)
+    for p in patchers:
+        p.start()
+    # sessions are cached per thread across policies
+    reset_session_cache()
+    try:
+        t = time.time()
+        resources = policy.run()
+        return time.time() - t, len(resources), factory.call_count
+    finally:
+        for p in patchers:
+            p.stop()
+        shutil.rmtree(output_dir)
+
+
+@click.command()
+@click.option('--name', multiple=True, type=click.Choice(sorted(BENCHMARKS)))
+@click.option('--scale', default=10, help='copies of each recorded resource')
+@click.option('--latency', default=0.0, help='seconds of latency per api call')
+@click.option('--iterations', default=3, help='runs per policy, the best is reported')
+def cli(name, scale, latency, iterations):
+    load_resources()
+    for n in (name or sorted(BENCHMARKS)):
+        runs = [run_benchmark(n, scale, latency) for i in range(iterations)]
+        elapsed, count, calls = min(runs)
+        print("%s resources:%d api calls:%d time:%0.3fs" % (
+            n, count, calls, elapsed))
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,77 @@
+# Copyright 2019 Capital One Services, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Generate the aws resource type to module index, c7n/resources/resource_map.py
+
+Rerun when adding or renaming an aws resource type.
+
+ie. python tools/dev/resourcemap.py
+"""
+from __future__ import print_function
+
+import importlib
+import os
+import pkgutil
+
+import click
+
+import c7n.resources
+from c7n.resources.aws import AWS
+
+HEADER = '''\
+# Copyright 2019 Capital One Services, LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Generated by tools/dev/resourcemap.py, do not edit.
+#
+# aws resource type (and alias) -> module registering it
+'''
+
+
+def get_resource_map():
+    for _, name, _ in pkgutil.iter_modules(c7n.resources.__path__):
+        if name != 'resource_map':
+            importlib.import_module('c7n.resources.%s' % name)
+    resource_map = {}
+    for rtype, klass in AWS.resources.items():
+        for name in [rtype] + list(klass.type_aliases or ()):
+            resource_map['aws.%s' % name] = klass.__module__
+    return resource_map
+
+
+@click.command()
+@click.option('-f', '--output', type=click.File('w'), default=os.path.join(
+    os.path.dirname(c7n.resources.__file__), 'resource_map.py'))
+def cli(output):
+    resource_map = get_resource_map()
+    output.write(HEADER)
+    output.write('ResourceMap = {\n')
+    for rtype in sorted(resource_map):
+        output.write('    "%s": "%s",\n' % (rtype, resource_map[rtype]))
+    output.write('}\n')
+    print("wrote %d resource types to %s" % (len(resource_map), output.name))
+
+
+if __name__ == '__main__':
+    cli()